@@ -1,13 +1,103 @@
-from flask import Flask, render_template, request
+from flask import Flask, Response, render_template, request, jsonify
 from flask_wtf import CSRFProtect
 import html
+import json
 import os
 import re
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pattern_cache import PatternCache
+from sandbox import RegexSandbox, SandboxError, MappedFile
 
 app = Flask(__name__)
 app.config["SECRET_KEY"] = os.environ.get("SECRET_KEY", "change-me-in-prod")
+# Compiled patterns (and compile errors) are reused across requests and threads
+app.config["PATTERN_CACHE_SIZE"] = int(os.environ.get("PATTERN_CACHE_SIZE", 512))
+# Matching runs in worker processes with a wall-clock and memory budget per request
+app.config["REGEX_WORKERS"] = int(os.environ.get("REGEX_WORKERS", 2))
+app.config["REGEX_TIMEOUT_MS"] = int(os.environ.get("REGEX_TIMEOUT_MS", 1000))
+app.config["REGEX_MEMORY_MB"] = int(os.environ.get("REGEX_MEMORY_MB", 256))
+# Streaming match API (/api/matches)
+app.config["MAX_CONTENT_LENGTH"] = int(os.environ.get("MAX_UPLOAD_MB", 200)) * 1024 * 1024
+app.config["MATCHES_DEFAULT_LIMIT"] = 1000
+app.config["MATCHES_MAX_LIMIT"] = int(os.environ.get("MATCHES_MAX_LIMIT", 100000))
+app.config["MATCHES_TIMEOUT_MS"] = int(os.environ.get("MATCHES_TIMEOUT_MS", 30000))   # whole stream
+# Batch matrix mode (/batch and /api/batch): every pattern against every corpus line
+app.config["BATCH_MAX_PATTERNS"] = 100
+app.config["BATCH_MAX_LINES"] = 20000
+app.config["BATCH_PATTERN_TIMEOUT_MS"] = int(os.environ.get("BATCH_PATTERN_TIMEOUT_MS", 5000))
+app.config["BATCH_SLOW_MS"] = 50          # patterns at least this slow are flagged in the UI
+app.config["BATCH_UI_MAX_LINES"] = 200    # matrix rows rendered on the page
 csrf = CSRFProtect(app)
 
+pattern_cache = PatternCache(max_size=app.config["PATTERN_CACHE_SIZE"])
+
+regex_sandbox = RegexSandbox(
+    workers=app.config["REGEX_WORKERS"],
+    timeout_ms=app.config["REGEX_TIMEOUT_MS"],
+    memory_mb=app.config["REGEX_MEMORY_MB"],
+)
+
+FALSE_VALUES = {"", "0", "false", "off", "no"}
+
+def parse_flags(values, global_default=False):
+    """Reads the UI options from form/JSON values: (re flags, global_search).
+
+    Only ignore_case is a compile flag; global_search picks finditer() over search()
+    and so is not part of the pattern cache key.
+    """
+    def enabled(name, default=False):
+        value = values.get(name)
+        if value is None:
+            return default
+        if isinstance(value, str):
+            return value.strip().lower() not in FALSE_VALUES
+        return bool(value)
+
+    flags = re.IGNORECASE if enabled("ignore_case") else 0
+    return flags, enabled("global_search", global_default)
+
+def evaluate_pattern(pattern, flags, global_search, lines):
+    """One row of the batch matrix: per-line match counts and the worker's evaluation time."""
+    result = {"pattern": pattern, "counts": None, "matched_lines": 0, "total": 0, "elapsed_ms": None, "error": None}
+    try:
+        pattern_cache.compile(pattern, flags)
+        counts, elapsed = regex_sandbox.count_lines(
+            pattern, flags, global_search, lines, timeout_ms=app.config["BATCH_PATTERN_TIMEOUT_MS"]
+        )
+    except (re.error, SandboxError) as e:
+        result["error"] = str(e)
+        return result
+    result["counts"] = [counts.get(index, 0) for index in range(len(lines))]
+    result["matched_lines"] = len(counts)
+    result["total"] = sum(counts.values())
+    result["elapsed_ms"] = round(elapsed * 1000, 2)
+    return result
+
+def run_batch(patterns, lines, flags, global_search):
+    """Evaluates the patterns in parallel, one sandbox job each, keeping their order.
+
+    A single alternation of all patterns would only report the leftmost branch at each
+    position, not a count per pattern, so every pattern runs on its own. This also lets a
+    catastrophic pattern time out alone instead of sinking the whole batch.
+    """
+    with ThreadPoolExecutor(max_workers=max(1, app.config["REGEX_WORKERS"])) as pool:
+        return list(pool.map(lambda pattern: evaluate_pattern(pattern, flags, global_search, lines), patterns))
+
+def read_batch(patterns, lines):
+    """Validates batch input; returns (patterns, lines) or raises ValueError."""
+    if not all(isinstance(value, str) for value in [*patterns, *lines]):
+        raise ValueError("Patterns and lines must be strings.")
+    patterns = [pattern for pattern in patterns if pattern.strip()]
+    if not patterns:
+        raise ValueError("At least one pattern is required.")
+    if len(patterns) > app.config["BATCH_MAX_PATTERNS"]:
+        raise ValueError(f"At most {app.config['BATCH_MAX_PATTERNS']} patterns per batch.")
+    if len(lines) > app.config["BATCH_MAX_LINES"]:
+        raise ValueError(f"At most {app.config['BATCH_MAX_LINES']} lines per batch.")
+    return patterns, lines
+
 @app.route("/", methods=["GET", "POST"])
 def index():
     matches = []
@@ -22,40 +112,28 @@ def index():
         # Trim whitespace to avoid accidental leading/trailing spaces causing miss-matches
         test_string = request.form.get("test_string", "").strip()
         regex_pattern = request.form.get("regex_pattern", "").strip()
-        ignore_case = request.form.get("ignore_case")
-        global_search = request.form.get("global_search")
+        flags_value, global_search = parse_flags(request.form)
 
-        ignore_case_checked = bool(ignore_case)
-        global_search_checked = bool(global_search)
+        ignore_case_checked = bool(flags_value & re.IGNORECASE)
+        global_search_checked = global_search
 
         if not regex_pattern:
             error = "Regex pattern is required."
         else:
-            flags_value = re.IGNORECASE if ignore_case else 0
-
             try:
-                pattern = re.compile(regex_pattern, flags_value)
-
-                if global_search:
-                    iterator = pattern.finditer(test_string)
-                else:
-                    single_match = pattern.search(test_string)
-                    iterator = [single_match] if single_match else []
+                # Fails fast on invalid patterns without a round trip to a worker
+                pattern_cache.compile(regex_pattern, flags_value)
+                spans = regex_sandbox.find(regex_pattern, flags_value, global_search, test_string)
 
                 highlighted_parts = []
                 cursor = 0
 
-                for match in iterator:
-                    if not match:
-                        continue
-
-                    start, end = match.start(), match.end()
-
+                for start, end, match, groups in spans:
                     matches.append({
-                        "match": match.group(),
+                        "match": match,
                         "start": start,
                         "end": end,
-                        "groups": match.groups(),
+                        "groups": groups,
                     })
 
                     highlighted_parts.append(html.escape(test_string[cursor:start]))
@@ -65,7 +143,7 @@ def index():
                 highlighted_parts.append(html.escape(test_string[cursor:]))
                 highlighted_text = "".join(highlighted_parts) if matches else html.escape(test_string)
 
-            except re.error as e:
+            except (re.error, SandboxError) as e:
                 error = str(e)
 
     return render_template(
@@ -79,5 +157,155 @@ def index():
         global_search_checked=global_search_checked,
     )
 
+@app.route("/batch", methods=["GET", "POST"])
+def batch():
+    patterns_text = ""
+    corpus = ""
+    results = []
+    lines = []
+    elapsed_ms = None
+    error = None
+    ignore_case_checked = False
+    global_search_checked = True
+
+    if request.method == "POST":
+        patterns_text = request.form.get("patterns", "")
+        corpus = request.form.get("corpus", "")
+        flags_value, global_search = parse_flags(request.form)
+        ignore_case_checked = bool(flags_value & re.IGNORECASE)
+        global_search_checked = global_search
+        try:
+            patterns, lines = read_batch(patterns_text.splitlines(), corpus.splitlines())
+            started = time.perf_counter()
+            results = run_batch(patterns, lines, flags_value, global_search)
+            elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+        except ValueError as e:
+            error = str(e)
+
+    return render_template(
+        "batch.html",
+        patterns_text=patterns_text,
+        corpus=corpus,
+        results=results,
+        lines=lines[:app.config["BATCH_UI_MAX_LINES"]],
+        total_lines=len(lines),
+        elapsed_ms=elapsed_ms,
+        slow_ms=app.config["BATCH_SLOW_MS"],
+        error=error,
+        ignore_case_checked=ignore_case_checked,
+        global_search_checked=global_search_checked,
+    )
+
+@app.route("/api/batch", methods=["POST"])
+@csrf.exempt
+def api_batch():
+    """Match matrix for {"patterns": [...], "corpus": "..."} (or "lines": [...]).
+
+    Each result row has per-line counts, matched_lines, total, elapsed_ms (time spent
+    matching in the worker) and error, which is set for invalid or timed-out patterns.
+    """
+    values = request.get_json(silent=True) or {}
+    flags, global_search = parse_flags(values, global_default=True)
+    try:
+        lines = values.get("lines")
+        if lines is None:
+            lines = str(values.get("corpus") or "").splitlines()
+        patterns = values.get("patterns") or []
+        if not isinstance(patterns, list) or not isinstance(lines, list):
+            raise ValueError("patterns and lines must be lists.")
+        patterns, lines = read_batch(patterns, lines)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    started = time.perf_counter()
+    results = run_batch(patterns, lines, flags, global_search)
+    return jsonify({
+        "lines": len(lines),
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+        "results": results,
+    })
+
+@app.route("/api/matches", methods=["POST"])
+@csrf.exempt
+def api_matches():
+    """Streams matches as NDJSON: one object per match, then a summary line.
+
+    Input is a JSON body {"pattern", "text", ...} or a multipart upload with a "file"
+    part plus the same fields as form values. Options: ignore_case, global_search
+    (default true), offset (matches to skip) and max_matches. Uploaded files are
+    memory-mapped in a sandbox worker and decoded as UTF-8 a window at a time, so the
+    pattern, its flags and start/end mean the same as for "text". The summary's
+    next_offset is set when more matches exist.
+    """
+    upload = request.files.get("file")
+    values = request.form if upload else (request.get_json(silent=True) or {})
+    pattern = values.get("pattern") or ""
+    if not pattern:
+        return jsonify({"error": "pattern is required."}), 400
+    flags, global_search = parse_flags(values, global_default=True)
+    try:
+        offset = max(0, int(values.get("offset", 0)))
+        max_matches = int(values.get("max_matches", app.config["MATCHES_DEFAULT_LIMIT"]))
+    except (TypeError, ValueError):
+        return jsonify({"error": "offset and max_matches must be integers."}), 400
+    max_matches = max(1, min(max_matches, app.config["MATCHES_MAX_LIMIT"]))
+
+    try:
+        pattern_cache.compile(pattern, flags)
+    except re.error as e:
+        return jsonify({"error": str(e)}), 400
+
+    if upload:
+        # Spooled to disk in chunks, never read into a Python string
+        with tempfile.NamedTemporaryFile(suffix=".upload", delete=False) as tmp:
+            upload.save(tmp)
+        source = MappedFile(tmp.name)
+    else:
+        source = values.get("text") or ""
+
+    def generate():
+        started = time.perf_counter()
+        count = 0
+        has_more = False
+        try:
+            # One match past the page tells us whether another page exists
+            batches = regex_sandbox.stream(pattern, flags, global_search, source, offset, max_matches + 1,
+                                           timeout_ms=app.config["MATCHES_TIMEOUT_MS"])
+            for batch in batches:
+                lines = []
+                for start, end, match, groups in batch:
+                    if count == max_matches:
+                        has_more = True
+                        continue
+                    lines.append(json.dumps({
+                        "index": offset + count,
+                        "match": match,
+                        "start": start,
+                        "end": end,
+                        "groups": list(groups),
+                    }))
+                    count += 1
+                if lines:
+                    yield "\n".join(lines) + "\n"
+            yield json.dumps({
+                "done": True,
+                "count": count,
+                "offset": offset,
+                "next_offset": offset + count if has_more else None,
+                "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+            }) + "\n"
+        except (re.error, SandboxError) as e:
+            yield json.dumps({"error": str(e), "count": count}) + "\n"
+
+    response = Response(generate(), mimetype="application/x-ndjson")
+    if isinstance(source, MappedFile):
+        # Runs even if the client goes away before the stream starts
+        response.call_on_close(lambda: os.unlink(source.path))
+    return response
+
+@app.route("/stats")
+def stats():
+    return jsonify({"pattern_cache": pattern_cache.stats(), "regex_sandbox": regex_sandbox.stats()})
+
 if __name__ == "__main__":
     app.run()
\ No newline at end of file
@@ -0,0 +1,67 @@
+import re
+import threading
+from collections import OrderedDict
+
+
+class PatternCache:
+    """Thread-safe LRU cache of compiled regexes keyed by (pattern, flags).
+
+    Compile errors are cached too, so a broken pattern that is submitted again fails
+    without going back through the regex parser.
+    """
+
+    def __init__(self, max_size=512):
+        self.max_size = max_size
+        self._data = OrderedDict()   # (pattern, flags) -> compiled pattern or (msg, pos) of the error
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.errors = 0
+
+    def compile(self, pattern, flags=0):
+        """Returns the compiled pattern, or raises re.error for an invalid one."""
+        key = (pattern, flags)
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                self._data.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+
+        if entry is None:
+            try:
+                entry = re.compile(pattern, flags)
+            except re.error as e:
+                entry = (e.msg, e.pos)
+            with self._lock:
+                if isinstance(entry, tuple):
+                    self.errors += 1
+                self._data[key] = entry
+                self._data.move_to_end(key)
+                while len(self._data) > self.max_size:
+                    self._data.popitem(last=False)
+                    self.evictions += 1
+
+        if isinstance(entry, tuple):
+            # A fresh exception each time, so tracebacks do not pile up on a shared instance
+            raise re.error(entry[0], pattern, entry[1])
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "compile_errors": self.errors,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
@@ -0,0 +1,352 @@
+import itertools
+import logging
+import mmap
+import multiprocessing
+import os
+import queue
+import re
+import threading
+import time
+from collections import namedtuple
+
+from pattern_cache import PatternCache
+
+try:
+    import resource
+except ImportError:   # not available on Windows
+    resource = None
+
+
+# Input given as a file path; the worker memory-maps it and decodes it as UTF-8 a window at a time
+MappedFile = namedtuple("MappedFile", "path")
+
+BATCH_SIZE = 500   # matches per message from a worker
+MAPPED_CHUNK = 1 << 20   # bytes of a mapped file decoded per step; longer matches widen the window
+MAPPED_CONTEXT = 4096    # bytes decoded ahead of each window for lookbehind, \b and ^
+
+
+class SandboxError(Exception):
+    """The evaluation could not finish inside the sandbox."""
+
+
+class SandboxTimeout(SandboxError):
+    def __init__(self, timeout_ms):
+        super().__init__(f"Regex evaluation timed out after {timeout_ms} ms.")
+        self.timeout_ms = timeout_ms
+
+
+def _limit_memory(memory_mb):
+    """Caps the address space (soft limit only, so a mapped input can be allowed for on top)."""
+    if resource is None or not memory_mb:
+        return
+    limit = memory_mb * 1024 * 1024
+    try:
+        _, hard = resource.getrlimit(resource.RLIMIT_AS)
+        if hard != resource.RLIM_INFINITY:
+            limit = min(limit, hard)
+        resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+    except (ValueError, OSError) as e:
+        # Some platforms and containers refuse the change; run without the cap rather than die
+        logging.error("Could not limit regex worker memory to %s MB: %s", memory_mb, e)
+
+
+def _send_matches(found, offset, limit, send):
+    batch = []
+    for index, span in enumerate(found):
+        if index < offset:
+            continue
+        if limit is not None and index >= offset + limit:
+            break
+        batch.append(span)
+        if len(batch) >= BATCH_SIZE:
+            send(("batch", batch))
+            batch = []
+    if batch:
+        send(("batch", batch))
+
+
+def _scan(compiled, subject, global_search, offset, limit, send):
+    if global_search:
+        found = compiled.finditer(subject)
+    else:
+        found = filter(None, [compiled.search(subject)])
+    _send_matches(((m.start(), m.end(), m.group(), m.groups()) for m in found), offset, limit, send)
+
+
+def _char_start(data, position, step=-1):
+    """Moves a byte offset back (or, with step=1, forward) to the start of a UTF-8 character."""
+    while 0 < position < len(data) and data[position] & 0xC0 == 0x80:
+        position += step
+    return position
+
+
+def _as_text(value):
+    """Undecodable input bytes are carried as surrogates; report them as U+FFFD."""
+    if value is None:
+        return None
+    return value.encode("utf-8", "surrogateescape").decode("utf-8", "replace")
+
+
+def _mapped_matches(compiled, data, chunk=MAPPED_CHUNK):
+    """finditer over UTF-8 `data` decoded one window at a time, with character offsets.
+
+    Each window holds MAPPED_CONTEXT bytes before the resume point (for lookbehind, \\b
+    and ^), the chunk whose matches are reported, and one more chunk, so any match
+    shorter than a chunk is found as it would be over the whole decoded text. A match
+    that reaches the end of its window (or stops one character short, where $ may have
+    matched before a newline that only ends the window) is retried with chunks twice as
+    long. Undecodable bytes count as one character each, reported as U+FFFD.
+    """
+    size = len(data)
+    resume, resume_char = 0, 0   # byte and character offset the search continues from
+    skip_empty = False           # the last match was empty at the resume point
+    while True:
+        start = _char_start(data, max(0, resume - MAPPED_CONTEXT))
+        middle = _char_start(data, min(size, resume + chunk), step=1)
+        end = _char_start(data, min(size, resume + 2 * chunk), step=1)
+        at_end = end == size
+        head = data[start:resume].decode("utf-8", "surrogateescape")
+        body = data[resume:middle].decode("utf-8", "surrogateescape")
+        window = head + body + data[middle:end].decode("utf-8", "surrogateescape")
+        pos, base = len(head), resume_char - len(head)
+        report_until = pos + len(body)
+        last_end, last_empty, grow = None, skip_empty, False
+        for m in compiled.finditer(window, pos):
+            if skip_empty and m.start() == m.end() == pos:
+                continue   # already reported by the previous window
+            skip_empty = False
+            if not at_end:
+                if m.start() >= report_until:
+                    break
+                if m.end() >= len(window) - 1:
+                    grow = True
+                    break
+            yield (base + m.start(), base + m.end(), _as_text(m.group()), tuple(_as_text(g) for g in m.groups()))
+            last_end, last_empty = m.end(), m.start() == m.end()
+        if at_end:
+            return
+        if grow:
+            chunk *= 2
+            following = last_end if last_end is not None else pos
+            skip_empty = last_empty   # still set if nothing was reported at pos
+        else:
+            following = max(last_end or 0, report_until)
+            skip_empty = last_empty and last_end == following
+        resume += len(window[pos:following].encode("utf-8", "surrogateescape"))
+        resume_char = base + following
+
+
+def _scan_file(compiled, path, global_search, offset, limit, send, memory_mb):
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if not size:
+            return _scan(compiled, "", global_search, offset, limit, send)
+        # The mapping counts against RLIMIT_AS but is page cache, not heap: allow for it
+        limited = resource is not None and memory_mb
+        if limited:
+            soft, hard = resource.getrlimit(resource.RLIMIT_AS)
+            limited = soft != resource.RLIM_INFINITY   # _limit_memory may not have applied
+        if limited:
+            raised = soft + size
+            if hard != resource.RLIM_INFINITY:
+                raised = min(raised, hard)
+            resource.setrlimit(resource.RLIMIT_AS, (raised, hard))
+        try:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as subject:
+                found = _mapped_matches(compiled, subject)
+                if not global_search:
+                    found = itertools.islice(found, 1)
+                _send_matches(found, offset, limit, send)
+        finally:
+            if limited:
+                resource.setrlimit(resource.RLIMIT_AS, (soft, hard))
+
+
+def _count_lines(compiled, lines, global_search, send):
+    started = time.perf_counter()
+    counts = {}   # line index -> matches, only for lines that match
+    for index, line in enumerate(lines):
+        if global_search:
+            found = sum(1 for _ in compiled.finditer(line))
+        else:
+            found = 1 if compiled.search(line) else 0
+        if found:
+            counts[index] = found
+    send(("batch", [(counts, time.perf_counter() - started)]))
+
+
+def _worker_main(conn, memory_mb):
+    """Worker process loop: receive a job, send its matches in batches, then a final status."""
+    _limit_memory(memory_mb)
+    patterns = PatternCache(max_size=128)
+    while True:
+        try:
+            kind, pattern, flags, global_search, args = conn.recv()
+        except EOFError:
+            return
+        try:
+            compiled = patterns.compile(pattern, flags)
+            if kind == "count_lines":
+                _count_lines(compiled, args, global_search, conn.send)
+            elif isinstance(args[0], MappedFile):
+                _scan_file(compiled, args[0].path, global_search, args[1], args[2], conn.send, memory_mb)
+            else:
+                _scan(compiled, args[0], global_search, args[1], args[2], conn.send)
+            result = ("done", None)
+        except re.error as e:
+            result = ("error", str(e))
+        except MemoryError:
+            result = ("memory", None)
+        except OSError as e:
+            result = ("error", f"Could not read the input: {e.strerror}")
+        conn.send(result)
+        if result[0] == "memory":
+            return   # start clean rather than reuse a process that hit its limit
+
+
+class _Worker:
+    def __init__(self, context, memory_mb):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn, memory_mb), daemon=True)
+        self.process.start()
+        child_conn.close()
+
+    def kill(self):
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+
+class RegexSandbox:
+    """Evaluates regexes in a pool of worker processes with a time and memory budget.
+
+    Each worker serves one job at a time over its own pipe. A job that is still running
+    after timeout_ms gets its worker killed and replaced, so a catastrophically
+    backtracking pattern costs one worker for timeout_ms instead of a request thread
+    forever. Workers run under an RLIMIT_AS of memory_mb where the platform supports it.
+    The pool is started on first use in each process, so forked app workers get their own.
+    """
+
+    def __init__(self, workers=2, timeout_ms=1000, memory_mb=256, queue_timeout=5.0):
+        self.workers = workers
+        self.timeout_ms = timeout_ms
+        self.memory_mb = memory_mb
+        self.queue_timeout = queue_timeout   # seconds to wait for a free worker
+        methods = multiprocessing.get_all_start_methods()
+        # forkserver children are forked from a clean single-threaded process, unlike
+        # forking the (multi-threaded) app process directly
+        self._context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+        self._lock = threading.Lock()
+        self._idle = None
+        self._pid = None
+        self.runs = 0
+        self.timeouts = 0
+        self.memory_errors = 0
+        self.crashes = 0
+        self.restarts = 0
+
+    def _pool(self):
+        with self._lock:
+            if self._idle is None or self._pid != os.getpid():
+                self._idle = queue.Queue()
+                for _ in range(self.workers):
+                    self._idle.put(_Worker(self._context, self.memory_mb))
+                self._pid = os.getpid()
+            return self._idle
+
+    def start(self):
+        """Starts the worker processes ahead of the first request."""
+        self._pool()
+
+    def _replace(self, worker):
+        """Kills `worker` (if any) and starts another; None if the new one cannot start."""
+        try:
+            if worker is not None:
+                worker.kill()
+            worker = _Worker(self._context, self.memory_mb)
+        except Exception:
+            # The slot goes back to the pool empty and the next job retries the start
+            logging.exception("Could not start a regex worker")
+            return None
+        self.restarts += 1
+        return worker
+
+    def _run(self, job, timeout_ms):
+        """Sends one job to a free worker and yields its batches until it reports back."""
+        timeout_ms = timeout_ms or self.timeout_ms
+        idle = self._pool()
+        try:
+            worker = idle.get(timeout=self.queue_timeout)
+        except queue.Empty:
+            raise SandboxError("All regex workers are busy, try again shortly.") from None
+
+        finished = False
+        try:
+            if worker is None:
+                worker = self._replace(None)
+                if worker is None:
+                    raise SandboxError("Could not start a regex worker, try again shortly.")
+            self.runs += 1
+            deadline = time.monotonic() + timeout_ms / 1000
+            try:
+                worker.conn.send(job)
+            except OSError:
+                status = "crashed"
+            else:
+                status = None
+            while status is None:
+                if not worker.conn.poll(max(0.0, deadline - time.monotonic())):
+                    self.timeouts += 1
+                    raise SandboxTimeout(timeout_ms)
+                try:
+                    status, payload = worker.conn.recv()
+                except (EOFError, OSError):
+                    status = "crashed"
+                if status == "batch":
+                    status = None
+                    yield payload
+            if status == "memory":
+                self.memory_errors += 1
+                raise SandboxError(f"Regex evaluation exceeded the {self.memory_mb} MB memory limit.")
+            if status == "crashed":
+                self.crashes += 1
+                raise SandboxError("The regex worker crashed during evaluation.")
+            finished = True
+            if status == "error":
+                raise re.error(payload)
+        finally:
+            if not finished:
+                worker = self._replace(worker)
+            idle.put(worker)
+
+    def stream(self, pattern, flags, global_search, source, offset=0, limit=None, timeout_ms=None):
+        """Yields batches of (start, end, match, groups), skipping the first `offset` matches.
+
+        source is a str, or a MappedFile of UTF-8 text; offsets always count characters. The whole job must finish
+        within timeout_ms (default: the sandbox's). Raises re.error or SandboxError. A
+        stream abandoned half way costs its worker, which is replaced.
+        """
+        return self._run(("scan", pattern, flags, global_search, (source, offset, limit)), timeout_ms)
+
+    def count_lines(self, pattern, flags, global_search, lines, timeout_ms=None):
+        """Matches per line as ({line index: count}, seconds spent matching in the worker)."""
+        [batch] = self._run(("count_lines", pattern, flags, global_search, lines), timeout_ms)
+        return batch[0]
+
+    def find(self, pattern, flags, global_search, text):
+        """Returns [(start, end, match, groups)] for the matches; raises re.error or SandboxError."""
+        return [span for batch in self.stream(pattern, flags, global_search, text) for span in batch]
+
+    def stats(self):
+        idle = self._idle
+        return {
+            "workers": self.workers,
+            "idle": idle.qsize() if idle is not None and self._pid == os.getpid() else 0,
+            "timeout_ms": self.timeout_ms,
+            "memory_mb": self.memory_mb,
+            "runs": self.runs,
+            "timeouts": self.timeouts,
+            "memory_errors": self.memory_errors,
+            "crashes": self.crashes,
+            "restarts": self.restarts,
+        }
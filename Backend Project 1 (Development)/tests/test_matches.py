@@ -0,0 +1,46 @@
+import io
+import json
+
+import pytest
+
+from app import app
+
+
+def read_matches(response):
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert lines[-1].get("done"), lines[-1]
+    return [(m["start"], m["end"], m["match"], m["groups"]) for m in lines[:-1]]
+
+
+def text_matches(client, pattern, text, **options):
+    return read_matches(client.post("/api/matches", json={"pattern": pattern, "text": text, **options}))
+
+
+def upload_matches(client, pattern, text, **options):
+    data = {"pattern": pattern, "file": (io.BytesIO(text.encode("utf-8")), "input.txt"), **options}
+    return read_matches(client.post("/api/matches", data=data, content_type="multipart/form-data"))
+
+
+@pytest.mark.parametrize("pattern, options", [
+    ("é+", {}),
+    (r"\w+", {}),
+    ("(É)", {"ignore_case": "true"}),
+    ("[^a ]+", {}),
+    (".$", {}),
+])
+def test_upload_matches_like_text(client, pattern, options):
+    text = "ab éé cd é\ncafé naïve ÉÉ\n"
+    expected = text_matches(client, pattern, text, **options)
+    assert expected
+    assert upload_matches(client, pattern, text, **options) == expected
+
+
+def test_upload_offsets_count_characters(client):
+    assert upload_matches(client, "é+", "ab éé cd é") == [(3, 5, "éé", []), (9, 10, "é", [])]
+
+
+@pytest.fixture()
+def client():
+    app.testing = True
+    with app.test_client() as client:
+        yield client
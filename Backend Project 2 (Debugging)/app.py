@@ -1,8 +1,19 @@
-from flask import Flask, render_template, request, redirect, url_for
+from flask import Flask, render_template, request, redirect, url_for, jsonify
+import os
+from note_store import NoteStore
 
 app = Flask(__name__)
 
-notes = []
+# Notes live in SQLite (WAL) so every worker process sees the same notes and they survive restarts
+app.config['NOTES_DB'] = os.environ.get('NOTES_DB', os.path.join(app.instance_path, 'notes.db'))
+app.config['NOTES_PAGE_SIZE'] = 50
+app.config['NOTES_WRITE_BATCH'] = 256   # most notes committed together in one transaction
+app.config['SEARCH_PAGE_SIZE'] = 20
+app.config['SEARCH_MAX_PAGE'] = 50       # ranked results are paged by offset, so keep it shallow
+app.config['SEARCH_RANK_WINDOW'] = 5000  # queries matching more notes rank only the newest this many (flagged as truncated)
+
+os.makedirs(os.path.dirname(os.path.abspath(app.config['NOTES_DB'])), exist_ok=True)
+note_store = NoteStore(app.config['NOTES_DB'], batch_size=app.config['NOTES_WRITE_BATCH'])
 
 # Single home route handles display and note creation
 @app.route('/', methods=["GET", "POST"])
@@ -10,14 +21,53 @@ def index():
     if request.method == "POST":
         note = request.form.get("note")
         if note and note.strip() != "":
-            notes.append(note.strip())
+            note_store.add(note.strip())
 
         # Post/Redirect/Get to prevent duplicate submissions on refresh
         return redirect(url_for("index"))
 
-    return render_template("home.html", notes=notes)
+    # Newest first, one page at a time; ?before=<id> continues from an older page
+    before = request.args.get('before', type=int)
+    notes, next_cursor = note_store.page(before, app.config['NOTES_PAGE_SIZE'])
+    return render_template("home.html", notes=notes, before=before, next_cursor=next_cursor)
+
+
+def search_notes():
+    """Runs ?q= against the full-text index for ?page=. Returns (query, page, notes, has_more, truncated)."""
+    query = request.args.get('q', '').strip()
+    page = max(1, min(request.args.get('page', 1, type=int), app.config['SEARCH_MAX_PAGE']))
+    notes, has_more, truncated = note_store.search(
+        query, page, app.config['SEARCH_PAGE_SIZE'], rank_window=app.config['SEARCH_RANK_WINDOW']
+    )
+    return query, page, notes, has_more and page < app.config['SEARCH_MAX_PAGE'], truncated
+
+
+@app.route('/search')
+def search():
+    query, page, notes, has_more, truncated = search_notes()
+    return render_template("home.html", notes=notes, query=query, page=page, has_more=has_more,
+                           truncated=truncated, rank_window=app.config['SEARCH_RANK_WINDOW'])
+
+
+@app.route('/api/search')
+def api_search():
+    query, page, notes, has_more, truncated = search_notes()
+    return jsonify({
+        'query': query,
+        'page': page,
+        'notes': notes,
+        'next_page': page + 1 if has_more else None,
+        # True when only the newest rank_window matches were ranked
+        'truncated': truncated,
+        'rank_window': app.config['SEARCH_RANK_WINDOW'],
+    })
+
+
+@app.route('/stats')
+def stats():
+    return jsonify({'note_store': note_store.stats()})
 
 
 if __name__ == '__main__':
     # Debug off for submission; set to True only during local development
-    app.run(debug=False)
\ No newline at end of file
+    app.run(debug=False)
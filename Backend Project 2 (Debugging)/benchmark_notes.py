@@ -0,0 +1,68 @@
+"""Benchmark: note writes under concurrent posting, with and without group commit.
+
+Each run starts --threads writers that call NoteStore.add() back to back against a fresh
+SQLite file for --duration seconds, the way concurrent POSTs to index() do. It runs once
+with a write batch of 1 (one transaction per note) and once with the app's default batch,
+then times a page read deep into the table.
+
+Usage:
+    python benchmark_notes.py --threads 16 --duration 5
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import threading
+import time
+
+from note_store import NoteStore
+
+
+def run(batch_size, threads, duration):
+    with tempfile.TemporaryDirectory() as tmp:
+        store = NoteStore(os.path.join(tmp, 'notes.db'), batch_size=batch_size)
+        latencies = [[] for _ in range(threads)]
+        deadline = time.time() + duration
+
+        def writer(index):
+            n = 0
+            while time.time() < deadline:
+                started = time.perf_counter()
+                store.add(f'note {index}-{n}')
+                latencies[index].append(time.perf_counter() - started)
+                n += 1
+
+        workers = [threading.Thread(target=writer, args=(i,)) for i in range(threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        samples = [sample for per_thread in latencies for sample in per_thread]
+        _, cursor = store.page(limit=1)
+        started = time.perf_counter()
+        for _ in range(100):
+            store.page(before=cursor, limit=50)
+        page_ms = (time.perf_counter() - started) * 10
+        stats = store.stats()
+    return {
+        'notes_per_sec': len(samples) / duration,
+        'p50_ms': statistics.median(samples) * 1000,
+        'p99_ms': statistics.quantiles(samples, n=100)[98] * 1000,
+        'notes_per_commit': stats['notes_per_commit'],
+        'page_ms': page_ms,
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=5.0)
+    parser.add_argument('--batch-size', type=int, default=256)
+    args = parser.parse_args()
+
+    print(f"{'write batch':<12} {'notes/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'notes/commit':>13} {'page ms':>8}")
+    for batch_size in (1, args.batch_size):
+        r = run(batch_size, args.threads, args.duration)
+        print(f"{batch_size:<12} {r['notes_per_sec']:>9.0f} {r['p50_ms']:>8.2f} {r['p99_ms']:>8.2f} "
+              f"{r['notes_per_commit']:>13.1f} {r['page_ms']:>8.3f}")
@@ -0,0 +1,98 @@
+"""Benchmark: full-text search latency over a large notes table.
+
+Fills a fresh SQLite file with --notes synthetic notes whose words follow a Zipf-like
+distribution (a few very common words, a long tail of rare ones), inserted through the
+same table and triggers the app uses, so the FTS5 index is built the incremental way.
+It then times NoteStore.search() for the first page of results with rare, medium and
+common terms, single words and two-word queries, and reports p50/p95/p99 per class and
+the share of queries whose ranking was truncated to the newest rank_window matches.
+
+Usage:
+    python benchmark_search.py --notes 1000000 --queries 200
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from note_store import NoteStore
+
+VOCABULARY = 50000
+WORDS_PER_NOTE = 12
+
+
+def make_vocabulary(size):
+    rng = random.Random(1)
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+    words = set()
+    while len(words) < size:
+        words.add(''.join(rng.choice(letters) for _ in range(rng.randint(4, 9))))
+    return sorted(words)
+
+
+def fill(store, notes, vocabulary):
+    rng = random.Random(2)
+    weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+    conn = store._connect()
+    started = time.perf_counter()
+    with conn:
+        for start in range(0, notes, 10000):
+            count = min(10000, notes - start)
+            words = rng.choices(vocabulary, weights, k=count * WORDS_PER_NOTE)
+            conn.executemany(
+                'INSERT INTO notes (body, created_at) VALUES (?, ?)',
+                ((' '.join(words[i * WORDS_PER_NOTE:(i + 1) * WORDS_PER_NOTE]), 0.0) for i in range(count)),
+            )
+    conn.close()
+    return time.perf_counter() - started
+
+
+def query_classes(vocabulary, count):
+    rng = random.Random(3)
+    common = vocabulary[:20]
+    medium = vocabulary[200:2000]
+    rare = vocabulary[20000:]
+    return {
+        'rare': [rng.choice(rare) for _ in range(count)],
+        'medium': [rng.choice(medium) for _ in range(count)],
+        'common': [rng.choice(common) for _ in range(count)],
+        'medium+medium': [f'{rng.choice(medium)} {rng.choice(medium)}' for _ in range(count)],
+        'common+rare': [f'{rng.choice(common)} {rng.choice(rare)}' for _ in range(count)],
+        'common+common': [f'{rng.choice(common)} {rng.choice(common)}' for _ in range(count)],
+    }
+
+
+def measure(store, queries):
+    samples = []
+    hits = truncated = 0
+    for text in queries:
+        started = time.perf_counter()
+        notes, _, was_truncated = store.search(text)
+        samples.append((time.perf_counter() - started) * 1000)
+        hits += len(notes)
+        truncated += was_truncated
+    cuts = statistics.quantiles(samples, n=100)
+    return {'p50': cuts[49], 'p95': cuts[94], 'p99': cuts[98], 'hits': hits / len(queries),
+            'truncated': truncated / len(queries)}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--notes', type=int, default=1000000)
+    parser.add_argument('--queries', type=int, default=200)
+    args = parser.parse_args()
+
+    vocabulary = make_vocabulary(VOCABULARY)
+    with tempfile.TemporaryDirectory() as tmp:
+        store = NoteStore(os.path.join(tmp, 'notes.db'))
+        elapsed = fill(store, args.notes, vocabulary)
+        size_mb = os.path.getsize(os.path.join(tmp, 'notes.db')) / 1024 / 1024
+        print(f'{args.notes} notes inserted and indexed in {elapsed:.1f}s ({args.notes / elapsed:.0f} notes/s, {size_mb:.0f} MB)')
+
+        print(f"{'query':<15} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'results':>8} {'truncated':>10}")
+        for name, queries in query_classes(vocabulary, args.queries).items():
+            store.search(queries[0])   # warm the page cache for this class
+            r = measure(store, queries)
+            print(f"{name:<15} {r['p50']:>8.2f} {r['p95']:>8.2f} {r['p99']:>8.2f} {r['hits']:>8.1f} {r['truncated']:>10.0%}")
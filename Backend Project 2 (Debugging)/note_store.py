@@ -0,0 +1,197 @@
+import os
+import queue
+import re
+import sqlite3
+import threading
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS notes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    body TEXT NOT NULL,
+    created_at REAL NOT NULL
+)
+"""
+
+# External-content FTS5 index over notes.body, kept in step by triggers, so a note is
+# searchable as soon as the transaction that inserts it commits. The one-off 'rebuild'
+# indexes notes written before search existed; the script is idempotent, so two workers
+# starting at once cost at most a second rebuild.
+SEARCH_SCHEMA = """
+BEGIN IMMEDIATE;
+CREATE VIRTUAL TABLE IF NOT EXISTS notes_fts USING fts5(
+    body, content='notes', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS notes_fts_insert AFTER INSERT ON notes BEGIN
+    INSERT INTO notes_fts (rowid, body) VALUES (new.id, new.body);
+END;
+CREATE TRIGGER IF NOT EXISTS notes_fts_delete AFTER DELETE ON notes BEGIN
+    INSERT INTO notes_fts (notes_fts, rowid, body) VALUES ('delete', old.id, old.body);
+END;
+CREATE TRIGGER IF NOT EXISTS notes_fts_update AFTER UPDATE OF body ON notes BEGIN
+    INSERT INTO notes_fts (notes_fts, rowid, body) VALUES ('delete', old.id, old.body);
+    INSERT INTO notes_fts (rowid, body) VALUES (new.id, new.body);
+END;
+INSERT INTO notes_fts (notes_fts) VALUES ('rebuild');
+COMMIT;
+"""
+
+_TERM = re.compile(r"\w+", re.UNICODE)
+
+
+def to_match_query(text):
+    """Turns free text into an FTS5 query: every word must appear (implicit AND).
+
+    Words are quoted so FTS5 operators and punctuation typed by users (AND, NOT, -, :,
+    quotes) can never cause a syntax error. Returns None when there is nothing to search.
+    """
+    terms = _TERM.findall(text)
+    return " ".join(f'"{term}"' for term in terms) or None
+
+
+class _PendingWrite:
+    def __init__(self, body):
+        self.body = body
+        self.created_at = time.time()
+        self.done = threading.Event()
+        self.note_id = None
+        self.error = None
+
+
+class NoteStore:
+    """Notes in a SQLite file in WAL mode, shared by every worker process.
+
+    Writes go through one writer thread per process that commits whatever has queued
+    up since its last commit in a single transaction (group commit): under concurrent
+    posting many notes share one fsync, and add() still only returns once its note is
+    durable. Reads use a connection per thread and keyset pagination on id, newest first.
+    """
+
+    def __init__(self, path, batch_size=256, busy_timeout_ms=5000):
+        self.path = path
+        self.batch_size = batch_size
+        self.busy_timeout_ms = busy_timeout_ms
+        self._queue = queue.Queue()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._writer_pid = None
+        self.commits = 0
+        self.written = 0
+        with self._connect() as conn:
+            conn.execute(SCHEMA)
+            exists = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'notes_fts'").fetchone()
+            if not exists:
+                conn.executescript(SEARCH_SCHEMA)
+        conn.close()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=self.busy_timeout_ms / 1000)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _reader(self):
+        # Connections must not cross a fork, so they are per thread and per process
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = self._local.conn = self._connect()
+            self._local.pid = os.getpid()
+        return conn
+
+    def _ensure_writer(self):
+        if self._writer_pid == os.getpid():
+            return
+        with self._lock:
+            if self._writer_pid != os.getpid():
+                if self._writer_pid is not None:
+                    self._queue = queue.Queue()   # the parent's queued writes are not ours
+                threading.Thread(target=self._write_loop, name="note-writer", daemon=True).start()
+                self._writer_pid = os.getpid()
+
+    def _write_loop(self):
+        conn = self._connect()
+        pending = self._queue
+        while True:
+            batch = [pending.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(pending.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                with conn:
+                    for write in batch:
+                        write.note_id = conn.execute(
+                            "INSERT INTO notes (body, created_at) VALUES (?, ?)", (write.body, write.created_at)
+                        ).lastrowid
+                self.commits += 1
+                self.written += len(batch)
+            except sqlite3.Error as e:
+                for write in batch:
+                    write.error = e
+            finally:
+                for write in batch:
+                    write.done.set()
+
+    def add(self, body):
+        """Stores a note and returns its id once the batch holding it is committed."""
+        self._ensure_writer()
+        write = _PendingWrite(body)
+        self._queue.put(write)
+        write.done.wait()
+        if write.error is not None:
+            raise write.error
+        return write.note_id
+
+    def page(self, before=None, limit=50):
+        """Newest notes first, optionally only those with id < before. Returns (notes, next_cursor)."""
+        sql = "SELECT id, body, created_at FROM notes"
+        params = ()
+        if before is not None:
+            sql += " WHERE id < ?"
+            params = (before,)
+        # One extra row tells us whether an older page exists
+        rows = self._reader().execute(sql + " ORDER BY id DESC LIMIT ?", (*params, limit + 1)).fetchall()
+        notes = [{"id": row[0], "body": row[1], "created_at": row[2]} for row in rows[:limit]]
+        next_cursor = notes[-1]["id"] if len(rows) > limit else None
+        return notes, next_cursor
+
+    def search(self, text, page=1, per_page=20, rank_window=5000):
+        """Notes matching every word of `text`, best bm25 score first.
+
+        Returns (notes, has_more, truncated). bm25 has to score every match before it can
+        sort, which for a word found in a large share of the notes costs far more than the
+        page returned (over a second for a word in most of 1M notes, even with FTS5's own
+        ORDER BY rank LIMIT). So when a query matches more than rank_window notes, only
+        the newest rank_window of them are ranked and truncated is True: the best match
+        overall may then be missing. FTS5 walks the doclist newest first to find where
+        that window starts, and the rowid bound keeps the ranking query inside it.
+        """
+        query = to_match_query(text)
+        if query is None:
+            return [], False, False
+        conn = self._reader()
+        # The window's oldest match, and whether anything older exists
+        edge = conn.execute(
+            "SELECT rowid FROM notes_fts WHERE notes_fts MATCH ? ORDER BY rowid DESC LIMIT 2 OFFSET ?",
+            (query, rank_window - 1),
+        ).fetchall()
+        truncated = len(edge) > 1
+        rows = conn.execute(
+            "SELECT notes.id, notes.body, notes.created_at, notes_fts.rank"
+            " FROM notes_fts JOIN notes ON notes.id = notes_fts.rowid"
+            " WHERE notes_fts MATCH ? AND notes_fts.rowid >= ? ORDER BY notes_fts.rank LIMIT ? OFFSET ?",
+            (query, edge[0][0] if truncated else 0, per_page + 1, (page - 1) * per_page),
+        ).fetchall()
+        notes = [{"id": row[0], "body": row[1], "created_at": row[2], "score": -row[3]} for row in rows[:per_page]]
+        return notes, len(rows) > per_page, truncated
+
+    def stats(self):
+        return {
+            "path": self.path,
+            "batch_size": self.batch_size,
+            "commits": self.commits,
+            "written": self.written,
+            "notes_per_commit": round(self.written / self.commits, 2) if self.commits else 0.0,
+            "queued": self._queue.qsize(),
+        }
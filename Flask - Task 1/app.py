@@ -1,10 +1,26 @@
 from flask import Flask, jsonify, render_template, request, url_for
-from datetime import datetime
+from collections import Counter
+from datetime import datetime, timezone
+from functools import lru_cache
+import hashlib
+import os
+
+from metrics import Metrics
 
 app = Flask(__name__)
+metrics = Metrics()
+metrics.init_app(app)
+# Deterministic mode leaves the timestamp out of /api/analyze bodies (the response Date
+# header carries the time instead), so identical requests get byte-identical, cacheable responses
+app.config["DETERMINISTIC_API"] = os.environ.get("DETERMINISTIC_API", "0") == "1"
+app.config["API_CACHE_MAX_AGE"] = 3600
 
 MAX_NAME_LENGTH = 80
+MAX_BATCH_SIZE = 10000
+ANALYSIS_CACHE_SIZE = 4096
+VOWELS = frozenset("aeiou")
 
+@metrics.timed("validate_name")
 def validate_name(user: str):
     if not user or not user.strip():
         return None, "Please enter a valid name in the URL or the form."
@@ -15,17 +31,38 @@ def validate_name(user: str):
         return None, "Name contains unsupported characters."
     return cleaned, None
 
-def analyze_text(user):
-    vowels = set("aeiou")
-    normalized = user.lower()
-    vowel_count = sum(1 for ch in normalized if ch in vowels)
-    consonant_count = sum(1 for ch in normalized if ch.isalpha() and ch not in vowels)
-    digit_count = sum(1 for ch in normalized if ch.isdigit())
-    space_count = sum(1 for ch in user if ch.isspace())
-    words = [w for w in user.split() if w]
-    unique_characters = len({ch for ch in normalized if ch.isalnum()})
+@metrics.timed("analyze_text")
+def analyze_text(user, timestamp=True):
+    result = dict(_analyze(user))
+    # The cached result is shared: copy the nested dict too, so callers cannot change it
+    result["repeating_characters"] = dict(result["repeating_characters"])
+    if timestamp:
+        result["timestamp"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    return result
 
-    repeating = {ch: normalized.count(ch) for ch in set(normalized) if normalized.count(ch) > 1 and ch.isalpha()}
+@lru_cache(maxsize=ANALYSIS_CACHE_SIZE)
+def _analyze(user):
+    # Everything here is a pure function of the name; callers get a copy
+    normalized = user.lower()
+    # One counting pass; every per-character metric is then read off the distinct characters
+    counts = Counter(normalized)
+    vowel_count = consonant_count = digit_count = space_count = unique_characters = 0
+    repeating = {}
+    for ch, n in counts.items():
+        if ch.isalpha():
+            if ch in VOWELS:
+                vowel_count += n
+            else:
+                consonant_count += n
+            if n > 1:
+                repeating[ch] = n
+        elif ch.isspace():
+            space_count += n
+        if ch.isdigit():
+            digit_count += n
+        if ch.isalnum():
+            unique_characters += 1
+    words = user.split()
 
     strength_score = min(100, 20 + len(user) * 2 + len(words) * 5 + unique_characters * 3)
     strength_label = "Strong" if strength_score >= 75 else "Medium" if strength_score >= 50 else "Light"
@@ -47,9 +84,14 @@ def analyze_text(user):
         "repeating_characters": repeating,
         "strength_score": strength_score,
         "strength_label": strength_label,
-        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
     }
 
+@lru_cache(maxsize=ANALYSIS_CACHE_SIZE)
+def _analysis_body(user):
+    """The deterministic /api/analyze body for a cleaned name and its strong ETag."""
+    body = (app.json.dumps(_analyze(user)) + "\n").encode()
+    return body, hashlib.sha256(body).hexdigest()[:32]
+
 @app.route("/", methods=["GET", "POST"])
 def home():
     result = None
@@ -73,7 +115,39 @@ def api_analyze():
     cleaned, error = validate_name(user)
     if error:
         return jsonify({"error": error}), 400
-    return jsonify(analyze_text(cleaned))
+    if not app.config["DETERMINISTIC_API"]:
+        return jsonify(analyze_text(cleaned))
+
+    body, etag = _analysis_body(cleaned)
+    response = app.response_class(body, mimetype="application/json")
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = app.config["API_CACHE_MAX_AGE"]
+    response.date = datetime.now(timezone.utc)
+    # Answers 304 with no body when If-None-Match already names this ETag
+    return response.make_conditional(request)
+
+
+@app.post("/api/analyze/batch")
+def api_analyze_batch():
+    payload = request.get_json(silent=True)
+    users = payload.get("users") if isinstance(payload, dict) else None
+    if not isinstance(users, list) or not users:
+        return jsonify({"error": "Send a JSON body with a non-empty \"users\" list."}), 400
+    if len(users) > MAX_BATCH_SIZE:
+        return jsonify({"error": f"Too many names (max {MAX_BATCH_SIZE} per request)."}), 400
+
+    timestamp = not app.config["DETERMINISTIC_API"]
+    results = []
+    for user in users:
+        cleaned, error = validate_name(user if isinstance(user, str) else "")
+        results.append({"error": error} if error else analyze_text(cleaned, timestamp=timestamp))
+    return jsonify({"count": len(results), "results": results})
+
+
+@app.get("/metrics")
+def metrics_endpoint():
+    return metrics.render(), 200, {"Content-Type": "text/plain; version=0.0.4; charset=utf-8"}
 
 if __name__ == "__main__":
     app.run(debug=True)
\ No newline at end of file
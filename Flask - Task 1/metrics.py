@@ -0,0 +1,110 @@
+import threading
+import time
+from bisect import bisect_left
+from functools import wraps
+
+from flask import g, request
+
+# Upper bounds in seconds; the analyzer answers in microseconds, the slowest routes in milliseconds
+DEFAULT_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.1, 1.0)
+
+
+def _labels(names, values):
+    return ",".join(f'{name}="{value}"' for name, value in zip(names, values))
+
+
+class Histogram:
+    """Cumulative latency histogram per label set, rendered in the Prometheus text format."""
+
+    def __init__(self, name, help_text, label_names, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self._series = {}   # label values -> [count per bucket..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, labels, seconds):
+        index = bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += seconds
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = sorted((labels, list(series)) for labels, series in self._series.items())
+        for labels, series in snapshot:
+            base = _labels(self.label_names, labels)
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), series):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{base},le="{bound}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{base}}} {series[-1]:.9f}")
+            lines.append(f"{self.name}_count{{{base}}} {cumulative}")
+        return lines
+
+
+class Metrics:
+    """Request counters and latency histograms for one process, served at /metrics.
+
+    Each worker process keeps its own numbers; Prometheus scrapes and sums them per
+    instance. Everything is held in plain dicts behind a lock, so recording costs a
+    dict lookup and an increment.
+    """
+
+    def __init__(self):
+        self._requests = {}   # (route, method, status) -> count
+        self._lock = threading.Lock()
+        self.request_duration = Histogram(
+            "http_request_duration_seconds", "Time spent handling a request.", ("route", "method")
+        )
+        self.function_duration = Histogram(
+            "function_duration_seconds", "Time spent in instrumented functions.", ("function",)
+        )
+
+    def init_app(self, app):
+        @app.before_request
+        def _start_timer():
+            g.metrics_started = time.perf_counter()
+
+        @app.after_request
+        def _record(response):
+            started = g.pop("metrics_started", None)
+            if started is not None:
+                route = request.url_rule.rule if request.url_rule else "unmatched"
+                self.observe_request(route, request.method, response.status_code, time.perf_counter() - started)
+            return response
+
+    def observe_request(self, route, method, status, seconds):
+        key = (route, method, str(status))
+        with self._lock:
+            self._requests[key] = self._requests.get(key, 0) + 1
+        self.request_duration.observe((route, method), seconds)
+
+    def timed(self, name):
+        """Decorator recording the wall time of every call in function_duration_seconds."""
+        def decorate(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.function_duration.observe((name,), time.perf_counter() - started)
+            return wrapper
+        return decorate
+
+    def render(self):
+        lines = ["# HELP http_requests_total Requests handled, by route, method and status.",
+                 "# TYPE http_requests_total counter"]
+        with self._lock:
+            requests = sorted(self._requests.items())
+        for labels, count in requests:
+            lines.append(f"http_requests_total{{{_labels(('route', 'method', 'status'), labels)}}} {count}")
+        lines += self.request_duration.render()
+        lines += self.function_duration.render()
+        return "\n".join(lines) + "\n"
@@ -1,6 +1,54 @@
+import random
+from datetime import datetime
+
 import pytest
 
-from app import app, analyze_text, validate_name
+from app import app, analyze_text, validate_name, MAX_BATCH_SIZE, _analysis_body
+
+
+def legacy_analyze_text(user):
+    """analyze_text as it was before the single-pass rewrite, kept as the reference."""
+    vowels = set("aeiou")
+    normalized = user.lower()
+    vowel_count = sum(1 for ch in normalized if ch in vowels)
+    consonant_count = sum(1 for ch in normalized if ch.isalpha() and ch not in vowels)
+    digit_count = sum(1 for ch in normalized if ch.isdigit())
+    space_count = sum(1 for ch in user if ch.isspace())
+    words = [w for w in user.split() if w]
+    unique_characters = len({ch for ch in normalized if ch.isalnum()})
+
+    repeating = {ch: normalized.count(ch) for ch in set(normalized) if normalized.count(ch) > 1 and ch.isalpha()}
+
+    strength_score = min(100, 20 + len(user) * 2 + len(words) * 5 + unique_characters * 3)
+    strength_label = "Strong" if strength_score >= 75 else "Medium" if strength_score >= 50 else "Light"
+
+    return {
+        "original": user,
+        "uppercase": user.upper(),
+        "lowercase": normalized,
+        "reversed": user[::-1],
+        "length": len(user),
+        "is_palindrome": normalized == normalized[::-1],
+        "titlecase": user.title(),
+        "vowels": vowel_count,
+        "consonants": consonant_count,
+        "digits": digit_count,
+        "spaces": space_count,
+        "words": len(words),
+        "unique_characters": unique_characters,
+        "repeating_characters": repeating,
+        "strength_score": strength_score,
+        "strength_label": strength_label,
+        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+    }
+
+
+def sample_names():
+    rng = random.Random(0)
+    alphabet = "aeiouAEIOU bcdxyzBCDXYZ0123456789-'.\tİßéÉÅ٣²ǅﬃ"
+    names = ["", "a", "Anna Lee 123", "Bob", "  spaced   out  ", "x" * 80, "ABBA", "Zoë Ångström"]
+    names += ["".join(rng.choice(alphabet) for _ in range(rng.randint(1, 120))) for _ in range(500)]
+    return names
 
 
 def test_analyze_text_metrics():
@@ -15,6 +63,16 @@ def test_analyze_text_metrics():
     assert data["strength_score"] <= 100
 
 
+def test_analyze_text_returns_independent_copies():
+    first = analyze_text("Anna Bell")
+    first["repeating_characters"]["a"] = 99
+    first["length"] = 0
+
+    second = analyze_text("Anna Bell")
+    assert second["repeating_characters"] == {"a": 2, "n": 2, "l": 2}
+    assert second["length"] == 9
+
+
 def test_validate_name_rules():
     cleaned, error = validate_name("  Alice ")
     assert cleaned == "Alice"
@@ -39,8 +97,106 @@ def test_api_response(client):
     assert bad_resp.status_code == 400
 
 
+def test_analyze_text_matches_legacy():
+    for name in sample_names():
+        expected = legacy_analyze_text(name)
+        actual = analyze_text(name)
+        assert actual.keys() == expected.keys()
+        for field in expected:
+            if field != "timestamp":
+                assert actual[field] == expected[field], (name, field)
+
+
+def test_api_batch(client):
+    users = ["Bob", "", "  Anna Lee 123 ", "a" * 81, 42]
+    resp = client.post("/api/analyze/batch", json={"users": users})
+    assert resp.status_code == 200
+    payload = resp.get_json()
+    assert payload["count"] == len(users)
+    results = payload["results"]
+    assert results[0]["uppercase"] == "BOB"
+    assert "error" in results[1]
+    assert results[2]["original"] == "Anna Lee 123"
+    assert "too long" in results[3]["error"]
+    assert "error" in results[4]
+
+    single = client.get("/api/analyze", query_string={"user": "Bob"}).get_json()
+    single.pop("timestamp")
+    results[0].pop("timestamp")
+    assert results[0] == single
+
+    assert client.post("/api/analyze/batch", json={"users": []}).status_code == 400
+    assert client.post("/api/analyze/batch", data="not json").status_code == 400
+    too_many = client.post("/api/analyze/batch", json={"users": ["a"] * (MAX_BATCH_SIZE + 1)})
+    assert too_many.status_code == 400
+
+
+def test_deterministic_api_conditional_get(deterministic_client):
+    first = deterministic_client.get("/api/analyze", query_string={"user": " Carol "})
+    second = deterministic_client.get("/api/analyze", query_string={"user": "Carol"})
+    assert first.status_code == second.status_code == 200
+    assert first.data == second.data
+    assert "timestamp" not in first.get_json()
+    assert first.get_json()["original"] == "Carol"
+
+    etag, weak = first.get_etag()
+    assert etag and not weak
+    assert first.headers["ETag"] == second.headers["ETag"]
+    assert first.cache_control.public and first.cache_control.max_age == app.config["API_CACHE_MAX_AGE"]
+    assert first.date is not None
+
+    misses = _analysis_body.cache_info().misses
+    cached = deterministic_client.get(
+        "/api/analyze", query_string={"user": "Carol"}, headers={"If-None-Match": first.headers["ETag"]}
+    )
+    assert cached.status_code == 304
+    assert cached.data == b""
+    assert cached.headers["ETag"] == first.headers["ETag"]
+    assert _analysis_body.cache_info().misses == misses
+
+    stale = deterministic_client.get("/api/analyze", query_string={"user": "Carol"}, headers={"If-None-Match": '"other"'})
+    assert stale.status_code == 200
+
+    other = deterministic_client.get("/api/analyze", query_string={"user": "Dave"})
+    assert other.headers["ETag"] != first.headers["ETag"]
+
+
+def test_default_api_keeps_timestamp(client):
+    payload = client.get("/api/analyze", query_string={"user": "Carol"}).get_json()
+    assert "timestamp" in payload
+    assert "timestamp" not in analyze_text("Carol", timestamp=False)
+
+
+def test_metrics_endpoint(client):
+    client.get("/api/analyze", query_string={"user": "Bob"})
+    client.get("/api/analyze", query_string={"user": ""})
+    resp = client.get("/metrics")
+    assert resp.status_code == 200
+    assert resp.mimetype == "text/plain"
+    text = resp.get_data(as_text=True)
+    assert 'http_requests_total{route="/api/analyze",method="GET",status="200"}' in text
+    assert 'http_requests_total{route="/api/analyze",method="GET",status="400"}' in text
+    assert 'http_request_duration_seconds_bucket{route="/api/analyze",method="GET",le="+Inf"}' in text
+    assert 'function_duration_seconds_count{function="validate_name"}' in text
+    assert 'function_duration_seconds_count{function="analyze_text"}' in text
+
+    ok = 'http_requests_total{route="/api/analyze",method="GET",status="200"} '
+    before = int(text.split(ok)[1].split()[0])
+    client.get("/api/analyze", query_string={"user": "Bob"})
+    assert f"{ok}{before + 1}\n" in client.get("/metrics").get_data(as_text=True)
+
+
+@pytest.fixture()
+def deterministic_client(client):
+    app.config["DETERMINISTIC_API"] = True
+    yield client
+
+
 @pytest.fixture()
 def client():
     app.testing = True
+    previous = app.config["DETERMINISTIC_API"]
+    app.config["DETERMINISTIC_API"] = False
     with app.test_client() as client:
         yield client
+    app.config["DETERMINISTIC_API"] = previous
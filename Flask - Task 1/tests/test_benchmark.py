@@ -0,0 +1,104 @@
+"""Throughput benchmarks for analyze_text and /api/analyze, checked against a stored baseline.
+
+Skipped unless RUN_BENCHMARKS=1, since timings depend on the machine. Each case reports
+calls per second (best of a few short rounds); a case fails when it falls below
+baseline * (1 - BENCHMARK_TOLERANCE), default tolerance 0.5, as shared machines easily
+swing by 30% between runs. Record a new baseline on the machine that runs the checks with:
+
+    RUN_BENCHMARKS=1 BENCHMARK_UPDATE_BASELINE=1 pytest tests/test_benchmark.py
+"""
+import gc
+import json
+import os
+import time
+from pathlib import Path
+
+import pytest
+
+from app import app, analyze_text, _analyze, MAX_NAME_LENGTH
+
+BASELINE_PATH = Path(__file__).with_name("benchmark_baseline.json")
+TOLERANCE = float(os.environ.get("BENCHMARK_TOLERANCE", "0.5"))
+UPDATE_BASELINE = os.environ.get("BENCHMARK_UPDATE_BASELINE") == "1"
+ROUNDS = 5
+ROUND_SECONDS = 0.2
+
+# Up to the validation limit, then past it: analyze_text has no limit, the API rejects with 400
+SIZES = (1, 10, 40, MAX_NAME_LENGTH, MAX_NAME_LENGTH * 4, MAX_NAME_LENGTH * 25)
+
+pytestmark = pytest.mark.skipif(os.environ.get("RUN_BENCHMARKS") != "1", reason="set RUN_BENCHMARKS=1 to run")
+
+results = {}
+
+
+def make_name(size):
+    return ("Anna Lee 123 " * (size // 13 + 1))[:size].strip() or "A"
+
+
+def throughput(call):
+    best = 0.0
+    gc.collect()
+    for _ in range(ROUNDS):
+        calls = 0
+        started = time.perf_counter()
+        deadline = started + ROUND_SECONDS
+        while time.perf_counter() < deadline:
+            call()
+            calls += 1
+        best = max(best, calls / (time.perf_counter() - started))
+    return best
+
+
+def check(case, calls_per_sec):
+    results[case] = round(calls_per_sec)
+    if UPDATE_BASELINE:
+        return
+    baseline = json.loads(BASELINE_PATH.read_text()) if BASELINE_PATH.exists() else {}
+    if case not in baseline:
+        pytest.skip(f"{case}: no baseline recorded ({calls_per_sec:.0f} calls/s)")
+    floor = baseline[case] * (1 - TOLERANCE)
+    assert calls_per_sec >= floor, f"{case}: {calls_per_sec:.0f} calls/s, baseline {baseline[case]} (floor {floor:.0f})"
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_analyze_text_throughput(size):
+    name = make_name(size)
+
+    def uncached():
+        _analyze.cache_clear()
+        analyze_text(name)
+
+    check(f"analyze_text[{size}]", throughput(uncached))
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_analyze_text_cached_throughput(size):
+    name = make_name(size)
+    check(f"analyze_text_cached[{size}]", throughput(lambda: analyze_text(name)))
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_api_analyze_throughput(size, client):
+    name = make_name(size)
+    expected = 200 if size <= MAX_NAME_LENGTH else 400
+    assert client.get("/api/analyze", query_string={"user": name}).status_code == expected
+    check(f"api_analyze[{size}]", throughput(lambda: client.get("/api/analyze", query_string={"user": name})))
+
+
+@pytest.fixture(scope="module", autouse=True)
+def write_baseline():
+    yield
+    if UPDATE_BASELINE and results:
+        baseline = json.loads(BASELINE_PATH.read_text()) if BASELINE_PATH.exists() else {}
+        baseline.update(results)
+        BASELINE_PATH.write_text(json.dumps(baseline, indent=2, sort_keys=True) + "\n")
+
+
+@pytest.fixture()
+def client():
+    app.testing = True
+    previous = app.config["DETERMINISTIC_API"]
+    app.config["DETERMINISTIC_API"] = False
+    with app.test_client() as client:
+        yield client
+    app.config["DETERMINISTIC_API"] = previous
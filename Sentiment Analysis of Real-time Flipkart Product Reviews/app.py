@@ -1,42 +1,28 @@
 import streamlit as st
-import joblib
-import re
-import nltk
-from nltk.corpus import stopwords
-from nltk.stem import WordNetLemmatizer
 import os
+import tempfile
+from inference_bundle import BUNDLE_DIR, InferenceBundle
+from score_reviews import CsvSink, ParquetSink, score_file
+
+# The download button holds the whole scored file in memory, so bigger results are not offered
+MAX_DOWNLOAD_MB = 200
 
 # Set page configuration
 st.set_page_config(page_title="Sentiment Analysis of Real-time Flipkart Product Reviews", page_icon="🛍️")
 
-# Download NLTK resources quietly on the server
+# Load the inference bundle (committed, and rewritten by train_model.py): vocabulary, IDF
+# weights and coefficients (memory-mapped), stopwords and lemma table. No NLTK downloads needed.
 @st.cache_resource
-def download_nltk():
-    nltk.download('stopwords', quiet=True)
-    nltk.download('wordnet', quiet=True)
-
-download_nltk()
-
-# Load the saved model and vectorizer
-@st.cache_resource
-def load_models():
-    if os.path.exists('sentiment_model.pkl') and os.path.exists('tfidf_vectorizer.pkl'):
-        model = joblib.load('sentiment_model.pkl')
-        vectorizer = joblib.load('tfidf_vectorizer.pkl')
-        return model, vectorizer
+def load_bundle():
+    if os.path.exists(os.path.join(BUNDLE_DIR, 'meta.json')):
+        return InferenceBundle(BUNDLE_DIR)
     else:
-        return None, None
-
-model, vectorizer = load_models()
+        return None
 
-# Initialize text processing tools
-lemmatizer = WordNetLemmatizer()
-stop_words = set(stopwords.words('english'))
+bundle = load_bundle()
 
 def process_input(text):
-    text = re.sub(r'[^a-zA-Z\s]', '', str(text)).lower()
-    words = [lemmatizer.lemmatize(w) for w in text.split() if w not in stop_words]
-    return ' '.join(words)
+    return bundle.clean(text)
 
 # UI Layout
 st.title("🛍️ Sentiment Analysis of Real-time Flipkart Product Reviews")
@@ -46,8 +32,8 @@ st.subheader("Model Performance")
 st.write(f"Macro F1 Score: {0.7864:.4f}")
 st.write(f"Weighted F1 Score: {0.8622:.4f}")
 
-if model is None or vectorizer is None:
-    st.error("Model files not found! Please run train_model.py first to generate the .pkl files.")
+if bundle is None:
+    st.error("Model bundle not found in inference_bundle/! Restore it from the repository, or run train_model.py (or inference_bundle.py to export the existing .pkl files).")
 else:
     user_review = st.text_area("Paste a review here:", placeholder="Example: The product quality is good but delivery was late.")
 
@@ -57,11 +43,49 @@ else:
         else:
             with st.spinner("Analyzing..."):
                 cleaned_text = process_input(user_review)
-                vectorized_text = vectorizer.transform([cleaned_text])
-                prediction = model.predict(vectorized_text)[0]
+                prediction = int(bundle.predict_proba([cleaned_text])[0] >= 0.5)
                 
                 st.divider()
                 if prediction == 1:
                     st.success("### Prediction: Positive Sentiment")
                 else:
-                    st.error("### Prediction: Negative Sentiment")
\ No newline at end of file
+                    st.error("### Prediction: Negative Sentiment")
+
+    # Bulk mode: score a whole review file chunk by chunk, the same way score_reviews.py does
+    st.divider()
+    st.subheader("Score a Review File")
+    st.write("Upload a CSV in the same format as the review datasets; every review gets a predicted sentiment.")
+    st.caption(
+        f"Scoring runs chunk by chunk, but uploads are capped by Streamlit's upload limit and the scored "
+        f"file is held in memory for download, up to {MAX_DOWNLOAD_MB} MB. For larger dumps run "
+        f"`python score_reviews.py input.csv output.parquet`, which streams from disk to disk."
+    )
+    uploaded = st.file_uploader("Review CSV", type=["csv"])
+    output_format = st.radio("Output format", ["CSV", "Parquet"], horizontal=True)
+    chunk_size = st.number_input("Rows per chunk", min_value=1000, max_value=500000, value=50000, step=1000)
+
+    if uploaded is not None and st.button("Score File"):
+        suffix = ".parquet" if output_format == "Parquet" else ".csv"
+        output = tempfile.NamedTemporaryFile(suffix=suffix, delete=False)
+        output.close()
+        bar = st.progress(0.0, text="Scoring...")
+
+        def report(rows, fraction):
+            bar.progress(fraction or 0.0, text=f"Scored {rows:,} reviews")
+
+        try:
+            sink = ParquetSink(output.name) if suffix == ".parquet" else CsvSink(output.name)
+            rows = score_file(uploaded, sink, bundle, int(chunk_size), progress=report)
+        except (ValueError, ImportError) as e:
+            st.error(f"Could not score the file: {e}")
+        else:
+            bar.progress(1.0, text=f"Scored {rows:,} reviews")
+            size_mb = os.path.getsize(output.name) / 1024 / 1024
+            if size_mb > MAX_DOWNLOAD_MB:
+                st.warning(f"The scored file is {size_mb:,.0f} MB, too large to download from here; "
+                           f"use score_reviews.py for files this size.")
+            else:
+                with open(output.name, "rb") as f:
+                    st.download_button("Download Results", f, file_name=f"scored_reviews{suffix}")
+        finally:
+            os.unlink(output.name)
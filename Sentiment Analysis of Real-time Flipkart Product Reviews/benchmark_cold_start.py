@@ -0,0 +1,75 @@
+"""Benchmark: time from a fresh interpreter to the first prediction, pickles vs bundle.
+
+Each mode runs --runs times in a new Python process, which imports what the app
+imports, loads the model and classifies one review:
+
+  pickles  scikit-learn + NLTK: stopwords and WordNet corpora, joblib.load of both .pkl
+           files, clean, vectorizer.transform, model.predict (the app before the bundle)
+  bundle   InferenceBundle: json + memory-mapped .npy files, clean, predict_proba
+
+Reported: median wall time of the whole process (interpreter start included) and the
+median import-to-first-prediction time measured inside it.
+
+Usage:
+    python benchmark_cold_start.py --runs 5
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+REVIEW = 'The product quality is good but delivery was late.'
+
+PICKLES = f"""
+import time
+started = time.perf_counter()
+import warnings
+warnings.simplefilter('ignore')
+import joblib
+from preprocessing import TextCleaner
+cleaner = TextCleaner()
+cleaner.clean('warm up wordnet loading')
+model = joblib.load('sentiment_model.pkl')
+vectorizer = joblib.load('tfidf_vectorizer.pkl')
+model.predict(vectorizer.transform([cleaner.clean({REVIEW!r})]))
+print(time.perf_counter() - started)
+"""
+
+BUNDLE = f"""
+import time
+started = time.perf_counter()
+from inference_bundle import InferenceBundle
+bundle = InferenceBundle()
+bundle.predict({REVIEW!r})
+print(time.perf_counter() - started)
+"""
+
+
+def measure(code, runs):
+    walls, inside = [], []
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = subprocess.run([sys.executable, '-c', code], cwd=BASE_DIR, capture_output=True, text=True)
+        walls.append(time.perf_counter() - started)
+        if result.returncode != 0:
+            lines = result.stderr.strip().splitlines()
+            return next((line for line in reversed(lines) if 'Error' in line), lines[-1])
+        inside.append(float(result.stdout.split()[-1]))
+    return statistics.median(walls), statistics.median(inside)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'mode':<8} {'process s':>10} {'import->prediction s':>22}")
+    for name, code in (('pickles', PICKLES), ('bundle', BUNDLE)):
+        result = measure(code, args.runs)
+        if isinstance(result, str):
+            print(f"{name:<8} failed: {result}")
+        else:
+            print(f"{name:<8} {result[0]:>10.3f} {result[1]:>22.3f}")
@@ -0,0 +1,76 @@
+"""Benchmark: review cleaning throughput, before and after preprocessing.TextCleaner.
+
+Cleans the review text of the badminton, tawa and tea datasets combined (--repeat times
+over, to get a bigger corpus) three ways and reports reviews/sec for each:
+
+  legacy      the old nested clean_text() via Series.apply: re.sub per review and
+              WordNet lemmatize() on every token
+  cleaner     TextCleaner.clean() in this process, lemma cache starting empty
+  clean_many  TextCleaner.clean_many() over a process pool of --workers
+
+All three must produce identical output. Needs the NLTK stopwords and wordnet corpora.
+
+Usage:
+    python benchmark_preprocessing.py --repeat 10 --workers 4
+"""
+import argparse
+import os
+import re
+import time
+
+import pandas as pd
+
+from preprocessing import TextCleaner
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+# Each dataset names its review column differently
+DATASETS = {
+    'reviews_badminton': 'Review text',
+    'reviews_tawa': 'Review_Text',
+    'reviews_tea': 'review_text',
+}
+
+
+def load_reviews():
+    frames = []
+    for folder, column in DATASETS.items():
+        df = pd.read_csv(os.path.join(BASE_DIR, folder, 'data.csv'), usecols=[column])
+        frames.append(df[column].dropna())
+    return pd.concat(frames, ignore_index=True)
+
+
+def legacy_clean(reviews, stop_words, lemmatize):
+    def clean_text(text):
+        text = re.sub(r'[^a-zA-Z\s]', '', str(text)).lower()
+        words = [lemmatize(word) for word in text.split() if word not in stop_words]
+        return ' '.join(words)
+    return reviews.apply(clean_text).tolist()
+
+
+def timed(label, count, func):
+    started = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - started
+    print(f"{label:<12} {elapsed:>8.2f}s {count / elapsed:>12.0f} reviews/s")
+    return result
+
+
+def run(repeat, workers, stop_words=None, lemmatize=None):
+    reviews = pd.concat([load_reviews()] * repeat, ignore_index=True)
+    cleaner = TextCleaner(stop_words, lemmatize)
+    pooled = TextCleaner(stop_words, lemmatize)
+    print(f"{len(reviews)} reviews ({repeat}x the three datasets), {workers} workers")
+
+    expected = timed('legacy', len(reviews), lambda: legacy_clean(reviews, cleaner.stop_words, cleaner.lemmatize))
+    single = timed('cleaner', len(reviews), lambda: cleaner.clean_many(reviews, workers=1))
+    parallel = timed('clean_many', len(reviews), lambda: pooled.clean_many(reviews, workers=workers))
+    assert single == expected and parallel == expected, 'cleaned text differs from the legacy clean_text()'
+    print(f"distinct tokens lemmatized: {len(cleaner.lemmas)}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    args = parser.parse_args()
+    run(args.repeat, args.workers)
@@ -0,0 +1,79 @@
+"""Benchmark: serve.py throughput with and without micro-batching.
+
+Starts serve.py in a child process (werkzeug's threaded server, one process) once with
+MAX_BATCH_SIZE=1 and once with --batch-size, then has --clients threads post single
+reviews back to back for --duration seconds each time. Reports requests/s, latency
+percentiles and the mean batch size the server saw.
+
+Usage:
+    python benchmark_serve.py --clients 64 --duration 10
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import random
+import statistics
+import threading
+import time
+
+import pandas as pd
+import requests
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def serve(port, batch_size, ready):
+    os.environ['MAX_BATCH_SIZE'] = str(batch_size)
+    from werkzeug.serving import make_server
+    import serve as service
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server = make_server('127.0.0.1', port, service.app, threaded=True)
+    ready.set()
+    server.serve_forever()
+
+
+def run(batch_size, clients, duration, reviews, port):
+    ready = multiprocessing.Event()
+    server = multiprocessing.Process(target=serve, args=(port, batch_size, ready), daemon=True)
+    server.start()
+    ready.wait(30)
+    url = f'http://127.0.0.1:{port}'
+    latencies = [[] for _ in range(clients)]
+    deadline = time.time() + duration
+
+    def client(index):
+        session = requests.Session()
+        rng = random.Random(index)
+        while time.time() < deadline:
+            started = time.perf_counter()
+            session.post(f'{url}/predict', json={'review': rng.choice(reviews)}).raise_for_status()
+            latencies[index].append(time.perf_counter() - started)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    stats = requests.get(f'{url}/stats').json()['batcher']
+    server.kill()
+    server.join()
+
+    samples = sorted(sample for per_client in latencies for sample in per_client)
+    cuts = statistics.quantiles(samples, n=100)
+    return len(samples) / duration, cuts[49] * 1000, cuts[98] * 1000, stats['batch_size']['mean']
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--clients', type=int, default=64)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--batch-size', type=int, default=256)
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+
+    reviews = pd.read_csv(os.path.join(BASE_DIR, 'reviews_tea', 'data.csv'))['review_text'].dropna().tolist()
+    print(f"{'max batch':<10} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'mean batch':>11}")
+    for batch_size in (1, args.batch_size):
+        rate, p50, p99, mean_batch = run(batch_size, args.clients, args.duration, reviews, args.port)
+        print(f"{batch_size:<10} {rate:>8.0f} {p50:>8.2f} {p99:>8.2f} {mean_batch:>11.1f}")
@@ -0,0 +1,17 @@
+# gunicorn -c gunicorn.conf.py serve:app
+import gc
+import os
+
+bind = os.environ.get('BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('WEB_CONCURRENCY', os.cpu_count() or 1))
+# Threads let one worker hold many requests at once, which is what fills a micro-batch
+worker_class = 'gthread'
+threads = int(os.environ.get('THREADS', '64'))
+# Import serve.py (and load the model bundle) once in the master; workers share it copy-on-write
+preload_app = True
+
+
+def pre_fork(server, worker):
+    # Move everything the master allocated into the permanent generation, so garbage
+    # collections in the workers do not write to (and so copy) the shared model pages
+    gc.freeze()
@@ -0,0 +1,219 @@
+"""Self-contained inference bundle for the sentiment model.
+
+A bundle is a directory holding everything prediction needs, so serving imports neither
+scikit-learn nor NLTK and never touches the NLTK corpora:
+
+  meta.json        format version, classes, intercept and the TF-IDF settings
+  vocabulary.json  feature terms in column order
+  idf.npy          IDF weight per feature        (loaded memory-mapped)
+  coef.npy         model coefficient per feature (loaded memory-mapped)
+  stopwords.json   stopwords removed while cleaning, if the model was trained on cleaned text
+  lemmas.json      token -> lemma, where they differ, for every token that lemmatizes onto
+                   a vocabulary word or is one, plus the tokens cleaned during training
+
+The lemma table is built from the vocabulary side: WordNet's noun suffix rules run in
+reverse (problem -> problems, knife -> knives) and its noun exception list (child ->
+children) give the surface forms that can lemmatize onto a vocabulary word, and NLTK
+decides each one's lemma at export. Any other token is kept as it is; neither it nor
+its lemma is a feature, so the features are the same as with NLTK.
+
+The bundle for the committed .pkl files is committed in inference_bundle/, so serving
+works from a fresh checkout. train_model.py rewrites it after training; to re-export it
+from the .pkl files (needs NLTK and its stopwords and wordnet corpora, once):
+    python inference_bundle.py
+"""
+import json
+import os
+import re
+from collections import Counter
+
+import numpy as np
+
+from preprocessing import TextCleaner
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+BUNDLE_DIR = os.path.join(BASE_DIR, 'inference_bundle')
+FORMAT_VERSION = 1
+CLEAN_TOKEN = re.compile(r'[a-z]+')   # what TextCleaner.clean() leaves of a word
+
+
+def _check_supported(vectorizer):
+    """The bundle re-implements TfidfVectorizer.transform for the settings training uses."""
+    expected = {
+        'analyzer': 'word', 'tokenizer': None, 'preprocessor': None, 'stop_words': None,
+        'strip_accents': None, 'binary': False, 'sublinear_tf': False, 'norm': 'l2', 'use_idf': True,
+    }
+    unsupported = {name: getattr(vectorizer, name) for name, value in expected.items()
+                   if getattr(vectorizer, name) != value}
+    if unsupported:
+        raise ValueError(f"Cannot export a vectorizer with {unsupported}")
+
+
+def _idf(vectorizer):
+    try:
+        return vectorizer.idf_
+    except AttributeError:
+        # Vectorizers pickled by older scikit-learn releases keep the IDF as a sparse diagonal
+        return vectorizer._tfidf._idf_diag.diagonal()
+
+
+def export_bundle(path, vectorizer, model, cleaner=None):
+    """Writes a bundle for a fitted TfidfVectorizer and binary LogisticRegression.
+
+    cleaner is the TextCleaner the training text went through, or None if the model was
+    trained on raw text. Its lemmatizer decides the lemma table (see vocabulary_lemmas),
+    and the lemmas it cached while cleaning the training data are kept as well.
+    """
+    _check_supported(vectorizer)
+    os.makedirs(path, exist_ok=True)
+    terms = sorted(vectorizer.vocabulary_, key=vectorizer.vocabulary_.get)
+    meta = {
+        'format_version': FORMAT_VERSION,
+        'classes': [int(c) for c in model.classes_],
+        'intercept': float(model.intercept_[0]),
+        'lowercase': vectorizer.lowercase,
+        'token_pattern': vectorizer.token_pattern,
+        'ngram_range': list(vectorizer.ngram_range),
+        'clean_text': cleaner is not None,
+    }
+    with open(os.path.join(path, 'meta.json'), 'w') as f:
+        json.dump(meta, f, indent=2)
+    with open(os.path.join(path, 'vocabulary.json'), 'w') as f:
+        json.dump(terms, f)
+    np.save(os.path.join(path, 'idf.npy'), np.asarray(_idf(vectorizer), dtype=np.float64))
+    np.save(os.path.join(path, 'coef.npy'), np.asarray(model.coef_[0], dtype=np.float64))
+    if cleaner is not None:
+        with open(os.path.join(path, 'stopwords.json'), 'w') as f:
+            json.dump(sorted(cleaner.stop_words), f)
+        lemmas = {word: lemma for word, lemma in cleaner.lemmas.items() if word != lemma}
+        lemmas.update(vocabulary_lemmas(terms, cleaner.lemmatize))
+        with open(os.path.join(path, 'lemmas.json'), 'w') as f:
+            json.dump(lemmas, f, sort_keys=True)
+
+
+def vocabulary_lemmas(terms, lemmatize):
+    """token -> lemma for the tokens NLTK's (noun) lemmatizer maps onto a vocabulary word.
+
+    Candidates are every word of the unigram and bigram terms, those words with a
+    WordNet noun suffix rule undone, and the noun exception forms whose base is one of
+    them; lemmatize() then decides each candidate, so the table holds what cleaning the
+    training data would have produced for it.
+    """
+    from nltk.corpus import wordnet
+    from nltk.corpus.reader.wordnet import NOUN, WordNetCorpusReader
+
+    words = {word for term in terms for word in term.split()}
+    candidates = set(words)
+    for inflected, base in WordNetCorpusReader.MORPHOLOGICAL_SUBSTITUTIONS[NOUN]:
+        candidates.update(word[:len(word) - len(base)] + inflected for word in words if word.endswith(base))
+    wordnet.ensure_loaded()
+    candidates.update(form for form, bases in wordnet._exception_map[NOUN].items() if words.intersection(bases))
+
+    lemmas = {}
+    for form in candidates:
+        if not CLEAN_TOKEN.fullmatch(form):
+            continue   # cleaning never produces it
+        lemma = lemmatize(form)
+        if lemma != form and (lemma in words or form in words):
+            lemmas[form] = lemma
+    return lemmas
+
+
+def _keep(word):
+    return word
+
+
+class InferenceBundle:
+    """Cleans text and predicts sentiment from an exported bundle.
+
+    predict_proba() computes the same l2-normalised TF-IDF dot product as
+    vectorizer.transform() followed by model.predict_proba(), one vectorised numpy pass
+    per batch.
+    """
+
+    def __init__(self, path=BUNDLE_DIR):
+        with open(os.path.join(path, 'meta.json')) as f:
+            meta = json.load(f)
+        if meta['format_version'] != FORMAT_VERSION:
+            raise ValueError(f"Unsupported bundle format {meta['format_version']} in {path}")
+        with open(os.path.join(path, 'vocabulary.json')) as f:
+            self.vocabulary = {term: index for index, term in enumerate(json.load(f))}
+        self.idf = np.load(os.path.join(path, 'idf.npy'), mmap_mode='r')
+        self.coef = np.load(os.path.join(path, 'coef.npy'), mmap_mode='r')
+        self.intercept = meta['intercept']
+        self.classes = meta['classes']
+        self.lowercase = meta['lowercase']
+        self.token_pattern = re.compile(meta['token_pattern'])
+        self.min_n, self.max_n = meta['ngram_range']
+
+        self.cleaner = None
+        if meta['clean_text']:
+            with open(os.path.join(path, 'stopwords.json')) as f:
+                stop_words = json.load(f)
+            self.cleaner = TextCleaner(stop_words, lemmatize=_keep)
+            with open(os.path.join(path, 'lemmas.json')) as f:
+                self.cleaner.lemmas.update(json.load(f))
+
+    def clean(self, text):
+        """The model's input for `text`: the training-time cleaning, or `text` itself."""
+        return self.cleaner.clean(text) if self.cleaner is not None else str(text)
+
+    def _features(self, text):
+        tokens = self.token_pattern.findall(text.lower() if self.lowercase else text)
+        vocabulary = self.vocabulary
+        found = []
+        for n in range(self.min_n, self.max_n + 1):
+            for i in range(len(tokens) - n + 1):
+                index = vocabulary.get(tokens[i] if n == 1 else ' '.join(tokens[i:i + n]))
+                if index is not None:
+                    found.append(index)
+        return Counter(found)
+
+    def predict_proba(self, cleaned_texts):
+        """Probability of the positive class (label 1) for each already cleaned text."""
+        indices, counts, lengths = [], [], []
+        for text in cleaned_texts:
+            features = self._features(text)
+            indices.extend(features.keys())
+            counts.extend(features.values())
+            lengths.append(len(features))
+        docs = np.repeat(np.arange(len(lengths)), lengths)
+        indices = np.asarray(indices, dtype=np.intp)
+        tfidf = np.asarray(counts, dtype=np.float64) * self.idf[indices]
+        norms = np.sqrt(np.bincount(docs, weights=tfidf * tfidf, minlength=len(lengths)))
+        norms[norms == 0] = 1.0
+        scores = np.bincount(docs, weights=tfidf * self.coef[indices], minlength=len(lengths)) / norms
+        positive = 1.0 / (1.0 + np.exp(-(scores + self.intercept)))
+        return positive if self.classes[1] == 1 else 1.0 - positive
+
+    def predict(self, text):
+        """Label (1 positive, 0 negative) and positive probability for one raw review."""
+        probability = float(self.predict_proba([self.clean(text)])[0])
+        return int(probability >= 0.5), probability
+
+
+if __name__ == '__main__':
+    import glob
+
+    import joblib
+    import nltk
+    import pandas as pd
+
+    nltk.download('stopwords', quiet=True)
+    nltk.download('wordnet', quiet=True)
+
+    from score_reviews import find_text_column
+
+    cleaner = TextCleaner()
+    # Fill the lemma table with every token of the training data, and of the other
+    # review datasets so their words are lemmatized as well
+    for path in sorted(glob.glob(os.path.join(BASE_DIR, 'reviews_*', 'data.csv'))):
+        reviews = pd.read_csv(path)
+        cleaner.clean_many(reviews[find_text_column(reviews.columns)].dropna())
+    export_bundle(
+        BUNDLE_DIR,
+        joblib.load(os.path.join(BASE_DIR, 'tfidf_vectorizer.pkl')),
+        joblib.load(os.path.join(BASE_DIR, 'sentiment_model.pkl')),
+        cleaner,
+    )
+    print(f"Inference bundle written to {BUNDLE_DIR}")
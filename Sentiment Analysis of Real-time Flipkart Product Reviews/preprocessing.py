@@ -0,0 +1,83 @@
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+# Text Cleaning: everything that is not a letter or whitespace is dropped
+NON_LETTERS = re.compile(r'[^a-zA-Z\s]')
+
+
+class TextCleaner:
+    """Review cleaning shared by training (train_model.py) and serving (app.py).
+
+    Strips non-letters, lowercases, drops stopwords and lemmatizes what is left. The
+    lemma of each distinct token is computed once and cached: reviews reuse a small
+    vocabulary, so most tokens never reach WordNet. Pass stop_words / lemmatize to run
+    without the NLTK corpora; by default they come from NLTK, which must be downloaded.
+    """
+
+    def __init__(self, stop_words=None, lemmatize=None, max_cache_size=200000):
+        if stop_words is None:
+            from nltk.corpus import stopwords
+            stop_words = stopwords.words('english')
+        if lemmatize is None:
+            from nltk.stem import WordNetLemmatizer
+            lemmatize = WordNetLemmatizer().lemmatize
+        self.stop_words = frozenset(stop_words)
+        self.lemmatize = lemmatize
+        self.max_cache_size = max_cache_size   # bounds memory when serving arbitrary input
+        self.lemmas = {}
+
+    def clean(self, text):
+        text = NON_LETTERS.sub('', str(text)).lower()
+        stop_words = self.stop_words
+        lemmas = self.lemmas
+        words = []
+        for word in text.split():
+            if word in stop_words:
+                continue
+            lemma = lemmas.get(word)
+            if lemma is None:
+                lemma = self.lemmatize(word)
+                if len(lemmas) < self.max_cache_size:
+                    lemmas[word] = lemma
+            words.append(lemma)
+        return ' '.join(words)
+
+    def clean_many(self, texts, workers=None, chunk_size=5000):
+        """Cleans a sequence of texts in order, in chunks spread over a process pool.
+
+        workers defaults to the CPU count; with one worker, or too few texts to fill two
+        chunks, everything runs in this process. Lemmas the workers compute are merged
+        back into this cleaner's cache.
+        """
+        texts = list(texts)
+        workers = workers or os.cpu_count() or 1
+        if workers == 1 or len(texts) < 2 * chunk_size:
+            return [self.clean(text) for text in texts]
+
+        chunks = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+        results = []
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(self,)) as pool:
+            for cleaned, lemmas in pool.map(_clean_chunk, chunks):
+                results.extend(cleaned)
+                for word, lemma in lemmas:
+                    if len(self.lemmas) >= self.max_cache_size:
+                        break
+                    self.lemmas.setdefault(word, lemma)
+        return results
+
+
+_worker_cleaner = None
+
+
+def _init_worker(cleaner):
+    global _worker_cleaner
+    _worker_cleaner = cleaner
+
+
+def _clean_chunk(texts):
+    """Cleaned texts plus the (word, lemma) pairs this chunk added to the worker's cache."""
+    known = len(_worker_cleaner.lemmas)
+    cleaned = [_worker_cleaner.clean(text) for text in texts]
+    return cleaned, list(islice(_worker_cleaner.lemmas.items(), known, None))
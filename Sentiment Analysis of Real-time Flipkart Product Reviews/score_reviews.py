@@ -0,0 +1,126 @@
+"""Score a whole review dump with the trained sentiment model, chunk by chunk.
+
+Reads a CSV in the same schema as reviews_*/data.csv --chunk-size rows at a time, cleans
+the review text the way training did, scores the chunk in one vectorised pass over the
+inference bundle (see inference_bundle.py) and appends it, with Sentiment and Positive_Probability columns added, to
+the output (CSV, or Parquet when the output ends in .parquet; needs pyarrow). Memory
+stays bounded by the chunk size however big the input is. Progress goes to stderr.
+
+Usage:
+    python score_reviews.py reviews_tea/data.csv scored_tea.csv
+    python score_reviews.py dump.csv scored.parquet --chunk-size 100000
+"""
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+from inference_bundle import BUNDLE_DIR, InferenceBundle
+
+# The review datasets name this column 'Review text', 'Review_Text' or 'review_text'
+TEXT_COLUMNS = ('review text', 'review_text')
+
+
+def find_text_column(columns):
+    for column in columns:
+        if column.strip().lower() in TEXT_COLUMNS:
+            return column
+    raise ValueError(f"No review text column found among {list(columns)}; pass --text-column")
+
+
+class CsvSink:
+    def __init__(self, target):
+        self.target = target
+        self.header = True
+
+    def write(self, df):
+        df.to_csv(self.target, mode='w' if self.header else 'a', header=self.header, index=False)
+        self.header = False
+
+    def close(self):
+        pass
+
+
+class ParquetSink:
+    def __init__(self, target):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise ImportError("Parquet output needs pyarrow: pip install pyarrow") from None
+        self.target = target
+        self.writer = None
+
+    def write(self, df):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        if self.writer is None:
+            self.writer = pq.ParquetWriter(self.target, table.schema)
+        else:
+            table = table.cast(self.writer.schema)   # keep column types fixed across chunks
+        self.writer.write_table(table)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+def score_file(source, sink, bundle, chunk_size=50000, text_column=None, progress=None):
+    """Scores `source` (a binary file object) chunk by chunk into `sink`. Returns the row count.
+
+    progress, if given, is called after each chunk with (rows so far, fraction of the
+    input read, or None when its size is unknown).
+    """
+    try:
+        total = os.fstat(source.fileno()).st_size
+    except (AttributeError, OSError):
+        total = getattr(source, 'size', None)
+    rows = 0
+    try:
+        # Everything as text, so a column's type cannot change from one chunk to the next
+        for chunk in pd.read_csv(source, chunksize=chunk_size, dtype=str, keep_default_na=False):
+            column = text_column or find_text_column(chunk.columns)
+            positive = bundle.predict_proba([bundle.clean(text) for text in chunk[column]])
+            chunk['Sentiment'] = ['Positive' if p >= 0.5 else 'Negative' for p in positive]
+            chunk['Positive_Probability'] = positive.round(4)
+            sink.write(chunk)
+            rows += len(chunk)
+            if progress is not None:
+                progress(rows, min(1.0, source.tell() / total) if total else None)
+    finally:
+        # Also on errors, so a Parquet output gets its footer and stays readable
+        sink.close()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('input')
+    parser.add_argument('output', help='.csv or .parquet')
+    parser.add_argument('--chunk-size', type=int, default=50000)
+    parser.add_argument('--text-column', help='defaults to the review text column of the dataset schema')
+    parser.add_argument('--bundle', default=BUNDLE_DIR, help='inference bundle directory (committed; rewritten by train_model.py)')
+    args = parser.parse_args()
+
+    bundle = InferenceBundle(args.bundle)
+
+    started = time.perf_counter()
+
+    def report(rows, fraction):
+        rate = rows / (time.perf_counter() - started)
+        done = f"{fraction:6.1%}" if fraction is not None else ''
+        print(f"\r{done} {rows:>12,} rows  {rate:>10,.0f} rows/s", end='', file=sys.stderr, flush=True)
+
+    try:
+        sink = ParquetSink(args.output) if args.output.endswith('.parquet') else CsvSink(args.output)
+        with open(args.input, 'rb') as source:
+            rows = score_file(source, sink, bundle, args.chunk_size, args.text_column, report)
+    except (ImportError, ValueError) as e:
+        parser.error(str(e))
+    print(f"\nScored {rows:,} reviews into {args.output} in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,175 @@
+"""HTTP prediction service for the sentiment model, with request micro-batching.
+
+Concurrent requests are queued and scored together: a batcher thread takes whatever is
+waiting, up to MAX_BATCH_SIZE reviews, waiting at most MAX_WAIT_MS after the first one
+for more to arrive, then cleans them and runs a single vectorised predict_proba over the
+inference bundle (see inference_bundle.py) for the whole batch.
+
+    POST /predict   {"review": "..."} or {"reviews": ["...", ...]}
+    GET  /stats     batcher counters, queue depth and batch size histograms
+
+Run under gunicorn so the bundle is loaded once and shared by the workers:
+    gunicorn -c gunicorn.conf.py serve:app
+or for development:
+    python serve.py
+"""
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError
+
+from flask import Flask, jsonify, request
+
+from inference_bundle import BUNDLE_DIR, InferenceBundle
+
+app = Flask(__name__)
+
+# Batching
+app.config['MAX_BATCH_SIZE'] = int(os.environ.get('MAX_BATCH_SIZE', '256'))
+app.config['MAX_WAIT_MS'] = float(os.environ.get('MAX_WAIT_MS', '2'))
+# Requests
+app.config['MAX_REVIEWS_PER_REQUEST'] = 1000
+app.config['REQUEST_TIMEOUT'] = 10.0   # seconds a request waits for its batch
+
+HISTOGRAM_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+
+
+class Histogram:
+    """Counts per upper bound; values above the last bound land in '+Inf'."""
+
+    def __init__(self, buckets=HISTOGRAM_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0
+        self.observations = 0
+
+    def observe(self, value):
+        index = next((i for i, bound in enumerate(self.buckets) if value <= bound), len(self.buckets))
+        self.counts[index] += 1
+        self.total += value
+        self.observations += 1
+
+    def snapshot(self):
+        labels = [str(bound) for bound in self.buckets] + ['+Inf']
+        return {
+            'buckets': dict(zip(labels, self.counts)),
+            'count': self.observations,
+            'mean': round(self.total / self.observations, 2) if self.observations else 0.0,
+        }
+
+
+class MicroBatcher:
+    """Collects predictions requested from many threads into batches for one model call.
+
+    The batcher thread is started on first use in each process, so gunicorn workers
+    forked from a preloaded master each get their own.
+    """
+
+    def __init__(self, bundle, max_batch_size=256, max_wait_ms=2.0):
+        self.bundle = bundle
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._pid = None
+        self.batches = 0
+        self.predictions = 0
+        self.batch_sizes = Histogram()
+        self.queue_depths = Histogram()   # requests waiting when a batch is started
+
+    def _ensure_thread(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                self._queue = queue.Queue()
+                threading.Thread(target=self._loop, name='micro-batcher', daemon=True).start()
+                self._pid = os.getpid()
+
+    def submit(self, texts):
+        """Queues raw review texts; the Future resolves to their positive probabilities."""
+        self._ensure_thread()
+        future = Future()
+        self._queue.put((list(texts), future))
+        return future
+
+    def _loop(self):
+        pending = self._queue
+        while True:
+            batch = [pending.get()]
+            size = len(batch[0][0])
+            self.queue_depths.observe(1 + pending.qsize())
+            deadline = time.monotonic() + self.max_wait
+            while size < self.max_batch_size:
+                try:
+                    item = pending.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                batch.append(item)
+                size += len(item[0])
+            self._run(batch, size)
+
+    def _run(self, batch, size):
+        try:
+            cleaned = [self.bundle.clean(text) for texts, _ in batch for text in texts]
+            probabilities = self.bundle.predict_proba(cleaned).tolist()
+        except Exception as e:   # fail the requests in this batch, keep serving
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        self.batches += 1
+        self.predictions += size
+        self.batch_sizes.observe(size)
+        start = 0
+        for texts, future in batch:
+            future.set_result(probabilities[start:start + len(texts)])
+            start += len(texts)
+
+    def stats(self):
+        return {
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait * 1000,
+            'batches': self.batches,
+            'predictions': self.predictions,
+            'queued': self._queue.qsize() if self._pid == os.getpid() else 0,
+            'batch_size': self.batch_sizes.snapshot(),
+            'queue_depth': self.queue_depths.snapshot(),
+        }
+
+
+# Loaded at import, i.e. once in the gunicorn master when preload_app is on
+bundle = InferenceBundle(os.environ.get('BUNDLE_DIR', BUNDLE_DIR))
+batcher = MicroBatcher(bundle, app.config['MAX_BATCH_SIZE'], app.config['MAX_WAIT_MS'])
+
+
+@app.post('/predict')
+def predict():
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict):
+        payload = {}
+    single = 'review' in payload
+    reviews = [payload['review']] if single else payload.get('reviews')
+    if not isinstance(reviews, list) or not reviews or not all(isinstance(r, str) for r in reviews):
+        return jsonify({'error': 'Send {"review": "..."} or {"reviews": ["...", ...]}.'}), 400
+    if len(reviews) > app.config['MAX_REVIEWS_PER_REQUEST']:
+        return jsonify({'error': f"At most {app.config['MAX_REVIEWS_PER_REQUEST']} reviews per request."}), 400
+
+    try:
+        probabilities = batcher.submit(reviews).result(timeout=app.config['REQUEST_TIMEOUT'])
+    except TimeoutError:
+        return jsonify({'error': 'Prediction timed out, try again shortly.'}), 503
+    results = [
+        {'sentiment': 'Positive' if p >= 0.5 else 'Negative', 'positive_probability': round(p, 4)}
+        for p in probabilities
+    ]
+    return jsonify(results[0] if single else {'results': results})
+
+
+@app.get('/stats')
+def stats():
+    return jsonify({'pid': os.getpid(), 'batcher': batcher.stats()})
+
+
+if __name__ == '__main__':
+    app.run(threaded=True)
@@ -0,0 +1,52 @@
+import json
+import os
+
+import pytest
+
+from inference_bundle import BUNDLE_DIR, InferenceBundle
+from preprocessing import TextCleaner
+
+wordnet_reader = pytest.importorskip("nltk.corpus.reader.wordnet")
+
+
+@pytest.fixture(scope="module")
+def nltk_cleaner():
+    try:
+        cleaner = TextCleaner()
+        cleaner.clean("warm up the corpora")
+    except LookupError:
+        pytest.skip("NLTK stopwords/wordnet corpora are not installed")
+    return cleaner
+
+
+@pytest.fixture(scope="module")
+def bundle():
+    return InferenceBundle()
+
+
+def vocabulary_words():
+    with open(os.path.join(BUNDLE_DIR, "vocabulary.json")) as f:
+        return sorted({word for term in json.load(f) for word in term.split()})
+
+
+def inflected_forms(words):
+    rules = wordnet_reader.WordNetCorpusReader.MORPHOLOGICAL_SUBSTITUTIONS[wordnet_reader.NOUN]
+    return sorted({word[:len(word) - len(base)] + inflected
+                   for word in words for inflected, base in rules if word.endswith(base)})
+
+
+def test_unseen_plurals_clean_like_nltk(bundle, nltk_cleaner):
+    text = "So many problems and refunds"
+    assert bundle.clean(text) == nltk_cleaner.clean(text) == "many problem refund"
+
+    # Lemmas outside the vocabulary are not features, so keeping the token is equivalent
+    text = "the knives and batteries too"
+    assert bundle._features(bundle.clean(text)) == bundle._features(nltk_cleaner.clean(text))
+
+
+def test_inflected_vocabulary_words_clean_like_nltk(bundle, nltk_cleaner):
+    words = vocabulary_words()
+    different = [form for form in words + inflected_forms(words)
+                 if bundle.clean(form) != nltk_cleaner.clean(form)
+                 and (bundle.clean(form) in words or nltk_cleaner.clean(form) in words)]
+    assert different == []
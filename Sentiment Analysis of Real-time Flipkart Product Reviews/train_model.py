@@ -1,15 +1,14 @@
 import pandas as pd
 import numpy as np
-import re
 import nltk
-from nltk.corpus import stopwords
-from nltk.stem import WordNetLemmatizer
 from sklearn.model_selection import train_test_split
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.linear_model import LogisticRegression
 from sklearn.metrics import f1_score, classification_report
 import joblib
 import os
+from preprocessing import TextCleaner
+from inference_bundle import BUNDLE_DIR, export_bundle
 
 # 1. Download necessary NLTK data
 nltk.download('stopwords', quiet=True)
@@ -40,19 +39,12 @@ def run_pipeline():
     # Ratings 4-5 are Positive (1), Ratings 1-3 are Negative (0)
     df['Sentiment'] = df[RATING_COLUMN].apply(lambda x: 1 if float(x) > 3 else 0)
 
-    # 2. Data Preprocessing setup
-    lemmatizer = WordNetLemmatizer()
-    stop_words = set(stopwords.words('english'))
-
-    def clean_text(text):
-        # Text Cleaning: Remove special characters and punctuation
-        text = re.sub(r'[^a-zA-Z\s]', '', str(text)).lower()
-        # Text Normalization: Lemmatization and removing stopwords
-        words = [lemmatizer.lemmatize(word) for word in text.split() if word not in stop_words]
-        return ' '.join(words)
+    # 2. Data Preprocessing: the same cleaning app.py applies to user input
+    # (stopword removal and lemmatization, spread over all cores)
+    cleaner = TextCleaner()
 
     print("Cleaning text data... this may take a few seconds.")
-    df['Cleaned_Text'] = df[TEXT_COLUMN].apply(clean_text)
+    df['Cleaned_Text'] = cleaner.clean_many(df[TEXT_COLUMN])
 
     # 3. Text Embedding (TF-IDF Feature Extraction)
     print("Vectorizing text...")
@@ -83,5 +75,9 @@ def run_pipeline():
     joblib.dump(vectorizer, 'tfidf_vectorizer.pkl')
     print("\n Artifacts saved successfully: 'sentiment_model.pkl' and 'tfidf_vectorizer.pkl'")
 
+    # Self-contained bundle for the apps: no scikit-learn unpickling or NLTK corpora at startup
+    export_bundle(BUNDLE_DIR, vectorizer, model, cleaner)
+    print(f" Inference bundle saved to {BUNDLE_DIR}")
+
 if __name__ == "__main__":
     run_pipeline()
\ No newline at end of file
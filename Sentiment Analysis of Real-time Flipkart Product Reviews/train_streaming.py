@@ -0,0 +1,220 @@
+"""Out-of-core training: stream every review file through a hashed, incremental model.
+
+run_pipeline() in train_model.py reads one dataset into memory and fits a vocabulary.
+This trains over all reviews_*/data.csv files plus any --extra CSVs of the same schema
+without holding any of them in memory:
+
+  * files are read --chunk-size rows at a time and cleaned with the shared TextCleaner,
+    whose lemma cache grows with the number of distinct tokens up to its
+    max_cache_size (200,000 entries), then stays at that size;
+  * HashingVectorizer maps text to a fixed 2**--hash-bits feature space with no fitted
+    state, so apart from that capped cache nothing grows with the corpus;
+  * SGDClassifier (logistic loss) learns by partial_fit, one chunk at a time, --epochs
+    passes over the files, weighting classes by the counts seen so far (like
+    class_weight='balanced'). Each pass interleaves the files' chunks in a new random
+    order so the model does not drift towards whichever dataset happens to come last;
+  * a review goes to the held-out set when the CRC32 of its text falls in the lowest
+    --holdout percent, so the split is stable across passes and runs, and duplicate
+    reviews never straddle it. Evaluation streams the held-out rows and accumulates a
+    confusion matrix, from which macro and weighted F1 are computed.
+
+With --compare, the batch pipeline's model (5000-feature bigram TF-IDF + balanced
+LogisticRegression) is fitted in memory on the same split for a side-by-side report.
+Each pipeline gets its own fresh TextCleaner, so neither is timed with a lemma cache
+the other has already warmed.
+
+Usage:
+    python train_streaming.py --compare
+    python train_streaming.py --extra big_dump.csv --epochs 2
+"""
+import argparse
+import glob
+import os
+import random
+import sys
+import time
+import zlib
+
+import joblib
+import nltk
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfVectorizer
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+
+from preprocessing import TextCleaner
+from score_reviews import find_text_column
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+# The review datasets name this column 'Ratings', 'Reviewer_Rating' or 'reviewer_rating'
+RATING_COLUMNS = ('ratings', 'reviewer_rating')
+
+
+def find_rating_column(columns):
+    for column in columns:
+        if column.strip().lower() in RATING_COLUMNS:
+            return column
+    raise ValueError(f"No rating column found among {list(columns)}")
+
+
+def in_holdout(text, holdout):
+    return zlib.crc32(text.encode('utf-8')) % 100 < holdout
+
+
+def read_chunks(paths, chunk_size, rng=None):
+    """Chunks of every file in order or, when rng is given, interleaved at random.
+
+    Interleaving keeps one reader open per file and draws the next chunk from a randomly
+    picked one, so every stretch of training mixes all datasets while still holding only
+    one chunk per file in memory.
+    """
+    readers = [pd.read_csv(path, chunksize=chunk_size, dtype=str, keep_default_na=False) for path in paths]
+    if rng is None:
+        for reader in readers:
+            yield from reader
+        return
+    while readers:
+        reader = rng.choice(readers)
+        chunk = next(reader, None)
+        if chunk is None:
+            readers.remove(reader)
+        else:
+            yield chunk
+
+
+def stream_reviews(paths, cleaner, chunk_size, holdout, want_holdout, rng=None):
+    """Yields (cleaned texts, labels) per chunk, for the training or the held-out side."""
+    for chunk in read_chunks(paths, chunk_size, rng):
+        text_column = find_text_column(chunk.columns)
+        rating_column = find_rating_column(chunk.columns)
+        ratings = pd.to_numeric(chunk[rating_column], errors='coerce')
+        # Same rows and labels as run_pipeline(): text and rating present, 4-5 is positive
+        keep = (chunk[text_column] != '') & ratings.notna()
+        texts = chunk[text_column][keep].tolist()
+        labels = (ratings[keep] > 3).astype(int).to_numpy()
+        side = np.array([in_holdout(text, holdout) == want_holdout for text in texts], dtype=bool)
+        if side.any():
+            yield [cleaner.clean(text) for text, s in zip(texts, side) if s], labels[side]
+
+
+def f1_scores(confusion):
+    """Macro and weighted F1 from a 2x2 confusion matrix (rows true, columns predicted)."""
+    scores, support = [], confusion.sum(axis=1)
+    for label in (0, 1):
+        tp = confusion[label, label]
+        predicted, actual = confusion[:, label].sum(), support[label]
+        precision = tp / predicted if predicted else 0.0
+        recall = tp / actual if actual else 0.0
+        scores.append(2 * precision * recall / (precision + recall) if precision + recall else 0.0)
+    return float(np.mean(scores)), float(np.average(scores, weights=support))
+
+
+def train_streaming(paths, cleaner, chunk_size=20000, hash_bits=20, epochs=3, holdout=20, alpha=1e-6, seed=42):
+    started = time.perf_counter()
+    vectorizer = HashingVectorizer(n_features=2 ** hash_bits, ngram_range=(1, 2), alternate_sign=False)
+    model = SGDClassifier(loss='log_loss', alpha=alpha, random_state=seed)
+    rng = random.Random(seed)
+    seen = np.zeros(2)
+    rows = 0
+    for _ in range(epochs):
+        for texts, labels in stream_reviews(paths, cleaner, chunk_size, holdout, want_holdout=False, rng=rng):
+            seen += np.bincount(labels, minlength=2)
+            weights = (seen.sum() / (2 * np.maximum(seen, 1)))[labels]
+            model.partial_fit(vectorizer.transform(texts), labels, classes=[0, 1], sample_weight=weights)
+            rows += len(labels)
+    train_seconds = time.perf_counter() - started
+
+    confusion = np.zeros((2, 2), dtype=np.int64)
+    for texts, labels in stream_reviews(paths, cleaner, chunk_size, holdout, want_holdout=True):
+        np.add.at(confusion, (labels, model.predict(vectorizer.transform(texts))), 1)
+    macro, weighted = f1_scores(confusion)
+    return vectorizer, model, {
+        'train_rows_seen': rows,
+        'holdout_rows': int(confusion.sum()),
+        'macro_f1': macro,
+        'weighted_f1': weighted,
+        'train_seconds': train_seconds,
+        'total_seconds': time.perf_counter() - started,
+    }
+
+
+def train_batch(paths, cleaner, holdout=20):
+    """The batch pipeline's model on the same split, with every row in memory."""
+    started = time.perf_counter()
+    train, test = ([], []), ([], [])
+    for (texts, labels), want_holdout in ((train, False), (test, True)):
+        for chunk_texts, chunk_labels in stream_reviews(paths, cleaner, 20000, holdout, want_holdout):
+            texts.extend(chunk_texts)
+            labels.extend(chunk_labels)
+    vectorizer = TfidfVectorizer(max_features=5000, ngram_range=(1, 2))
+    model = LogisticRegression(max_iter=1000, class_weight='balanced')
+    model.fit(vectorizer.fit_transform(train[0]), train[1])
+    train_seconds = time.perf_counter() - started
+
+    confusion = np.zeros((2, 2), dtype=np.int64)
+    np.add.at(confusion, (np.asarray(test[1]), model.predict(vectorizer.transform(test[0]))), 1)
+    macro, weighted = f1_scores(confusion)
+    return {
+        'train_rows_seen': len(train[1]),
+        'holdout_rows': int(confusion.sum()),
+        'macro_f1': macro,
+        'weighted_f1': weighted,
+        'train_seconds': train_seconds,
+        'total_seconds': time.perf_counter() - started,
+    }
+
+
+def peak_rss_mb():
+    """Peak resident memory of this process in MB, or None where it cannot be read."""
+    try:
+        import resource
+    except ImportError:   # not available on Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def format_mb(mb):
+    return f"{mb:.0f} MB" if mb is not None else "n/a"
+
+
+def print_report(results):
+    print(f"\n{'pipeline':<10} {'rows':>9} {'holdout':>8} {'macro F1':>9} {'weighted F1':>12} {'train s':>8} {'total s':>8}")
+    for name, r in results.items():
+        print(f"{name:<10} {r['train_rows_seen']:>9} {r['holdout_rows']:>8} {r['macro_f1']:>9.4f} "
+              f"{r['weighted_f1']:>12.4f} {r['train_seconds']:>8.1f} {r['total_seconds']:>8.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--extra', nargs='*', default=[], help='more CSV files in the review dataset schema')
+    parser.add_argument('--chunk-size', type=int, default=20000)
+    parser.add_argument('--hash-bits', type=int, default=20)
+    parser.add_argument('--epochs', type=int, default=3)
+    parser.add_argument('--holdout', type=int, default=20, help='percent of reviews held out')
+    parser.add_argument('--compare', action='store_true', help='also fit the batch pipeline in memory')
+    parser.add_argument('--output', default=os.path.join(BASE_DIR, 'streaming_model.pkl'))
+    args = parser.parse_args()
+
+    nltk.download('stopwords', quiet=True)
+    nltk.download('wordnet', quiet=True)
+    paths = sorted(glob.glob(os.path.join(BASE_DIR, 'reviews_*', 'data.csv'))) + args.extra
+    print("Training on:\n  " + "\n  ".join(paths))
+
+    vectorizer, model, streaming = train_streaming(
+        paths, TextCleaner(), args.chunk_size, args.hash_bits, args.epochs, args.holdout
+    )
+    print(f"Streaming peak RSS: {format_mb(peak_rss_mb())}")
+    joblib.dump({'vectorizer': vectorizer, 'model': model}, args.output)
+    print(f"Model saved to {args.output}")
+
+    results = {'streaming': streaming}
+    if args.compare:
+        results['batch'] = train_batch(paths, TextCleaner(), args.holdout)
+        print(f"Peak RSS after batch fit: {format_mb(peak_rss_mb())}")
+    print_report(results)
+
+
+if __name__ == '__main__':
+    main()
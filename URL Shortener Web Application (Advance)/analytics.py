@@ -0,0 +1,124 @@
+import atexit
+import logging
+import os
+import threading
+import time
+
+BUCKET_SECONDS = 60
+
+
+class ClickAggregator:
+    """Buffers click counts in memory and writes them out in batches (write-behind).
+
+    record() only increments a dict entry keyed by (short_id, minute bucket), so the
+    redirect path never touches the database. A background thread hands the buffered
+    counts to flush_fn(rows) every `interval` seconds, or sooner once `max_pending`
+    distinct keys are waiting. rows is a list of dicts with short_id, bucket_start
+    (unix seconds) and clicks. The buffer is drained one last time at interpreter exit.
+
+    Counts from a failed flush go back into the buffer for the next attempt, but the
+    buffer never holds more than `max_buffered` distinct keys: clicks for new keys
+    beyond that are dropped and counted in dropped_clicks, so a long database outage
+    cannot grow it without bound.
+    """
+
+    def __init__(self, flush_fn, interval=5.0, max_pending=5000, max_buffered=50000):
+        self.flush_fn = flush_fn
+        self.interval = interval
+        self.max_pending = max_pending
+        self.max_buffered = max_buffered
+        self._counts = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._pid = None
+        self.flushes = 0
+        self.flushed_clicks = 0
+        self.failed_flushes = 0
+        self.dropped_clicks = 0
+        self._dropped_logged = 0
+        atexit.register(self.stop)
+
+    def record(self, short_id):
+        key = (short_id, int(time.time()) // BUCKET_SECONDS)
+        with self._lock:
+            if key in self._counts:
+                self._counts[key] += 1
+            elif len(self._counts) < self.max_buffered:
+                self._counts[key] = 1
+            else:
+                self.dropped_clicks += 1
+            pending = len(self._counts)
+        if self._pid != os.getpid():
+            self._start()
+        if pending >= self.max_pending:
+            self._wake.set()
+
+    def _start(self):
+        # One flusher per process: threads do not survive a fork, so start lazily
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, name='click-flusher', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            counts, self._counts = self._counts, {}
+            dropped = self.dropped_clicks - self._dropped_logged
+            self._dropped_logged = self.dropped_clicks
+        if dropped:
+            logging.warning('Click buffer full (%d keys); dropped %d clicks', self.max_buffered, dropped)
+        if not counts:
+            return
+        rows = [
+            {'short_id': short_id, 'bucket_start': bucket * BUCKET_SECONDS, 'clicks': clicks}
+            for (short_id, bucket), clicks in counts.items()
+        ]
+        try:
+            self.flush_fn(rows)
+        except Exception:
+            logging.exception('Click flush failed; keeping %d buffered counts for the next attempt', len(rows))
+            self.failed_flushes += 1
+            with self._lock:
+                for key, clicks in counts.items():
+                    if key in self._counts or len(self._counts) < self.max_buffered:
+                        self._counts[key] = self._counts.get(key, 0) + clicks
+                    else:
+                        self.dropped_clicks += clicks
+            return
+        self.flushes += 1
+        self.flushed_clicks += sum(counts.values())
+
+    def stop(self):
+        """Stops the flusher and drains whatever is still buffered."""
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None and self._pid == os.getpid():
+            self._thread.join(timeout=self.interval + 5)
+        self.flush()
+
+    def stats(self):
+        with self._lock:
+            pending_keys = len(self._counts)
+            pending_clicks = sum(self._counts.values())
+        return {
+            'interval': self.interval,
+            'max_pending': self.max_pending,
+            'max_buffered': self.max_buffered,
+            'pending_keys': pending_keys,
+            'pending_clicks': pending_clicks,
+            'flushes': self.flushes,
+            'flushed_clicks': self.flushed_clicks,
+            'failed_flushes': self.failed_flushes,
+            'dropped_clicks': self.dropped_clicks,
+        }
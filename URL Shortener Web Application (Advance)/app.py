@@ -1,23 +1,106 @@
-from flask import Flask, render_template, request, redirect, url_for, flash
+from flask import Flask, Response, render_template, request, redirect, url_for, flash, abort, jsonify, stream_with_context
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager, UserMixin, login_user, login_required, logout_user, current_user
 from flask_migrate import Migrate
-from werkzeug.security import generate_password_hash, check_password_hash
-import string
-import random
-import requests
+from sqlalchemy.dialects import postgresql, sqlite
+import csv
+import hashlib
+import io
+import json
+import logging
+import os
+import threading
+import time
+from urllib.parse import urlsplit, urlunsplit
+from cache import LRUCache, MISSING
+from verifier import URLVerifier, STATUS_PENDING, STATUS_VERIFIED, STATUS_UNREACHABLE, STATUS_UNVERIFIED
+from short_ids import ShortIDAllocator
+from bloom import ShortIDGuard
+from storage import configure_storage, install_sqlite_pragmas
+from hashing import HasherBusy, PasswordHasher
+from analytics import ClickAggregator, BUCKET_SECONDS
 
 app = Flask(__name__)
 app.secret_key = 'advanced_super_secret_key'
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///database.db'
+# DB URI, pool size and SQLite tuning come from the environment (see storage.py)
+configure_storage(app, default_uri='sqlite:///database.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
+# Redirect cache: short IDs never change once written, so lookups can be served from memory
+app.config['REDIRECT_CACHE_SIZE'] = 100000
+app.config['REDIRECT_CACHE_TTL'] = None          # seconds, None = keep until evicted
+app.config['REDIRECT_CACHE_NEGATIVE_TTL'] = 30   # seconds to remember unknown short IDs
+
+# Reachability checks run in the background so a slow target host never blocks a request
+app.config['VERIFY_WORKERS'] = 8
+app.config['VERIFY_TIMEOUT'] = 3          # seconds per HEAD request
+app.config['VERIFY_RESULT_TTL'] = 600     # seconds to reuse a URL's check result
+app.config['VERIFY_MAX_QUEUED'] = 1000    # checks waiting or running; links beyond are marked unverified
+
+# Short IDs come from a shared sequence; each process leases a block of this many IDs at a time
+app.config['SHORT_ID_BLOCK_SIZE'] = 1000
+
+# Bloom filter over all short IDs so requests for unknown IDs get a 404 without a query
+app.config['SHORT_ID_FILTER_CAPACITY'] = 1000000     # grown automatically once exceeded
+app.config['SHORT_ID_FILTER_ERROR_RATE'] = 0.001     # false-positive rate (each costs one query)
+app.config['SHORT_ID_FILTER_REFRESH_INTERVAL'] = 1.0 # seconds between scans for other workers' links
+app.config['SHORT_ID_FILTER_SEQUENCE_HEADROOM'] = 1000000  # IDs all workers may lease between scans
+
+# Link lists are paginated by URLMap.id (keyset pagination), newest first
+app.config['LINKS_PAGE_SIZE'] = 50
+app.config['LINKS_MAX_PAGE_SIZE'] = 200   # upper bound for ?limit= on the JSON endpoint
+
+# Bulk shortening API (/api/bulk)
+app.config['BULK_MAX_URLS'] = 100000
+app.config['BULK_CHUNK_SIZE'] = 1000          # URLs per insert transaction
+app.config['BULK_VERIFY_CONCURRENCY'] = 32    # reachability checks in flight per bulk job
+app.config['BULK_VERIFY_WORKERS'] = 4         # threads for bulk checks, separate from VERIFY_WORKERS
+app.config['BULK_VERIFY_JOBS'] = 4            # bulk jobs verified at once; later jobs are left unverified
+
+# Click analytics are buffered in memory and flushed in batches, never written by the redirect itself
+app.config['CLICK_FLUSH_INTERVAL'] = 5        # seconds between flushes
+app.config['CLICK_FLUSH_MAX_PENDING'] = 5000  # flush early once this many (link, minute) counters are buffered
+app.config['CLICK_BUFFER_MAX_KEYS'] = 50000   # hard cap while flushes fail; clicks for new counters are dropped
+
+# Authentication: logged-in identities are cached briefly, password hashing runs in a process pool
+app.config['USER_CACHE_TTL'] = 30             # seconds a loaded identity is reused
+app.config['USER_CACHE_SIZE'] = 10000
+app.config['PASSWORD_HASH_WORKERS'] = int(os.environ.get('PASSWORD_HASH_WORKERS', 2))   # 0 = hash inline
+app.config['PASSWORD_HASH_MAX_PENDING'] = 4   # logins/signups hashing at once; more get a 503
+
 # Initialize extensions
 db = SQLAlchemy(app)
+with app.app_context():
+    install_sqlite_pragmas(app, db.engine)
 migrate = Migrate(app, db)
 login_manager = LoginManager(app)
 login_manager.login_view = 'login' # Redirects here if not logged in
 
+redirect_cache = LRUCache(
+    max_size=app.config['REDIRECT_CACHE_SIZE'],
+    ttl=app.config['REDIRECT_CACHE_TTL'],
+    negative_ttl=app.config['REDIRECT_CACHE_NEGATIVE_TTL'],
+)
+
+user_cache = LRUCache(
+    max_size=app.config['USER_CACHE_SIZE'],
+    ttl=app.config['USER_CACHE_TTL'],
+)
+
+password_hasher = PasswordHasher(
+    max_workers=app.config['PASSWORD_HASH_WORKERS'],
+    max_pending=app.config['PASSWORD_HASH_MAX_PENDING'],
+)
+
+url_verifier = URLVerifier(
+    max_workers=app.config['VERIFY_WORKERS'],
+    timeout=app.config['VERIFY_TIMEOUT'],
+    result_ttl=app.config['VERIFY_RESULT_TTL'],
+    max_queued=app.config['VERIFY_MAX_QUEUED'],
+    bulk_workers=app.config['BULK_VERIFY_WORKERS'],
+)
+bulk_verify_slots = threading.BoundedSemaphore(app.config['BULK_VERIFY_JOBS'])
+
 # --- Database Models ---
 class User(UserMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -32,21 +115,376 @@ class URLMap(db.Model):
     short_id = db.Column(db.String(10), unique=True, nullable=False)
     # Foreign Key linking to the User
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    # pending -> verified / unreachable, filled in by the background URL verifier
+    status = db.Column(db.String(12), nullable=False, default=STATUS_PENDING)
+    # Fixed-width hash of the normalized URL so the duplicate check is an index probe
+    url_hash = db.Column(
+        db.String(16),
+        default=lambda context: hash_url(context.get_current_parameters()['original_url']),
+    )
+
+    __table_args__ = (
+        db.Index('ix_url_map_user_id_url_hash', 'user_id', 'url_hash'),
+    )
+
+# Per-minute click counters written by the click aggregator
+class ClickStat(db.Model):
+    __tablename__ = 'click_stat'
+    short_id = db.Column(db.String(10), primary_key=True)
+    bucket_start = db.Column(db.Integer, primary_key=True)   # unix time of the minute
+    clicks = db.Column(db.Integer, nullable=False, default=0)
+
+# Sequence backing the short ID allocator; the scramble key is generated once per database
+class IDSequence(db.Model):
+    __tablename__ = 'id_sequence'
+    name = db.Column(db.String(32), primary_key=True)
+    next_value = db.Column(db.BigInteger, nullable=False)
+    scramble_key = db.Column(db.String(64), nullable=False)
+
+class SessionUser(UserMixin):
+    """Detached copy of the fields requests need from a User, safe to share between requests."""
+
+    def __init__(self, id, username):
+        self.id = id
+        self.username = username
+
+def cache_user(user):
+    identity = SessionUser(user.id, user.username)
+    user_cache.put(user.id, identity)
+    return identity
 
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    user_id = int(user_id)
+    identity = user_cache.get(user_id)
+    if identity is None:
+        user = db.session.get(User, user_id)
+        if user is None:
+            user_cache.put_missing(user_id)
+            return None
+        identity = cache_user(user)
+    return None if identity is MISSING else identity
 
 # --- Helper Functions ---
+def normalize_url(url):
+    """Canonical form used for deduplication: lowercase scheme and host, no default port."""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    netloc = parts.netloc.lower()
+    if scheme == 'http' and netloc.endswith(':80'):
+        netloc = netloc[:-3]
+    elif scheme == 'https' and netloc.endswith(':443'):
+        netloc = netloc[:-4]
+    return urlunsplit((scheme, netloc, parts.path or '/', parts.query, parts.fragment))
+
+def hash_url(url):
+    """First 64 bits of the SHA-256 of the normalized URL, as 16 hex characters."""
+    return hashlib.sha256(normalize_url(url).encode('utf-8')).hexdigest()[:16]
+
+def find_existing_url(original_url, user_id):
+    """Looks up a URL this user already shortened through the (user_id, url_hash) index."""
+    normalized = normalize_url(original_url)
+    candidates = URLMap.query.filter_by(user_id=user_id, url_hash=hash_url(original_url))
+    # Confirm the match so a (very unlikely) hash collision can never return the wrong link
+    return next((link for link in candidates if normalize_url(link.original_url) == normalized), None)
+
+def lease_id_block(size):
+    """Atomically reserves `size` sequence values in its own short transaction."""
+    with db.engine.begin() as connection:
+        connection.execute(
+            db.update(IDSequence)
+            .where(IDSequence.name == 'url_map')
+            .values(next_value=IDSequence.next_value + size)
+        )
+        row = connection.execute(
+            db.select(IDSequence.next_value, IDSequence.scramble_key).where(IDSequence.name == 'url_map')
+        ).one()
+    return row.next_value - size, row.scramble_key
+
+short_id_allocator = ShortIDAllocator(lease_id_block, block_size=app.config['SHORT_ID_BLOCK_SIZE'])
+
 def generate_short_id():
-    return ''.join(random.choices(string.ascii_letters + string.digits, k=6))
+    return short_id_allocator.allocate()
+
+def record_verification(url_id, reachable):
+    """Stores a background check result; runs on a verifier pool thread."""
+    store_status(url_id, STATUS_VERIFIED if reachable else STATUS_UNREACHABLE)
 
-def is_valid_url(url):
+def store_status(url_id, status):
     try:
-        response = requests.head(url, timeout=3, allow_redirects=True)
-        return response.status_code < 400
-    except requests.RequestException:
-        return False
+        with app.app_context():
+            URLMap.query.filter_by(id=url_id).update({'status': status})
+            db.session.commit()
+    except Exception:
+        logging.exception('Could not store verification status for url_map.id=%s', url_id)
+
+def verify_in_background(link):
+    url_id = link.id
+    scheduled = url_verifier.submit(link.original_url, lambda url, reachable: record_verification(url_id, reachable))
+    if scheduled is None:
+        # Every check slot is taken: mark it like a bulk link whose check cannot start
+        logging.warning('Verification queue full; url_map.id=%s left unverified', url_id)
+        store_status(url_id, STATUS_UNVERIFIED)
+
+def prepare_url(raw_url):
+    """Trims the URL and adds http:// if it is missing, same as the dashboard form."""
+    original_url = raw_url.strip()
+    if original_url and not original_url.startswith(('http://', 'https://')):
+        original_url = 'http://' + original_url
+    return original_url
+
+def read_bulk_urls():
+    """Reads URLs from a JSON array (or {"urls": [...]}) body or a CSV upload in the 'file' field."""
+    if 'file' in request.files or request.mimetype == 'text/csv':
+        stream = request.files['file'].stream if 'file' in request.files else request.stream
+        rows = csv.reader(io.TextIOWrapper(stream, encoding='utf-8-sig'))
+        header = next(rows, [])
+        names = [name.strip().lower() for name in header]
+        column = next((names.index(name) for name in ('url', 'original_url') if name in names), None)
+        if column is None:
+            # No header row: the first column of every row is a URL
+            column = 0
+            rows = [header, *rows]
+        urls = [row[column] for row in rows if len(row) > column]
+    else:
+        payload = request.get_json(silent=True)
+        if isinstance(payload, dict):
+            payload = payload.get('urls')
+        if not isinstance(payload, list) or not all(isinstance(url, str) for url in payload):
+            raise ValueError('Send a JSON array of URLs, {"urls": [...]}, or a CSV file upload.')
+        urls = payload
+
+    if len(urls) > app.config['BULK_MAX_URLS']:
+        raise ValueError(f"At most {app.config['BULK_MAX_URLS']} URLs per request.")
+    return urls
+
+def bulk_shorten(raw_urls, user_id, host_url):
+    """Shortens URLs chunk by chunk and yields one NDJSON line per input URL, in input order.
+
+    Each chunk costs one set-based duplicate query, one block of allocated IDs and one
+    multi-row INSERT in its own transaction.
+    """
+    chunk_size = app.config['BULK_CHUNK_SIZE']
+    known = {}        # normalized URL -> short_id, for links seen earlier in this request
+    to_verify = []    # (url_map.id, original_url) of newly created links
+
+    for start in range(0, len(raw_urls), chunk_size):
+        entries = []
+        for raw_url in raw_urls[start:start + chunk_size]:
+            original_url = prepare_url(raw_url)
+            if not original_url or len(original_url) > 500:
+                entries.append({'input': raw_url, 'error': 'invalid URL'})
+                continue
+            entries.append({'input': raw_url, 'original_url': original_url,
+                            'normalized': normalize_url(original_url), 'url_hash': hash_url(original_url)})
+        valid = [entry for entry in entries if 'error' not in entry]
+
+        for entry in valid:
+            if entry['normalized'] in known:
+                entry['result'] = 'duplicate'
+
+        # Links this user already has, found with a single index-backed IN query
+        existing = {}
+        hashes = {entry['url_hash'] for entry in valid if 'result' not in entry}
+        if hashes:
+            rows = db.session.execute(
+                db.select(URLMap.original_url, URLMap.short_id)
+                .where(URLMap.user_id == user_id, URLMap.url_hash.in_(hashes))
+            ).all()
+            existing = {normalize_url(row.original_url): row.short_id for row in rows}
+
+        new_entries = []
+        for entry in valid:
+            if 'result' in entry:
+                continue
+            if entry['normalized'] in existing:
+                entry['result'] = 'existing'
+                known[entry['normalized']] = existing[entry['normalized']]
+            elif entry['normalized'] in known:
+                entry['result'] = 'duplicate'
+            else:
+                known[entry['normalized']] = None   # filled in once its ID is allocated
+                new_entries.append(entry)
+
+        if new_entries:
+            for entry, short_id in zip(new_entries, short_id_allocator.allocate_many(len(new_entries))):
+                entry['result'] = 'created'
+                known[entry['normalized']] = short_id
+            inserted = db.session.execute(
+                db.insert(URLMap).returning(URLMap.id, URLMap.original_url, sort_by_parameter_order=True),
+                [{'original_url': entry['original_url'], 'short_id': known[entry['normalized']],
+                  'user_id': user_id, 'url_hash': entry['url_hash']} for entry in new_entries],
+            ).all()
+            db.session.commit()
+            for entry in new_entries:
+                short_id_guard.add(known[entry['normalized']])
+            to_verify.extend((row.id, row.original_url) for row in inserted)
+
+        lines = []
+        for entry in entries:
+            if 'error' in entry:
+                lines.append({'input': entry['input'], 'error': entry['error']})
+            else:
+                short_id = known[entry['normalized']]
+                lines.append({'input': entry['input'], 'result': entry['result'],
+                              'short_id': short_id, 'short_url': host_url + short_id})
+        yield ''.join(json.dumps(line) + '\n' for line in lines)
+
+    verify_bulk_in_background(to_verify)
+
+def verify_bulk_in_background(links):
+    """Checks bulk-created links with capped parallelism and stores statuses in batches.
+
+    At most BULK_VERIFY_JOBS jobs run at once. Links of a job that cannot start, or
+    that fails part-way, are marked unverified rather than left pending.
+    """
+    if not links:
+        return
+    ids_by_url = {}
+    for url_id, original_url in links:
+        ids_by_url.setdefault(original_url, []).append(url_id)
+
+    def store(updates):
+        db.session.execute(db.update(URLMap), updates)
+        db.session.commit()
+
+    def mark_unverified(url_ids):
+        try:
+            with app.app_context():
+                for start in range(0, len(url_ids), app.config['BULK_CHUNK_SIZE']):
+                    store([{'id': url_id, 'status': STATUS_UNVERIFIED}
+                           for url_id in url_ids[start:start + app.config['BULK_CHUNK_SIZE']]])
+        except Exception:
+            logging.exception('Could not mark %d bulk links as unverified', len(url_ids))
+
+    def run():
+        done = set()
+        try:
+            updates = []
+            checks = url_verifier.check_many(ids_by_url, max_in_flight=app.config['BULK_VERIFY_CONCURRENCY'])
+            with app.app_context():
+                for original_url, reachable in checks:
+                    status = STATUS_VERIFIED if reachable else STATUS_UNREACHABLE
+                    updates.extend({'id': url_id, 'status': status} for url_id in ids_by_url[original_url])
+                    if len(updates) >= app.config['BULK_CHUNK_SIZE']:
+                        store(updates)
+                        done.update(update['id'] for update in updates)
+                        updates = []
+                if updates:
+                    store(updates)
+                    done.update(update['id'] for update in updates)
+        except Exception:
+            logging.exception('Bulk verification failed after %d of %d links', len(done), len(links))
+            mark_unverified([url_id for url_id, _ in links if url_id not in done])
+        finally:
+            bulk_verify_slots.release()
+
+    if not bulk_verify_slots.acquire(blocking=False):
+        logging.warning('Too many bulk verification jobs running; %d links left unverified', len(links))
+        mark_unverified([url_id for url_id, _ in links])
+        return
+    try:
+        threading.Thread(target=run, name='bulk-verify', daemon=True).start()
+    except Exception:
+        bulk_verify_slots.release()
+        raise
+
+def write_click_counts(rows):
+    """Adds buffered click counts to click_stat with one batched upsert; runs on the flusher thread."""
+    with app.app_context():
+        dialect = postgresql if db.engine.dialect.name == 'postgresql' else sqlite
+        statement = dialect.insert(ClickStat.__table__)
+        statement = statement.on_conflict_do_update(
+            index_elements=['short_id', 'bucket_start'],
+            set_={'clicks': ClickStat.__table__.c.clicks + statement.excluded.clicks},
+        )
+        with db.engine.begin() as connection:
+            connection.execute(statement, rows)
+
+click_aggregator = ClickAggregator(
+    write_click_counts,
+    interval=app.config['CLICK_FLUSH_INTERVAL'],
+    max_pending=app.config['CLICK_FLUSH_MAX_PENDING'],
+    max_buffered=app.config['CLICK_BUFFER_MAX_KEYS'],
+)
+
+def click_totals(short_ids, since=None):
+    """Total clicks per short_id (optionally only buckets starting at or after `since`)."""
+    if not short_ids:
+        return {}
+    query = (
+        db.select(ClickStat.short_id, db.func.sum(ClickStat.clicks))
+        .where(ClickStat.short_id.in_(short_ids))
+        .group_by(ClickStat.short_id)
+    )
+    if since is not None:
+        query = query.where(ClickStat.bucket_start >= since)
+    return dict(db.session.execute(query).all())
+
+def fetch_links_page(user_id, before=None, page_size=None):
+    """Keyset pagination on URLMap.id, newest first. Returns (links, next_cursor)."""
+    page_size = page_size or app.config['LINKS_PAGE_SIZE']
+    query = URLMap.query.filter_by(user_id=user_id)
+    if before is not None:
+        query = query.filter(URLMap.id < before)
+    # One extra row tells us whether an older page exists
+    links = query.order_by(URLMap.id.desc()).limit(page_size + 1).all()
+    next_cursor = links[page_size - 1].id if len(links) > page_size else None
+    return links[:page_size], next_cursor
+
+def serialize_link(link):
+    return {
+        'id': link.id,
+        'original_url': link.original_url,
+        'short_id': link.short_id,
+        'short_url': request.host_url + link.short_id,
+        'status': link.status,
+    }
+
+def iter_short_ids(after_id, batch_size=10000):
+    """Streams (id, short_id) for rows with id > after_id in id order, one batch per query."""
+    while True:
+        rows = db.session.execute(
+            db.select(URLMap.id, URLMap.short_id)
+            .where(URLMap.id > after_id)
+            .order_by(URLMap.id)
+            .limit(batch_size)
+        ).all()
+        yield from rows
+        if len(rows) < batch_size:
+            return
+        after_id = rows[-1].id
+
+def read_id_sequence():
+    """Current (next_value, scramble_key) of the short ID sequence."""
+    row = db.session.execute(
+        db.select(IDSequence.next_value, IDSequence.scramble_key).where(IDSequence.name == 'url_map')
+    ).one()
+    return row.next_value, row.scramble_key
+
+# Built by the first lookup rather than at import: `flask db upgrade` imports the app
+# before url_map exists
+short_id_guard = ShortIDGuard(
+    iter_short_ids,
+    lambda: db.session.query(URLMap.id).count(),
+    read_id_sequence,
+    capacity=app.config['SHORT_ID_FILTER_CAPACITY'],
+    error_rate=app.config['SHORT_ID_FILTER_ERROR_RATE'],
+    refresh_interval=app.config['SHORT_ID_FILTER_REFRESH_INTERVAL'],
+    sequence_headroom=app.config['SHORT_ID_FILTER_SEQUENCE_HEADROOM'],
+)
+
+def lookup_original_url(short_id):
+    """Read-through cache in front of the short_id lookup. Returns None for unknown IDs."""
+    original_url = redirect_cache.get(short_id)
+    if original_url is None:
+        if not short_id_guard.might_exist(short_id):
+            # Definitely unknown: skip the query and keep scanner traffic out of the LRU
+            return None
+        link = URLMap.query.filter_by(short_id=short_id).first()
+        original_url = link.original_url if link else MISSING
+        redirect_cache.put(short_id, original_url)
+    return None if original_url is MISSING else original_url
 
 # --- Routes ---
 @app.route('/')
@@ -71,8 +509,13 @@ def signup():
             flash('This username already exists...', 'danger')
             return redirect(url_for('signup'))
 
-        # Create new user
-        hashed_password = generate_password_hash(password, method='pbkdf2:sha256')
+        # Create new user; the DB connection goes back to the pool while hashing
+        db.session.close()
+        try:
+            hashed_password = password_hasher.hash(password)
+        except HasherBusy:
+            flash('Too many sign-ups right now, please try again in a moment.', 'danger')
+            return render_template('signup.html'), 503
         new_user = User(username=username, password=hashed_password)
         db.session.add(new_user)
         db.session.commit()
@@ -89,8 +532,15 @@ def login():
         password = request.form.get('password')
         
         user = User.query.filter_by(username=username).first()
-        if user and check_password_hash(user.password, password):
-            login_user(user)
+        # Detaches the (loaded) user and returns the DB connection to the pool while hashing
+        db.session.close()
+        try:
+            valid = user is not None and password_hasher.verify(user.password, password)
+        except HasherBusy:
+            flash('Too many sign-ins right now, please try again in a moment.', 'danger')
+            return render_template('login.html'), 503
+        if valid:
+            login_user(cache_user(user))
             return redirect(url_for('dashboard'))
         else:
             flash('Invalid username or password', 'danger')
@@ -113,29 +563,92 @@ def dashboard():
         if not original_url.startswith(('http://', 'https://')):
             original_url = 'http://' + original_url
 
-        if not is_valid_url(original_url):
-            flash('Error: The URL you entered does not exist or is unreachable.', 'danger')
+        # Check if this specific user already shortened this URL
+        existing_url = find_existing_url(original_url, current_user.id)
+        if existing_url:
+            short_id = existing_url.short_id
         else:
-            # Check if this specific user already shortened this URL
-            existing_url = URLMap.query.filter_by(original_url=original_url, user_id=current_user.id).first()
-            if existing_url:
-                short_id = existing_url.short_id
-            else:
-                short_id = generate_short_id()
-                new_url = URLMap(original_url=original_url, short_id=short_id, user_id=current_user.id)
-                db.session.add(new_url)
-                db.session.commit()
-                
-            shortened_url = request.host_url + short_id
+            short_id = generate_short_id()
+            new_url = URLMap(original_url=original_url, short_id=short_id, user_id=current_user.id)
+            db.session.add(new_url)
+            db.session.commit()
+            short_id_guard.add(short_id)
+
+            # Stored as 'pending' right away; the reachability check updates it in the background
+            verify_in_background(new_url)
+
+        # Warm the redirect cache (also replaces any cached "not found" entry)
+        redirect_cache.put(short_id, original_url)
+        shortened_url = request.host_url + short_id
 
-    # Get history ONLY for the logged-in user
-    user_urls = URLMap.query.filter_by(user_id=current_user.id).order_by(URLMap.id.desc()).all()
-    return render_template('dashboard.html', shortened_url=shortened_url, urls=user_urls)
+    # Get history ONLY for the logged-in user, one page at a time
+    before = request.args.get('before', type=int)
+    user_urls, next_cursor = fetch_links_page(current_user.id, before)
+    short_ids = [url.short_id for url in user_urls]
+    clicks = click_totals(short_ids)
+    clicks_last_hour = click_totals(short_ids, since=int(time.time()) - 3600)
+    return render_template('dashboard.html', shortened_url=shortened_url, urls=user_urls,
+                           before=before, next_cursor=next_cursor,
+                           clicks=clicks, clicks_last_hour=clicks_last_hour)
+
+@app.route('/api/links')
+@login_required
+def api_links():
+    """JSON variant of the dashboard list for infinite scroll: pass next_cursor back as ?before=."""
+    before = request.args.get('before', type=int)
+    limit = request.args.get('limit', app.config['LINKS_PAGE_SIZE'], type=int)
+    limit = max(1, min(limit, app.config['LINKS_MAX_PAGE_SIZE']))
+    user_urls, next_cursor = fetch_links_page(current_user.id, before, limit)
+    return jsonify({'links': [serialize_link(url) for url in user_urls], 'next_cursor': next_cursor})
+
+@app.route('/api/links/<short_id>/clicks')
+@login_required
+def api_link_clicks(short_id):
+    """Per-minute click buckets for one of the user's links, for the last ?minutes= (default 60)."""
+    URLMap.query.filter_by(short_id=short_id, user_id=current_user.id).first_or_404()
+    minutes = max(1, min(request.args.get('minutes', 60, type=int), 7 * 24 * 60))
+    since = (int(time.time()) // BUCKET_SECONDS - minutes + 1) * BUCKET_SECONDS
+    buckets = db.session.execute(
+        db.select(ClickStat.bucket_start, ClickStat.clicks)
+        .where(ClickStat.short_id == short_id, ClickStat.bucket_start >= since)
+        .order_by(ClickStat.bucket_start)
+    ).all()
+    return jsonify({
+        'short_id': short_id,
+        'total': click_totals([short_id]).get(short_id, 0),
+        'buckets': [{'bucket_start': row.bucket_start, 'clicks': row.clicks} for row in buckets],
+    })
+
+@app.route('/api/bulk', methods=['POST'])
+@login_required
+def api_bulk():
+    """Bulk shortening: JSON array or CSV upload in, streamed NDJSON results out."""
+    try:
+        urls = read_bulk_urls()
+    except (ValueError, UnicodeDecodeError, csv.Error) as e:
+        return jsonify({'error': str(e)}), 400
+    results = bulk_shorten(urls, current_user.id, request.host_url)
+    return Response(stream_with_context(results), mimetype='application/x-ndjson')
 
 @app.route('/<short_id>')
 def redirect_to_url(short_id):
-    link = URLMap.query.filter_by(short_id=short_id).first_or_404()
-    return redirect(link.original_url)
+    original_url = lookup_original_url(short_id)
+    if original_url is None:
+        abort(404)
+    click_aggregator.record(short_id)
+    return redirect(original_url)
+
+@app.route('/stats')
+def stats():
+    return jsonify({
+        'redirect_cache': redirect_cache.stats(),
+        'url_verifier': url_verifier.stats(),
+        'short_id_allocator': short_id_allocator.stats(),
+        'click_aggregator': click_aggregator.stats(),
+        'user_cache': user_cache.stats(),
+        'password_hasher': password_hasher.stats(),
+        'short_id_filter': short_id_guard.stats(),
+    })
 
 if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file
@@ -0,0 +1,131 @@
+"""Benchmark: dashboard throughput while a burst of logins is in flight.
+
+For each hashing mode the app is served from a separate process (threaded WSGI server,
+fresh SQLite file). Dashboard clients measure requests/sec first on their own, then
+while --login-clients threads log in back to back (backing off 100 ms after a 503). With
+hashing inline, pbkdf2 competes with every other request for the CPU; with the process
+pool it is capped, runs at a lower priority and logins beyond PASSWORD_HASH_MAX_PENDING
+are turned away, so dashboard throughput should barely move.
+
+Usage:
+    python benchmark_auth.py --duration 10 --dashboard-clients 8 --login-clients 16
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+
+import requests
+
+PASSWORD = 'bench-password'
+
+
+def serve(db_path, hash_workers, port, ready, stop):
+    os.environ['DATABASE_URL'] = f'sqlite:///{db_path}'
+    os.environ['PASSWORD_HASH_WORKERS'] = str(hash_workers)
+    from werkzeug.serving import make_server
+    import app as shortener
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+
+    with shortener.app.app_context():
+        shortener.db.create_all()
+        shortener.db.session.add(shortener.IDSequence(name='url_map', next_value=1, scramble_key='bench'))
+        shortener.db.session.commit()
+    shortener.password_hasher.warm_up()
+    server = make_server('127.0.0.1', port, shortener.app, threaded=True)
+    threading.Thread(target=lambda: (stop.wait(), server.shutdown()), daemon=True).start()
+    ready.set()
+    server.serve_forever()
+    shortener.password_hasher.shutdown()
+
+
+def logged_in_session(base_url, username):
+    session = requests.Session()
+    while session.post(f'{base_url}/login', data={'username': username, 'password': PASSWORD},
+                       allow_redirects=False).status_code == 503:
+        time.sleep(0.1)
+    return session
+
+
+def dashboard_load(base_url, clients, duration):
+    counts = [0] * clients
+
+    def client(index):
+        session = logged_in_session(base_url, 'dashuser')
+        deadline = time.time() + duration
+        while time.time() < deadline:
+            if session.get(f'{base_url}/dashboard', allow_redirects=False).status_code == 200:
+                counts[index] += 1
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sum(counts) / duration
+
+
+def login_burst(base_url, clients, stop):
+    logins = [0, 0]   # successful, turned away with 503
+
+    def client():
+        session = requests.Session()
+        while not stop.is_set():
+            response = session.post(f'{base_url}/login', data={'username': 'dashuser', 'password': PASSWORD},
+                                    allow_redirects=False)
+            logins[response.status_code == 503] += 1
+            if response.status_code == 503:
+                time.sleep(0.1)   # back off like a browser user retrying
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    return threads, logins
+
+
+def run(hash_workers, args, port):
+    context = multiprocessing.get_context('spawn')
+    with tempfile.TemporaryDirectory() as tmp:
+        ready, stop_server = context.Event(), context.Event()
+        server = context.Process(
+            target=serve, args=(os.path.join(tmp, 'bench.db'), hash_workers, port, ready, stop_server)
+        )
+        server.start()
+        try:
+            ready.wait(60)
+            base_url = f'http://127.0.0.1:{port}'
+            requests.post(f'{base_url}/signup', data={'username': 'dashuser', 'password': PASSWORD})
+
+            dashboard_load(base_url, args.dashboard_clients, args.warmup)   # connections, caches, SQLite pages
+            idle_rps = dashboard_load(base_url, args.dashboard_clients, args.duration)
+
+            stop = threading.Event()
+            threads, logins = login_burst(base_url, args.login_clients, stop)
+            burst_rps = dashboard_load(base_url, args.dashboard_clients, args.duration)
+            stop.set()
+            for thread in threads:
+                thread.join()
+        finally:
+            stop_server.set()
+            server.join()
+    return idle_rps, burst_rps, logins[0] / args.duration, logins[1] / args.duration
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--warmup', type=float, default=3.0, help='seconds of unmeasured dashboard load first')
+    parser.add_argument('--dashboard-clients', type=int, default=8)
+    parser.add_argument('--login-clients', type=int, default=16)
+    parser.add_argument('--hash-workers', type=int, default=2, help='pool size for the offloaded run')
+    parser.add_argument('--port', type=int, default=5055)
+    args = parser.parse_args()
+
+    print(f"{'hashing':<16} {'dashboard rps':>14} {'during logins':>14} {'change':>8} {'logins/s':>9} {'503/s':>7}")
+    for label, workers in (('inline', 0), (f'pool ({args.hash_workers})', args.hash_workers)):
+        idle, burst, logins, rejected = run(workers, args, args.port)
+        change = (burst - idle) / idle * 100 if idle else 0.0
+        print(f'{label:<16} {idle:>14.1f} {burst:>14.1f} {change:>7.1f}% {logins:>9.1f} {rejected:>7.1f}')
@@ -0,0 +1,128 @@
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+from werkzeug.security import generate_password_hash, check_password_hash
+
+HASH_METHOD = 'pbkdf2:sha256'
+
+
+def _lower_priority(niceness):
+    # Hashing is bursty and CPU-bound; let request-serving processes win the CPU
+    if niceness and hasattr(os, 'nice'):
+        os.nice(niceness)
+
+
+class HasherBusy(Exception):
+    """Raised instead of queueing when max_pending hashes are already in flight, or
+    when a hash does not finish within the hasher's timeout."""
+
+
+def _mp_context():
+    # Start workers from a clean server process rather than forking the multithreaded app
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+
+
+class PasswordHasher:
+    """Runs password hashing and verification on a bounded pool of worker processes.
+
+    The request thread only waits on a future, so the worker keeps serving other
+    requests while a login or signup is being hashed. At most max_workers hashes run
+    at once, at a lower CPU priority. max_workers=0 hashes inline on the calling thread.
+
+    At most max_pending calls may be waiting or running in a process; further calls
+    raise HasherBusy straight away, so a login burst cannot pile up request threads
+    and database connections behind the pool. A call whose hash takes longer than
+    timeout seconds raises HasherBusy too. A pool broken by a dead worker process is
+    replaced and the call retried once.
+    """
+
+    def __init__(self, max_workers=2, niceness=10, timeout=30, max_pending=None):
+        self.max_workers = max_workers
+        self.niceness = niceness
+        self.timeout = timeout
+        self.max_pending = max_pending or 2 * max(max_workers, 1)
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+        self.rejected = 0
+        self.timeouts = 0
+        self.restarts = 0
+
+    def _get_executor(self):
+        # Created lazily and per process so forked app workers never share a pool
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ProcessPoolExecutor(
+                    self.max_workers, mp_context=_mp_context(),
+                    initializer=_lower_priority, initargs=(self.niceness,),
+                )
+                self._pid = os.getpid()
+            return self._executor
+
+    def _discard(self, executor):
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+                self.restarts += 1
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, fn, *args, **kwargs):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise HasherBusy(f"{self.max_pending} password hashes already in progress")
+        try:
+            if not self.max_workers:
+                return fn(*args, **kwargs)
+            for attempt in range(2):
+                executor = self._get_executor()
+                future = executor.submit(fn, *args, **kwargs)
+                try:
+                    return future.result(timeout=self.timeout)
+                except FutureTimeoutError:
+                    future.cancel()   # only helps if it never started
+                    with self._lock:
+                        self.timeouts += 1
+                    raise HasherBusy(f"password hash did not finish within {self.timeout} s") from None
+                except BrokenProcessPool:
+                    if attempt:
+                        raise
+                    logging.warning('Password hashing pool broke; starting a new one and retrying')
+                    self._discard(executor)
+        finally:
+            self._slots.release()
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, method=HASH_METHOD)
+
+    def verify(self, password_hash, password):
+        return self._run(check_password_hash, password_hash, password)
+
+    def shutdown(self):
+        """Stops this process's worker pool; the next hash starts a new one."""
+        with self._lock:
+            if self._executor is not None and self._pid == os.getpid():
+                self._executor.shutdown()
+            self._executor = None
+
+    def stats(self):
+        return {
+            'max_workers': self.max_workers,
+            'max_pending': self.max_pending,
+            'rejected': self.rejected,
+            'timeouts': self.timeouts,
+            'restarts': self.restarts,
+        }
+
+    def warm_up(self):
+        """Starts the worker processes ahead of the first login."""
+        if self.max_workers:
+            executor = self._get_executor()
+            for future in [executor.submit(int) for _ in range(self.max_workers)]:
+                future.result()
@@ -0,0 +1,333 @@
+"""Load test: mixed workloads against the shortener, with per-route latency percentiles.
+
+By default the app is served from a separate process (threaded WSGI server) on a fresh
+SQLite file seeded with --rows links. requests.head is stubbed in that process, so the
+background URL verifier never leaves the machine (--stub-latency-ms simulates a slow
+target host). Pass --target http://host:port to drive an already running deployment
+instead; nothing is seeded or stubbed then.
+
+Works for both shorteners: the Advance app is detected by its /login page, and its
+clients log in first and use /dashboard and /api/links instead of / and /api/history.
+
+Each workload runs --clients concurrent client threads for --duration seconds, after a
+--warmup that is not recorded. Results are printed as JSON (or written to --output):
+throughput and count/errors/p50/p95/p99/mean latency per route. With --baseline, a
+previous JSON report is compared route by route and the exit status is 1 if throughput
+dropped or p95 latency rose by more than --tolerance.
+
+Usage:
+    python loadtest.py --rows 1000000 --clients 32 --duration 20 --output report.json
+    python loadtest.py --baseline report.json --tolerance 0.25
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import random
+import statistics
+import string
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+USERNAME = 'benchuser'
+PASSWORD = 'bench-password'
+SEED_BATCH = 10000
+SAMPLE_IDS = 10000   # known short IDs handed to the clients
+ID_ALPHABET = string.digits + string.ascii_letters
+
+# Share of operations per workload
+WORKLOADS = {
+    'redirect-heavy': {'redirect': 85, 'redirect_unknown': 5, 'create': 5, 'browse': 3, 'browse_api': 2},
+    'create-heavy': {'create': 60, 'redirect': 30, 'browse': 5, 'browse_api': 5},
+    'dashboard': {'browse': 50, 'browse_api': 30, 'redirect': 15, 'create': 5},
+}
+
+
+class StubResponse:
+    status_code = 200
+
+
+def stub_network(latency):
+    """Replaces requests' HEAD with an always-reachable stub that sleeps `latency` seconds."""
+    def head(*args, **kwargs):
+        if latency:
+            time.sleep(latency)
+        return StubResponse()
+
+    requests.head = head
+    requests.Session.head = lambda self, *args, **kwargs: head()
+
+
+def seed(shortener, rows):
+    """Inserts `rows` links in SEED_BATCH transactions and returns a sample of their short IDs."""
+    db, URLMap = shortener.db, shortener.URLMap
+    db.create_all()
+    if db.session.get(shortener.IDSequence, 'url_map') is None:
+        db.session.add(shortener.IDSequence(name='url_map', next_value=1, scramble_key='loadtest'))
+    extra = {}
+    if hasattr(shortener, 'User'):
+        user = shortener.User(username=USERNAME, password=shortener.password_hasher.hash(PASSWORD))
+        db.session.add(user)
+        db.session.flush()
+        extra['user_id'] = user.id
+    db.session.commit()
+
+    sample = []
+    for start in range(0, rows, SEED_BATCH):
+        short_ids = shortener.short_id_allocator.allocate_many(min(SEED_BATCH, rows - start))
+        batch = []
+        for n, short_id in enumerate(short_ids, start):
+            url = f'http://seed.example/{n}'
+            batch.append({'original_url': url, 'short_id': short_id, 'status': 'verified',
+                          'url_hash': shortener.hash_url(url), **extra})
+        db.session.execute(db.insert(URLMap), batch)
+        db.session.commit()
+        sample.extend(random.sample(short_ids, min(len(short_ids), SAMPLE_IDS * SEED_BATCH // rows + 1)))
+    return sample[:SAMPLE_IDS]
+
+
+def serve(db_path, rows, stub_latency, port, ready, stop):
+    os.environ['DATABASE_URL'] = f'sqlite:///{db_path}'
+    stub_network(stub_latency)
+    from werkzeug.serving import make_server
+    import app as shortener
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+
+    with shortener.app.app_context():
+        started = time.perf_counter()
+        sample = seed(shortener, rows)
+        seed_seconds = time.perf_counter() - started
+        shortener.short_id_guard.build()   # include the seeded rows
+    server = make_server('127.0.0.1', port, shortener.app, threaded=True)
+    threading.Thread(target=lambda: (stop.wait(), server.shutdown()), daemon=True).start()
+    ready.send({'short_ids': sample, 'seed_seconds': seed_seconds})
+    server.serve_forever()
+    if hasattr(shortener, 'password_hasher'):
+        # A multiprocessing child exits without running the executor's atexit hook
+        shortener.password_hasher.shutdown()
+
+
+class Client:
+    """One simulated user: its own HTTP session, paging state and random stream."""
+
+    def __init__(self, base_url, routes, short_ids, index):
+        self.base_url = base_url
+        self.routes = routes
+        self.short_ids = short_ids
+        self.index = index
+        self.rng = random.Random(index)
+        self.session = requests.Session()
+        self.cursor = None
+        self.created = 0
+        if routes['login']:
+            self.session.post(f'{base_url}/login', data={'username': USERNAME, 'password': PASSWORD})
+
+    def run_op(self, op):
+        """Runs one operation and returns (route label, ok)."""
+        get = lambda path, **kw: self.session.get(self.base_url + path, allow_redirects=False, **kw)
+        if op == 'redirect':
+            return 'GET /<short_id>', get('/' + self.rng.choice(self.short_ids)).status_code == 302
+        if op == 'redirect_unknown':
+            short_id = ''.join(self.rng.choices(ID_ALPHABET, k=7))
+            return 'GET /<short_id> (unknown)', get('/' + short_id).status_code == 404
+        if op == 'create':
+            self.created += 1
+            url = f'http://load.example/{self.index}/{self.created}/{self.rng.random()}'
+            response = self.session.post(self.base_url + self.routes['create'], data={'original_url': url},
+                                         allow_redirects=False)
+            return 'POST ' + self.routes['create'], response.status_code == 200
+        if op == 'browse':
+            return 'GET ' + self.routes['browse'], get(self.routes['browse']).status_code == 200
+        # browse_api: follow next_cursor like infinite scroll, starting over at the end
+        response = get(self.routes['api'], params={'before': self.cursor} if self.cursor else {})
+        if response.status_code != 200:
+            return 'GET ' + self.routes['api'], False
+        self.cursor = response.json()['next_cursor']
+        return 'GET ' + self.routes['api'], True
+
+
+def detect_routes(base_url):
+    advance = requests.get(f'{base_url}/login').status_code == 200
+    if advance:
+        return {'login': True, 'create': '/dashboard', 'browse': '/dashboard', 'api': '/api/links'}
+    return {'login': False, 'create': '/', 'browse': '/history', 'api': '/api/history'}
+
+
+def discover_short_ids(base_url, routes, pages=20):
+    """Collects existing short IDs from the JSON listing (used with --target)."""
+    session = requests.Session()
+    if routes['login']:
+        session.post(f'{base_url}/signup', data={'username': USERNAME, 'password': PASSWORD})
+        session.post(f'{base_url}/login', data={'username': USERNAME, 'password': PASSWORD})
+    short_ids, before = [], None
+    for _ in range(pages):
+        page = session.get(base_url + routes['api'], params={'before': before} if before else {}).json()
+        short_ids.extend(link['short_id'] for link in page['links'])
+        before = page['next_cursor']
+        if not before:
+            break
+    if not short_ids:
+        # Empty deployment: create a few links to redirect to
+        for n in range(20):
+            session.post(base_url + routes['create'], data={'original_url': f'http://load.example/seed/{n}'})
+        return discover_short_ids(base_url, routes, pages=1)
+    return short_ids
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    return statistics.quantiles(samples, n=100, method='inclusive')[pct - 1] if len(samples) > 1 else samples[0]
+
+
+def run_workload(base_url, routes, short_ids, mix, clients, warmup, duration):
+    ops, weights = list(mix), list(mix.values())
+    samples = {}   # route -> list of seconds, per client to avoid locking
+    errors = {}
+    start_at = time.time() + warmup
+    end_at = start_at + duration
+
+    def client_loop(index):
+        client = Client(base_url, routes, short_ids, index)
+        local_samples, local_errors = {}, {}
+        while True:
+            now = time.time()
+            if now >= end_at:
+                break
+            op = client.rng.choices(ops, weights)[0]
+            started = time.perf_counter()
+            try:
+                route, ok = client.run_op(op)
+            except requests.RequestException:
+                route, ok = op, False
+            elapsed = time.perf_counter() - started
+            if now < start_at:
+                continue
+            local_samples.setdefault(route, []).append(elapsed)
+            if not ok:
+                local_errors[route] = local_errors.get(route, 0) + 1
+        samples[index], errors[index] = local_samples, local_errors
+
+    threads = [threading.Thread(target=client_loop, args=(i,)) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    by_route = {}
+    for index in samples:
+        for route, values in samples[index].items():
+            by_route.setdefault(route, []).extend(values)
+    report = {'throughput_rps': round(sum(len(v) for v in by_route.values()) / duration, 1), 'routes': {}}
+    for route, values in sorted(by_route.items()):
+        report['routes'][route] = {
+            'count': len(values),
+            'errors': sum(e.get(route, 0) for e in errors.values()),
+            'rps': round(len(values) / duration, 1),
+            'p50_ms': round(percentile(values, 50) * 1000, 2),
+            'p95_ms': round(percentile(values, 95) * 1000, 2),
+            'p99_ms': round(percentile(values, 99) * 1000, 2),
+            'mean_ms': round(statistics.fmean(values) * 1000, 2),
+        }
+    return report
+
+
+def compare(report, baseline, tolerance):
+    """Returns human-readable regressions of `report` against `baseline`."""
+    regressions = []
+    for name, result in report['workloads'].items():
+        before = baseline.get('workloads', {}).get(name)
+        if not before:
+            continue
+        if result['throughput_rps'] < before['throughput_rps'] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {before['throughput_rps']} -> {result['throughput_rps']} rps")
+        for route, stats in result['routes'].items():
+            old = before['routes'].get(route)
+            if old and stats['p95_ms'] > old['p95_ms'] * (1 + tolerance):
+                regressions.append(f"{name} {route}: p95 {old['p95_ms']} -> {stats['p95_ms']} ms")
+    return regressions
+
+
+def main(args):
+    workloads = {name: WORKLOADS[name] for name in args.workloads}
+    report = {'config': {key: value for key, value in vars(args).items() if key not in ('output', 'baseline')},
+              'workloads': {}}
+    server = stop_server = None
+    try:
+        if args.target:
+            base_url = args.target.rstrip('/')
+            routes = detect_routes(base_url)
+            short_ids = discover_short_ids(base_url, routes)
+        else:
+            context = multiprocessing.get_context('spawn')
+            tmp = tempfile.TemporaryDirectory()
+            receiver, sender = context.Pipe(duplex=False)
+            stop_server = context.Event()
+            server = context.Process(target=serve, args=(
+                os.path.join(tmp.name, 'loadtest.db'), args.rows, args.stub_latency_ms / 1000,
+                args.port, sender, stop_server,
+            ))
+            server.start()
+            if not receiver.poll(args.seed_timeout):
+                raise SystemExit('Server did not finish seeding in time')
+            setup = receiver.recv()
+            report['seed_seconds'] = round(setup['seed_seconds'], 2)
+            base_url = f'http://127.0.0.1:{args.port}'
+            routes = detect_routes(base_url)
+            short_ids = setup['short_ids']
+
+        report['app'] = 'advance' if routes['login'] else 'basic'
+        for name, mix in workloads.items():
+            print(f'running {name} ({args.clients} clients, {args.duration:.0f}s)...', file=sys.stderr)
+            report['workloads'][name] = run_workload(
+                base_url, routes, short_ids, mix, args.clients, args.warmup, args.duration
+            )
+    finally:
+        if server is not None:
+            stop_server.set()
+            server.join()
+            tmp.cleanup()
+
+    for name, result in report['workloads'].items():
+        print(f"\n{name}: {result['throughput_rps']} req/s", file=sys.stderr)
+        print(f"  {'route':<28} {'count':>8} {'errors':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}", file=sys.stderr)
+        for route, stats in result['routes'].items():
+            print(f"  {route:<28} {stats['count']:>8} {stats['errors']:>7} {stats['p50_ms']:>8.2f} "
+                  f"{stats['p95_ms']:>8.2f} {stats['p99_ms']:>8.2f}", file=sys.stderr)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f'REGRESSION {regression}', file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100000, help='links to seed before the run')
+    parser.add_argument('--clients', type=int, default=16, help='concurrent client threads')
+    parser.add_argument('--duration', type=float, default=10.0, help='recorded seconds per workload')
+    parser.add_argument('--warmup', type=float, default=2.0, help='unrecorded seconds per workload')
+    parser.add_argument('--workloads', nargs='+', choices=list(WORKLOADS), default=list(WORKLOADS))
+    parser.add_argument('--stub-latency-ms', type=float, default=0.0, help='delay of the stubbed HEAD request')
+    parser.add_argument('--target', help='base URL of a running deployment (skips seeding and stubbing)')
+    parser.add_argument('--port', type=int, default=5056)
+    parser.add_argument('--seed-timeout', type=float, default=1800.0)
+    parser.add_argument('--output', help='write the JSON report here instead of stdout')
+    parser.add_argument('--baseline', help='previous JSON report to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed relative regression')
+    sys.exit(main(parser.parse_args()))
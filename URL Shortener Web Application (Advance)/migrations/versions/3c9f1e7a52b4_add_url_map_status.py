@@ -0,0 +1,27 @@
+"""Add reachability status to url_map
+
+Revision ID: 3c9f1e7a52b4
+Revises: aff9dc460863
+Create Date: 2026-10-17 10:12:41.308215
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3c9f1e7a52b4'
+down_revision = 'aff9dc460863'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Existing links were checked synchronously before being saved, so they start as verified
+    with op.batch_alter_table('url_map', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('status', sa.String(length=12), nullable=False, server_default='verified'))
+
+
+def downgrade():
+    with op.batch_alter_table('url_map', schema=None) as batch_op:
+        batch_op.drop_column('status')
@@ -0,0 +1,70 @@
+"""Add url_hash to url_map with a (user_id, url_hash) index
+
+Revision ID: 5e2a9d8c41f7
+Revises: 8d41b07c6e2a
+Create Date: 2026-10-17 12:26:05.774130
+
+"""
+import hashlib
+from urllib.parse import urlsplit, urlunsplit
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e2a9d8c41f7'
+down_revision = '8d41b07c6e2a'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 1000
+
+url_map = sa.table('url_map',
+    sa.column('id', sa.Integer),
+    sa.column('original_url', sa.String),
+    sa.column('url_hash', sa.String),
+)
+
+
+# Frozen copy of normalize_url()/hash_url() from app.py at the time of this revision
+def _hash_url(url):
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    netloc = parts.netloc.lower()
+    if scheme == 'http' and netloc.endswith(':80'):
+        netloc = netloc[:-3]
+    elif scheme == 'https' and netloc.endswith(':443'):
+        netloc = netloc[:-4]
+    normalized = urlunsplit((scheme, netloc, parts.path or '/', parts.query, parts.fragment))
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()[:16]
+
+
+def upgrade():
+    with op.batch_alter_table('url_map', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('url_hash', sa.String(length=16), nullable=True))
+        batch_op.create_index('ix_url_map_user_id_url_hash', ['user_id', 'url_hash'], unique=False)
+
+    # Backfill existing rows in primary-key order, one batch at a time
+    connection = op.get_bind()
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            sa.select(url_map.c.id, url_map.c.original_url)
+            .where(url_map.c.id > last_id)
+            .order_by(url_map.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        connection.execute(
+            url_map.update().where(url_map.c.id == sa.bindparam('row_id')),
+            [{'row_id': row.id, 'url_hash': _hash_url(row.original_url)} for row in rows],
+        )
+        last_id = rows[-1].id
+
+
+def downgrade():
+    with op.batch_alter_table('url_map', schema=None) as batch_op:
+        batch_op.drop_index('ix_url_map_user_id_url_hash')
+        batch_op.drop_column('url_hash')
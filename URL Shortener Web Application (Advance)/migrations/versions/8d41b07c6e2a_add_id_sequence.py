@@ -0,0 +1,35 @@
+"""Add id_sequence table for the short ID allocator
+
+Revision ID: 8d41b07c6e2a
+Revises: 3c9f1e7a52b4
+Create Date: 2026-10-17 11:03:27.519844
+
+"""
+import secrets
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8d41b07c6e2a'
+down_revision = '3c9f1e7a52b4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    id_sequence = op.create_table('id_sequence',
+    sa.Column('name', sa.String(length=32), nullable=False),
+    sa.Column('next_value', sa.BigInteger(), nullable=False),
+    sa.Column('scramble_key', sa.String(length=64), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    # The scramble key must never change once IDs have been issued from this sequence
+    op.bulk_insert(id_sequence, [
+        {'name': 'url_map', 'next_value': 1, 'scramble_key': secrets.token_hex(16)},
+    ])
+
+
+def downgrade():
+    op.drop_table('id_sequence')
@@ -0,0 +1,141 @@
+"""Concurrency stress test for the storage profile.
+
+Starts N worker processes that import the app against a fresh SQLite file and hammer
+url_map with a mix of point reads (by short_id) and single-row inserts, the same
+statements the redirect and shorten routes issue. It runs once per DB_PROFILE and
+prints throughput, latency and "database is locked" errors side by side.
+
+Usage:
+    python stress_test.py --workers 8 --duration 10 --write-ratio 0.2
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import statistics
+import tempfile
+import time
+
+SEED_ROWS = 10000
+
+
+def _load_app(db_path, profile):
+    os.environ['DATABASE_URL'] = f'sqlite:///{db_path}'
+    os.environ['DB_PROFILE'] = profile
+    import app as shortener
+    return shortener
+
+
+def _row(shortener, short_id, n):
+    row = {
+        'original_url': f'http://example.com/stress/{short_id}/{n}',
+        'short_id': short_id,
+        'status': 'verified',
+    }
+    row['url_hash'] = shortener.hash_url(row['original_url'])
+    if hasattr(shortener.URLMap, 'user_id'):
+        row['user_id'] = 1
+    return row
+
+
+def setup(db_path, profile):
+    shortener = _load_app(db_path, profile)
+    with shortener.app.app_context():
+        shortener.db.create_all()
+        if shortener.db.session.get(shortener.IDSequence, 'url_map') is None:
+            shortener.db.session.add(shortener.IDSequence(name='url_map', next_value=1, scramble_key='stress'))
+            shortener.db.session.commit()
+        short_ids = shortener.short_id_allocator.allocate_many(SEED_ROWS)
+        shortener.db.session.execute(
+            shortener.db.insert(shortener.URLMap),
+            [_row(shortener, short_id, n) for n, short_id in enumerate(short_ids)],
+        )
+        shortener.db.session.commit()
+    return short_ids
+
+
+def worker(db_path, profile, duration, write_ratio, short_ids, start_at, results):
+    shortener = _load_app(db_path, profile)
+    from sqlalchemy.exc import OperationalError
+
+    table = shortener.URLMap.__table__
+    reads, writes, locked = [], [], 0
+    rng = random.Random(os.getpid())
+    with shortener.app.app_context():
+        engine = shortener.db.engine
+        time.sleep(max(0.0, start_at - time.time()))
+        deadline = time.time() + duration
+        n = 0
+        while time.time() < deadline:
+            n += 1
+            started = time.perf_counter()
+            try:
+                if rng.random() < write_ratio:
+                    row = _row(shortener, shortener.generate_short_id(), n)
+                    with engine.begin() as connection:
+                        connection.execute(table.insert(), row)
+                    writes.append(time.perf_counter() - started)
+                else:
+                    with engine.connect() as connection:
+                        connection.execute(
+                            table.select().where(table.c.short_id == rng.choice(short_ids))
+                        ).first()
+                    reads.append(time.perf_counter() - started)
+            except OperationalError as e:
+                if 'locked' not in str(e):
+                    raise
+                locked += 1
+    results.put((reads, writes, locked))
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    return statistics.quantiles(samples, n=100, method='inclusive')[pct - 1] if len(samples) > 1 else samples[0]
+
+
+def run(profile, workers, duration, write_ratio):
+    context = multiprocessing.get_context('spawn')   # every worker imports the app fresh
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'stress.db')
+        with context.Pool(1) as pool:
+            short_ids = pool.apply(setup, (db_path, profile))
+
+        results = context.Queue()
+        start_at = time.time() + 3   # let every worker finish importing before the clock starts
+        processes = [
+            context.Process(target=worker, args=(db_path, profile, duration, write_ratio, short_ids, start_at, results))
+            for _ in range(workers)
+        ]
+        for process in processes:
+            process.start()
+        reports = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+
+    reads = [sample for report in reports for sample in report[0]]
+    writes = [sample for report in reports for sample in report[1]]
+    return {
+        'profile': profile,
+        'reads_per_sec': len(reads) / duration,
+        'writes_per_sec': len(writes) / duration,
+        'read_p99_ms': percentile(reads, 99) * 1000,
+        'write_p99_ms': percentile(writes, 99) * 1000,
+        'locked_errors': sum(report[2] for report in reports),
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=10.0, help='seconds per profile')
+    parser.add_argument('--write-ratio', type=float, default=0.2)
+    parser.add_argument('--profiles', nargs='+', default=['default', 'multiworker'])
+    args = parser.parse_args()
+
+    print(f'{args.workers} workers, {args.duration:.0f}s per profile, {args.write_ratio:.0%} writes')
+    print(f"{'profile':<12} {'reads/s':>10} {'writes/s':>10} {'read p99 ms':>12} {'write p99 ms':>13} {'locked':>8}")
+    for profile in args.profiles:
+        r = run(profile, args.workers, args.duration, args.write_ratio)
+        print(f"{r['profile']:<12} {r['reads_per_sec']:>10.0f} {r['writes_per_sec']:>10.0f} "
+              f"{r['read_p99_ms']:>12.2f} {r['write_p99_ms']:>13.2f} {r['locked_errors']:>8}")
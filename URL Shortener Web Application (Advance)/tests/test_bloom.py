@@ -0,0 +1,137 @@
+import random
+import sqlite3
+
+import pytest
+
+from bloom import BloomFilter, ShortIDGuard
+from short_ids import BASE62_ALPHABET, FeistelScrambler, encode_base62
+
+SCRAMBLE_KEY = "test-key"
+
+
+@pytest.fixture
+def db(tmp_path):
+    connection = sqlite3.connect(tmp_path / "links.db", check_same_thread=False)
+    connection.execute("CREATE TABLE url_map (id INTEGER PRIMARY KEY, short_id TEXT UNIQUE)")
+    connection.execute("CREATE TABLE id_sequence (next_value INTEGER, scramble_key TEXT)")
+    connection.execute("INSERT INTO id_sequence VALUES (1, ?)", (SCRAMBLE_KEY,))
+    connection.commit()
+    yield connection
+    connection.close()
+
+
+def make_guard(db, refresh_interval=60.0, load_calls=None):
+    """A guard over `db` the way each worker process builds one."""
+    def load_rows(after_id):
+        if load_calls is not None:
+            load_calls.append(after_id)
+        return db.execute(
+            "SELECT id, short_id FROM url_map WHERE id > ? ORDER BY id", (after_id,)
+        ).fetchall()
+
+    guard = ShortIDGuard(
+        load_rows,
+        lambda: db.execute("SELECT COUNT(*) FROM url_map").fetchone()[0],
+        lambda: db.execute("SELECT next_value, scramble_key FROM id_sequence").fetchone(),
+        capacity=1000,
+        refresh_interval=refresh_interval,
+        sequence_headroom=1000,
+    )
+    guard.build()
+    return guard
+
+
+def create_link(db, guard):
+    """What a worker does on shorten: take a sequence value, insert the row, add it to its own filter."""
+    number = db.execute("SELECT next_value FROM id_sequence").fetchone()[0]
+    db.execute("UPDATE id_sequence SET next_value = next_value + 1")
+    short_id = encode_base62(FeistelScrambler(SCRAMBLE_KEY).scramble(number))
+    db.execute("INSERT INTO url_map (short_id) VALUES (?)", (short_id,))
+    db.commit()
+    guard.add(short_id)
+    return short_id
+
+
+def test_link_from_another_worker_is_never_rejected(db):
+    creator, sibling = make_guard(db), make_guard(db)
+
+    short_id = create_link(db, creator)
+
+    # The sibling scanned the table before the insert and is inside its refresh interval
+    assert sibling.might_exist(short_id)
+    assert sibling.rejected == 0
+    assert sibling.stale_misses == 1
+
+
+def test_link_from_another_worker_is_found_after_refresh(db):
+    creator, sibling = make_guard(db, refresh_interval=0.0), make_guard(db, refresh_interval=0.0)
+
+    short_id = create_link(db, creator)
+
+    assert sibling.might_exist(short_id)
+    assert short_id in sibling._filter
+    assert sibling.stale_misses == 0
+
+
+def test_unknown_ids_are_rejected_without_loading_rows(db):
+    load_calls = []
+    guard = make_guard(db, load_calls=load_calls)
+    for _ in range(5):
+        create_link(db, guard)
+    guard.refresh()
+    load_calls.clear()
+
+    rng = random.Random(1)
+    unknown = ["".join(rng.choice(BASE62_ALPHABET) for _ in range(7)) for _ in range(1000)]
+    unknown += ["abc", "not-an-id", "ab_cdef"]
+
+    assert not any(guard.might_exist(short_id) for short_id in unknown)
+    assert guard.rejected == len(unknown)
+    assert guard.stale_misses == 0
+    assert load_calls == []
+
+
+def test_misses_go_to_the_database_while_the_filter_is_stale(db):
+    guard = make_guard(db, refresh_interval=0.0)
+    unknown = encode_base62(FeistelScrambler(SCRAMBLE_KEY).scramble(10 ** 9))
+    assert not guard.might_exist(unknown)
+
+    # Refresh already running in another thread: sequence IDs fall through to the database
+    guard._refresh_lock.acquire()
+    try:
+        assert guard.might_exist(unknown)
+        assert not guard.might_exist("not-an-id")
+    finally:
+        guard._refresh_lock.release()
+    assert guard.stale_misses == 1
+
+
+def test_headroom_grows_with_the_lease_rate(db):
+    guard = make_guard(db, refresh_interval=0.0)
+    guard.refresh_interval = 1.0
+    guard._sequence = (guard._sequence[0], guard._sequence[1] - 1.0)
+    db.execute("UPDATE id_sequence SET next_value = next_value + 5000")
+    db.commit()
+
+    guard.refresh()
+
+    assert guard.sequence_headroom >= 10000
+
+
+def test_refresh_does_not_count_own_links_twice(db):
+    guard, sibling = make_guard(db, refresh_interval=0.0), make_guard(db)
+    for _ in range(10):
+        create_link(db, guard)
+    create_link(db, sibling)
+
+    guard.refresh()
+
+    assert guard._filter.count == 11
+
+
+def test_bloom_filter_add_reports_new_keys():
+    bloom = BloomFilter(100, 0.01)
+    assert bloom.add("abc")
+    assert not bloom.add("abc")
+    assert bloom.count == 1
+    assert "abc" in bloom
@@ -0,0 +1,37 @@
+import os
+import tempfile
+
+import pytest
+
+# The app reads its database from the environment at import time
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "links.db")
+
+import app as shortener  # noqa: E402
+from verifier import STATUS_UNVERIFIED, URLVerifier  # noqa: E402
+
+
+@pytest.fixture
+def link():
+    with shortener.app.app_context():
+        shortener.db.create_all()
+        user = shortener.User(username="tester", password="x")
+        shortener.db.session.add(user)
+        shortener.db.session.commit()
+        link = shortener.URLMap(original_url="http://example.com", short_id="abc1234", user_id=user.id)
+        shortener.db.session.add(link)
+        shortener.db.session.commit()
+        yield link
+        shortener.db.session.rollback()
+        shortener.db.drop_all()
+
+
+def test_link_is_marked_unverified_when_the_verify_queue_is_full(link, monkeypatch):
+    verifier = URLVerifier(max_queued=1)
+    assert verifier._slots.acquire(blocking=False)   # the only slot is taken
+    monkeypatch.setattr(shortener, "url_verifier", verifier)
+
+    shortener.verify_in_background(link)
+
+    shortener.db.session.expire_all()
+    assert shortener.db.session.get(shortener.URLMap, link.id).status == STATUS_UNVERIFIED
+    assert verifier.dropped == 1
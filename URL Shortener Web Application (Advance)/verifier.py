@@ -0,0 +1,138 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from cache import LRUCache
+
+STATUS_PENDING = 'pending'
+STATUS_VERIFIED = 'verified'
+STATUS_UNREACHABLE = 'unreachable'
+STATUS_UNVERIFIED = 'unverified'   # the check could not be run
+
+
+class URLVerifier:
+    """Checks URL reachability on a bounded background thread pool.
+
+    Results are cached per URL, and hosts that refuse connections or time out are
+    cached as well so other URLs on the same host fail fast. Every pool thread keeps
+    its own pooled requests.Session, so repeated checks reuse keep-alive connections.
+    At most max_queued checks wait or run at once; submit() drops checks beyond that
+    and returns None, so the caller can mark the link unverified. check_many() runs on a separate pool of
+    bulk_workers threads, so bulk jobs never queue ahead of single-link checks.
+    """
+
+    def __init__(self, max_workers=8, timeout=3, result_ttl=600, host_ttl=60, cache_size=10000, max_queued=1000,
+                 bulk_workers=4):
+        self.max_workers = max_workers
+        self.bulk_workers = bulk_workers
+        self.max_queued = max_queued
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max_queued)
+        self.dropped = 0
+        self._results = LRUCache(max_size=cache_size, ttl=result_ttl)
+        self._dead_hosts = LRUCache(max_size=cache_size, ttl=host_ttl)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._executor = None
+        self._bulk_executor = None
+        self._pid = None
+
+    def _get_executor(self, bulk=False):
+        # Created lazily and per process: pool threads do not survive a fork
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix='url-verify')
+                self._bulk_executor = ThreadPoolExecutor(self.bulk_workers, thread_name_prefix='url-verify-bulk')
+                self._pid = os.getpid()
+            return self._bulk_executor if bulk else self._executor
+
+    def _session(self):
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=32, pool_maxsize=4)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            self._local.session = session
+        return session
+
+    def check(self, url):
+        """Blocking reachability check that goes through the result caches."""
+        cached = self._results.get(url)
+        if cached is not None:
+            return cached
+
+        host = urlsplit(url).netloc.lower()
+        if self._dead_hosts.get(host) is not None:
+            return False
+
+        try:
+            response = self._session().head(url, timeout=self.timeout, allow_redirects=True)
+            reachable = response.status_code < 400
+        except (requests.ConnectionError, requests.Timeout):
+            self._dead_hosts.put(host, True)
+            reachable = False
+        except requests.RequestException:
+            reachable = False
+
+        self._results.put(url, reachable)
+        return reachable
+
+    def submit(self, url, callback):
+        """Schedules a check and calls callback(url, reachable) from a pool thread.
+
+        Returns None without scheduling anything when max_queued checks are already
+        waiting or running.
+        """
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.dropped += 1
+            return None
+
+        def run():
+            try:
+                reachable = self.check(url)
+            except Exception:
+                reachable = False
+            finally:
+                self._slots.release()
+            callback(url, reachable)
+
+        try:
+            return self._get_executor().submit(run)
+        except RuntimeError:   # interpreter shutting down
+            self._slots.release()
+            raise
+
+    def check_many(self, urls, max_in_flight=32):
+        """Checks many URLs concurrently and yields (url, reachable) as checks finish.
+
+        Checks run on the bulk pool, which single-link checks do not share; at most
+        max_in_flight are queued at once, so a large batch holds little memory.
+        """
+        executor = self._get_executor(bulk=True)
+        pending = set()
+        for url in urls:
+            if len(pending) >= max_in_flight:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+            pending.add(executor.submit(lambda url=url: (url, self.check(url))))
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+
+    def stats(self):
+        return {
+            'max_workers': self.max_workers,
+            'bulk_workers': self.bulk_workers,
+            'max_queued': self.max_queued,
+            'dropped': self.dropped,
+            'results': self._results.stats(),
+            'dead_hosts': self._dead_hosts.stats(),
+        }
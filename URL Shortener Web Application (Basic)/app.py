@@ -1,41 +1,253 @@
-from flask import Flask, render_template, request, redirect, flash
+from flask import Flask, render_template, request, redirect, abort, jsonify
 from flask_sqlalchemy import SQLAlchemy
-import string
-import random
-import requests # Used to verify if the URL is real
+from sqlalchemy.exc import IntegrityError
+import hashlib
+import logging
+import secrets
+from urllib.parse import urlsplit, urlunsplit
+from cache import LRUCache, MISSING
+from verifier import URLVerifier, STATUS_PENDING, STATUS_VERIFIED, STATUS_UNREACHABLE, STATUS_UNVERIFIED # Used to verify if the URL is real
+from short_ids import ShortIDAllocator
+from bloom import ShortIDGuard
+from storage import configure_storage, install_sqlite_pragmas
 
 app = Flask(__name__)
-app.secret_key = 'super_secret_key' # Needed for flash messages
 
 # 3. Backend - Database ORM Configuration (SQLite + SQLAlchemy)
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///database.db'
+# DB URI, pool size and SQLite tuning come from the environment (see storage.py)
+configure_storage(app, default_uri='sqlite:///database.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
+# Redirect cache: short IDs never change once written, so lookups can be served from memory
+app.config['REDIRECT_CACHE_SIZE'] = 100000
+app.config['REDIRECT_CACHE_TTL'] = None          # seconds, None = keep until evicted
+app.config['REDIRECT_CACHE_NEGATIVE_TTL'] = 30   # seconds to remember unknown short IDs
+
+# Reachability checks run in the background so a slow target host never blocks a request
+app.config['VERIFY_WORKERS'] = 8
+app.config['VERIFY_TIMEOUT'] = 3          # seconds per HEAD request
+app.config['VERIFY_RESULT_TTL'] = 600     # seconds to reuse a URL's check result
+app.config['VERIFY_MAX_QUEUED'] = 1000    # checks waiting or running; links beyond are marked unverified
+
+# Short IDs come from a shared sequence; each process leases a block of this many IDs at a time
+app.config['SHORT_ID_BLOCK_SIZE'] = 1000
+
+# Bloom filter over all short IDs so requests for unknown IDs get a 404 without a query
+app.config['SHORT_ID_FILTER_CAPACITY'] = 1000000     # grown automatically once exceeded
+app.config['SHORT_ID_FILTER_ERROR_RATE'] = 0.001     # false-positive rate (each costs one query)
+app.config['SHORT_ID_FILTER_REFRESH_INTERVAL'] = 1.0 # seconds between scans for other workers' links
+app.config['SHORT_ID_FILTER_SEQUENCE_HEADROOM'] = 1000000  # IDs all workers may lease between scans
+
+# History is paginated by URLMap.id (keyset pagination), newest first
+app.config['HISTORY_PAGE_SIZE'] = 50
+app.config['HISTORY_MAX_PAGE_SIZE'] = 200   # upper bound for ?limit= on the JSON endpoint
+
 db = SQLAlchemy(app)
+with app.app_context():
+    install_sqlite_pragmas(app, db.engine)
+
+redirect_cache = LRUCache(
+    max_size=app.config['REDIRECT_CACHE_SIZE'],
+    ttl=app.config['REDIRECT_CACHE_TTL'],
+    negative_ttl=app.config['REDIRECT_CACHE_NEGATIVE_TTL'],
+)
+
+url_verifier = URLVerifier(
+    max_workers=app.config['VERIFY_WORKERS'],
+    timeout=app.config['VERIFY_TIMEOUT'],
+    result_ttl=app.config['VERIFY_RESULT_TTL'],
+    max_queued=app.config['VERIFY_MAX_QUEUED'],
+)
+
+# URL normalization used for deduplication (also needed by the schema upgrade below)
+def normalize_url(url):
+    """Canonical form used for deduplication: lowercase scheme and host, no default port."""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    netloc = parts.netloc.lower()
+    if scheme == 'http' and netloc.endswith(':80'):
+        netloc = netloc[:-3]
+    elif scheme == 'https' and netloc.endswith(':443'):
+        netloc = netloc[:-4]
+    return urlunsplit((scheme, netloc, parts.path or '/', parts.query, parts.fragment))
+
+def hash_url(url):
+    """First 64 bits of the SHA-256 of the normalized URL, as 16 hex characters."""
+    return hashlib.sha256(normalize_url(url).encode('utf-8')).hexdigest()[:16]
 
 # ORM Model mapping to the Database table
 class URLMap(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     original_url = db.Column(db.String(500), nullable=False)
     short_id = db.Column(db.String(10), unique=True, nullable=False)
+    # pending -> verified / unreachable, filled in by the background URL verifier
+    status = db.Column(db.String(12), nullable=False, default=STATUS_PENDING)
+    # Fixed-width hash of the normalized URL so the duplicate check is an index probe
+    url_hash = db.Column(
+        db.String(16),
+        index=True,
+        default=lambda context: hash_url(context.get_current_parameters()['original_url']),
+    )
+
+# Sequence backing the short ID allocator; the scramble key is generated once per database
+class IDSequence(db.Model):
+    __tablename__ = 'id_sequence'
+    name = db.Column(db.String(32), primary_key=True)
+    next_value = db.Column(db.BigInteger, nullable=False)
+    scramble_key = db.Column(db.String(64), nullable=False)
+
+def upgrade_schema():
+    """db.create_all() never alters existing tables, so add later columns and seed the ID sequence."""
+    columns = {column['name'] for column in db.inspect(db.engine).get_columns('url_map')}
+    if 'status' not in columns:
+        # Links created before background verification were checked synchronously
+        db.session.execute(db.text(
+            f"ALTER TABLE url_map ADD COLUMN status VARCHAR(12) NOT NULL DEFAULT '{STATUS_VERIFIED}'"
+        ))
+        db.session.commit()
+
+    if 'url_hash' not in columns:
+        db.session.execute(db.text('ALTER TABLE url_map ADD COLUMN url_hash VARCHAR(16)'))
+        db.session.execute(db.text('CREATE INDEX IF NOT EXISTS ix_url_map_url_hash ON url_map (url_hash)'))
+        db.session.commit()
+    backfill_url_hashes()
+
+    if db.session.get(IDSequence, 'url_map') is None:
+        try:
+            db.session.add(IDSequence(name='url_map', next_value=1, scramble_key=secrets.token_hex(16)))
+            db.session.commit()
+        except IntegrityError:
+            # Another worker created it at the same time
+            db.session.rollback()
+
+def backfill_url_hashes(batch_size=1000):
+    """Fills url_hash for rows written before the column existed, one small transaction per batch."""
+    while True:
+        rows = db.session.execute(
+            db.select(URLMap.id, URLMap.original_url).where(URLMap.url_hash.is_(None)).limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        db.session.execute(
+            db.update(URLMap),
+            [{'id': row.id, 'url_hash': hash_url(row.original_url)} for row in rows],
+        )
+        db.session.commit()
+
+def iter_short_ids(after_id, batch_size=10000):
+    """Streams (id, short_id) for rows with id > after_id in id order, one batch per query."""
+    while True:
+        rows = db.session.execute(
+            db.select(URLMap.id, URLMap.short_id)
+            .where(URLMap.id > after_id)
+            .order_by(URLMap.id)
+            .limit(batch_size)
+        ).all()
+        yield from rows
+        if len(rows) < batch_size:
+            return
+        after_id = rows[-1].id
+
+def read_id_sequence():
+    """Current (next_value, scramble_key) of the short ID sequence."""
+    row = db.session.execute(
+        db.select(IDSequence.next_value, IDSequence.scramble_key).where(IDSequence.name == 'url_map')
+    ).one()
+    return row.next_value, row.scramble_key
+
+short_id_guard = ShortIDGuard(
+    iter_short_ids,
+    lambda: db.session.query(URLMap.id).count(),
+    read_id_sequence,
+    capacity=app.config['SHORT_ID_FILTER_CAPACITY'],
+    error_rate=app.config['SHORT_ID_FILTER_ERROR_RATE'],
+    refresh_interval=app.config['SHORT_ID_FILTER_REFRESH_INTERVAL'],
+    sequence_headroom=app.config['SHORT_ID_FILTER_SEQUENCE_HEADROOM'],
+)
 
 # Create the database automatically
 with app.app_context():
     db.create_all()
+    upgrade_schema()
+    short_id_guard.build()
 
 # --- Helper Functions ---
+def find_existing_url(original_url):
+    """Looks up an already shortened URL through the url_hash index."""
+    normalized = normalize_url(original_url)
+    candidates = URLMap.query.filter_by(url_hash=hash_url(original_url))
+    # Confirm the match so a (very unlikely) hash collision can never return the wrong link
+    return next((link for link in candidates if normalize_url(link.original_url) == normalized), None)
+
+def lease_id_block(size):
+    """Atomically reserves `size` sequence values in its own short transaction."""
+    with db.engine.begin() as connection:
+        connection.execute(
+            db.update(IDSequence)
+            .where(IDSequence.name == 'url_map')
+            .values(next_value=IDSequence.next_value + size)
+        )
+        row = connection.execute(
+            db.select(IDSequence.next_value, IDSequence.scramble_key).where(IDSequence.name == 'url_map')
+        ).one()
+    return row.next_value - size, row.scramble_key
+
+short_id_allocator = ShortIDAllocator(lease_id_block, block_size=app.config['SHORT_ID_BLOCK_SIZE'])
+
 def generate_short_id():
-    """Generates a random 6-character short ID."""
-    characters = string.ascii_letters + string.digits
-    return ''.join(random.choice(characters) for _ in range(6))
+    """Returns a unique, non-sequential 7-character short ID."""
+    return short_id_allocator.allocate()
 
-def is_valid_url(url):
-    """Verifies if the URL is correct/reachable by sending a quick request."""
+def record_verification(url_id, reachable):
+    """Stores a background check result; runs on a verifier pool thread."""
+    store_status(url_id, STATUS_VERIFIED if reachable else STATUS_UNREACHABLE)
+
+def store_status(url_id, status):
     try:
-        response = requests.head(url, timeout=3, allow_redirects=True)
-        return response.status_code < 400
-    except requests.RequestException:
-        return False
+        with app.app_context():
+            URLMap.query.filter_by(id=url_id).update({'status': status})
+            db.session.commit()
+    except Exception:
+        logging.exception('Could not store verification status for url_map.id=%s', url_id)
+
+def verify_in_background(link):
+    url_id = link.id
+    scheduled = url_verifier.submit(link.original_url, lambda url, reachable: record_verification(url_id, reachable))
+    if scheduled is None:
+        # Every check slot is taken: mark it like a bulk link whose check cannot start
+        logging.warning('Verification queue full; url_map.id=%s left unverified', url_id)
+        store_status(url_id, STATUS_UNVERIFIED)
+
+def fetch_links_page(query, before=None, page_size=None):
+    """Keyset pagination on URLMap.id, newest first. Returns (links, next_cursor)."""
+    page_size = page_size or app.config['HISTORY_PAGE_SIZE']
+    if before is not None:
+        query = query.filter(URLMap.id < before)
+    # One extra row tells us whether an older page exists
+    links = query.order_by(URLMap.id.desc()).limit(page_size + 1).all()
+    next_cursor = links[page_size - 1].id if len(links) > page_size else None
+    return links[:page_size], next_cursor
+
+def serialize_link(link):
+    return {
+        'id': link.id,
+        'original_url': link.original_url,
+        'short_id': link.short_id,
+        'short_url': request.host_url + link.short_id,
+        'status': link.status,
+    }
+
+def lookup_original_url(short_id):
+    """Read-through cache in front of the short_id lookup. Returns None for unknown IDs."""
+    original_url = redirect_cache.get(short_id)
+    if original_url is None:
+        if not short_id_guard.might_exist(short_id):
+            # Definitely unknown: skip the query and keep scanner traffic out of the LRU
+            return None
+        link = URLMap.query.filter_by(short_id=short_id).first()
+        original_url = link.original_url if link else MISSING
+        redirect_cache.put(short_id, original_url)
+    return None if original_url is MISSING else original_url
 
 # --- Routes ---
 @app.route('/', methods=['GET', 'POST'])
@@ -49,13 +261,8 @@ def home():
         if not original_url.startswith(('http://', 'https://')):
             original_url = 'http://' + original_url
 
-        # Check if URL is real (Requirement: "Try to verify whether the URL... is correct")
-        if not is_valid_url(original_url):
-            flash('Error: The URL you entered does not exist or is unreachable.', 'danger')
-            return render_template('home.html')
-
         # Check if we already shortened this URL to avoid duplicates
-        existing_url = URLMap.query.filter_by(original_url=original_url).first()
+        existing_url = find_existing_url(original_url)
         if existing_url:
             short_id = existing_url.short_id
         else:
@@ -64,6 +271,14 @@ def home():
             new_entry = URLMap(original_url=original_url, short_id=short_id)
             db.session.add(new_entry)
             db.session.commit()
+            short_id_guard.add(short_id)
+
+            # Check if URL is real (Requirement: "Try to verify whether the URL... is correct").
+            # The link is stored as 'pending' right away and updated once the check finishes.
+            verify_in_background(new_entry)
+
+        # Warm the redirect cache (also replaces any cached "not found" entry)
+        redirect_cache.put(short_id, original_url)
 
         shortened_url = request.host_url + short_id
 
@@ -71,15 +286,35 @@ def home():
 
 @app.route('/history')
 def history():
-    
-    all_urls = URLMap.query.all()
-    return render_template('history.html', urls=all_urls)
+    before = request.args.get('before', type=int)
+    urls, next_cursor = fetch_links_page(URLMap.query, before)
+    return render_template('history.html', urls=urls, before=before, next_cursor=next_cursor)
+
+@app.route('/api/history')
+def api_history():
+    """JSON variant of /history for infinite scroll: pass next_cursor back as ?before=."""
+    before = request.args.get('before', type=int)
+    limit = request.args.get('limit', app.config['HISTORY_PAGE_SIZE'], type=int)
+    limit = max(1, min(limit, app.config['HISTORY_MAX_PAGE_SIZE']))
+    urls, next_cursor = fetch_links_page(URLMap.query, before, limit)
+    return jsonify({'links': [serialize_link(url) for url in urls], 'next_cursor': next_cursor})
 
 @app.route('/<short_id>')
 def redirect_to_original(short_id):
-    # Find the original URL in the database and redirect
-    link = URLMap.query.filter_by(short_id=short_id).first_or_404()
-    return redirect(link.original_url)
+    # Find the original URL (cache first, then database) and redirect
+    original_url = lookup_original_url(short_id)
+    if original_url is None:
+        abort(404)
+    return redirect(original_url)
+
+@app.route('/stats')
+def stats():
+    return jsonify({
+        'redirect_cache': redirect_cache.stats(),
+        'url_verifier': url_verifier.stats(),
+        'short_id_allocator': short_id_allocator.stats(),
+        'short_id_filter': short_id_guard.stats(),
+    })
 
 if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file
@@ -0,0 +1,146 @@
+"""Benchmark for the short ID allocator.
+
+Measures allocation throughput and proves there are no collisions:
+  * every allocated ID decodes and unscrambles back to the sequence number it came from
+    (so the mapping is injective), and a prefix is additionally checked with a set;
+  * in --workers mode, several processes lease blocks from one SQLite sequence table
+    and the leased ranges are checked to be disjoint.
+
+Usage:
+    python benchmark_short_ids.py --count 20000000
+    python benchmark_short_ids.py --count 5000000 --workers 4
+"""
+import argparse
+import multiprocessing
+import os
+import sqlite3
+import tempfile
+import time
+
+from short_ids import ShortIDAllocator, FeistelScrambler, decode_base62
+
+SCRAMBLE_KEY = 'benchmark-key'
+
+
+def memory_lease():
+    state = {'next': 1}
+
+    def lease(size):
+        start = state['next']
+        state['next'] += size
+        return start, SCRAMBLE_KEY
+    return lease
+
+
+def sqlite_lease(path, leased):
+    """Same protocol as the app's lease_id_block(), against a shared SQLite file."""
+    def lease(size):
+        connection = sqlite3.connect(path, timeout=30, isolation_level=None)
+        try:
+            connection.execute('BEGIN IMMEDIATE')
+            connection.execute(
+                "UPDATE id_sequence SET next_value = next_value + ? WHERE name = 'url_map'", (size,)
+            )
+            next_value, = connection.execute(
+                "SELECT next_value FROM id_sequence WHERE name = 'url_map'"
+            ).fetchone()
+            connection.execute('COMMIT')
+        finally:
+            connection.close()
+        leased.append((next_value - size, next_value))
+        return next_value - size, SCRAMBLE_KEY
+    return lease
+
+
+def verify(short_ids, first_number, scrambler):
+    for offset, short_id in enumerate(short_ids):
+        if scrambler.unscramble(decode_base62(short_id)) != first_number + offset:
+            raise AssertionError(f'{short_id} does not map back to {first_number + offset}')
+
+
+def run_single(count, block_size, batch, set_check):
+    allocator = ShortIDAllocator(memory_lease(), block_size=block_size)
+    scrambler = FeistelScrambler(SCRAMBLE_KEY)
+    seen = set()
+    allocated = 0
+    alloc_seconds = 0.0
+
+    while allocated < count:
+        size = min(batch, count - allocated)
+        started = time.perf_counter()
+        short_ids = allocator.allocate_many(size)
+        alloc_seconds += time.perf_counter() - started
+
+        verify(short_ids, allocated + 1, scrambler)
+        if len(seen) < set_check:
+            seen.update(short_ids[:set_check - len(seen)])
+        allocated += size
+
+    if len(seen) != min(count, set_check):
+        raise AssertionError('duplicate short IDs in the set-checked prefix')
+
+    print(f'allocated:        {allocated:,} IDs')
+    print(f'throughput:       {allocated / alloc_seconds:,.0f} IDs/sec')
+    print(f'blocks leased:    {allocator.blocks_leased:,} (block size {block_size:,})')
+    print(f'set-checked:      {len(seen):,} IDs, 0 duplicates')
+    print(f'round-trip check: {allocated:,} IDs, 0 collisions')
+
+
+def worker(path, count, block_size, batch, results):
+    leased = []
+    allocator = ShortIDAllocator(sqlite_lease(path, leased), block_size=block_size)
+    started = time.perf_counter()
+    allocated = 0
+    while allocated < count:
+        allocated += len(allocator.allocate_many(min(batch, count - allocated)))
+    results.put((os.getpid(), allocated, time.perf_counter() - started, leased))
+
+
+def run_workers(count, workers, block_size, batch):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'sequence.db')
+        connection = sqlite3.connect(path)
+        connection.execute('CREATE TABLE id_sequence (name TEXT PRIMARY KEY, next_value INTEGER, scramble_key TEXT)')
+        connection.execute("INSERT INTO id_sequence VALUES ('url_map', 1, ?)", (SCRAMBLE_KEY,))
+        connection.commit()
+        connection.close()
+
+        results = multiprocessing.Queue()
+        per_worker = count // workers
+        started = time.perf_counter()
+        processes = [
+            multiprocessing.Process(target=worker, args=(path, per_worker, block_size, batch, results))
+            for _ in range(workers)
+        ]
+        for process in processes:
+            process.start()
+        reports = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+        elapsed = time.perf_counter() - started
+
+    ranges = sorted(block for report in reports for block in report[3])
+    for (_, previous_end), (start, _) in zip(ranges, ranges[1:]):
+        if start < previous_end:
+            raise AssertionError('two workers leased overlapping blocks')
+
+    total = sum(report[1] for report in reports)
+    for pid, allocated, seconds, leased in reports:
+        print(f'worker {pid}: {allocated:,} IDs in {seconds:.2f}s, {len(leased):,} leases')
+    print(f'aggregate throughput: {total / elapsed:,.0f} IDs/sec across {workers} processes')
+    print(f'leased blocks: {len(ranges):,}, overlapping: 0')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--count', type=int, default=20_000_000)
+    parser.add_argument('--workers', type=int, default=0, help='lease from a shared SQLite sequence with N processes')
+    parser.add_argument('--block-size', type=int, default=1000)
+    parser.add_argument('--batch', type=int, default=100_000, help='IDs requested per allocate_many() call')
+    parser.add_argument('--set-check', type=int, default=2_000_000, help='IDs additionally checked with a set')
+    args = parser.parse_args()
+
+    if args.workers:
+        run_workers(args.count, args.workers, args.block_size, args.batch)
+    else:
+        run_single(args.count, args.block_size, args.batch, args.set_check)
@@ -0,0 +1,231 @@
+import hashlib
+import logging
+import math
+import threading
+import time
+
+from short_ids import FeistelScrambler, sequence_number
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings: no false negatives, tunable false positives.
+
+    Sized for `capacity` items at `error_rate`; the k bit positions come from double
+    hashing one 128-bit blake2b digest, so each add/lookup hashes the key only once.
+    `count` only counts adds that set a new bit, so adding a key again does not inflate it.
+    """
+
+    def __init__(self, capacity, error_rate):
+        if capacity < 1 or not 0 < error_rate < 1:
+            raise ValueError('capacity must be >= 1 and 0 < error_rate < 1')
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.num_bits + 7) // 8)
+        self._lock = threading.Lock()   # add() is a read-modify-write on the bit array
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def add(self, key):
+        """Sets the key's bits; returns False if they were all set already."""
+        positions = self._positions(key)
+        bits, added = self._bits, False
+        with self._lock:
+            for position in positions:
+                mask = 1 << (position & 7)
+                if not bits[position >> 3] & mask:
+                    bits[position >> 3] |= mask
+                    added = True
+            if added:
+                self.count += 1
+        return added
+
+    def __contains__(self, key):
+        bits = self._bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+    @property
+    def memory_bytes(self):
+        return len(self._bits)
+
+    def estimated_error_rate(self):
+        """Expected false-positive rate at the current fill: (1 - e^(-kn/m))^k."""
+        return (1 - math.exp(-self.num_hashes * self.count / self.num_bits)) ** self.num_hashes
+
+
+class ShortIDGuard:
+    """Bloom filter over every stored short_id, answering "definitely unknown" without a query.
+
+    load_rows(after_id) must yield (id, short_id) rows with id > after_id in ascending
+    order; it feeds the initial streamed scan and the incremental refreshes. count_rows()
+    sizes the first filter. read_sequence() returns the short ID sequence's
+    (next_value, scramble_key). Call build() at startup, or the first lookup builds it.
+
+    Links created in this process are add()ed directly. Links created by other worker
+    processes are picked up by a refresh, which the first miss after `refresh_interval`
+    seconds runs. Every ID the allocator hands out unscrambles to a sequence value, and
+    a refresh reads the sequence before scanning, so a miss is definite when the ID:
+      * cannot come from the sequence at all (wrong length or alphabet, outside the
+        permutation domain); no such ID is created any more and the first scan saw
+        the legacy ones;
+      * unscrambles to at least next_value + `sequence_headroom`, with next_value read
+        less than `refresh_interval` ago: no worker can have leased that value yet.
+    Anything below that line may be a sibling's link the filter has not seen yet and
+    goes to the database (stale_misses); an ID guessed at random lands there with
+    probability (next_value + sequence_headroom) / 2**40. sequence_headroom must exceed
+    the values all workers lease in one refresh_interval; a refresh that sees the
+    sequence move faster doubles it. Once more IDs are stored than the filter was
+    sized for, the next refresh rebuilds it at twice the size so the false-positive
+    rate holds. Until a build succeeds every ID is reported as possibly present (fail open).
+    """
+
+    def __init__(self, load_rows, count_rows, read_sequence, capacity=1000000, error_rate=0.001,
+                 refresh_interval=1.0, sequence_headroom=1000000):
+        self.load_rows = load_rows
+        self.count_rows = count_rows
+        self.read_sequence = read_sequence
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.refresh_interval = refresh_interval
+        self.sequence_headroom = sequence_headroom
+        self._filter = None
+        self._last_id = 0
+        self._last_refresh = 0.0
+        self._refresh_lock = threading.Lock()
+        self._scrambler = None
+        self._scramble_key = None
+        self._sequence = (0, 0.0)   # (next_value, monotonic time it was read), replaced as a pair
+        self.checks = 0
+        self.rejected = 0
+        self.stale_misses = 0
+        self.refreshes = 0
+        self.rebuilds = 0
+
+    def build(self):
+        """Full streamed scan into a filter sized for max(capacity, 2 * stored IDs)."""
+        with self._refresh_lock:
+            self._last_refresh = time.monotonic()
+            self._rebuild(max(self.capacity, 2 * self.count_rows()))
+
+    def _read_sequence(self):
+        """Reads the sequence ahead of a scan, so every value leased later is at or above it."""
+        read_at = time.monotonic()
+        next_value, scramble_key = self.read_sequence()
+        if scramble_key != self._scramble_key:
+            self._scrambler = FeistelScrambler(scramble_key)
+            self._scramble_key = scramble_key
+        return next_value, read_at
+
+    def _set_sequence(self, next_value, read_at):
+        last_value, last_read_at = self._sequence
+        if self._filter is not None and read_at > last_read_at:
+            per_interval = (next_value - last_value) * self.refresh_interval / (read_at - last_read_at)
+            headroom = self.sequence_headroom
+            while per_interval > headroom / 2:
+                headroom *= 2
+            if headroom != self.sequence_headroom:
+                logging.warning('Short ID sequence moved %d values per refresh interval; headroom raised to %d',
+                                per_interval, headroom)
+                self.sequence_headroom = headroom
+        self._sequence = (next_value, read_at)
+
+    def _rebuild(self, capacity):
+        sequence = self._read_sequence()
+        bloom, last_id = BloomFilter(capacity, self.error_rate), 0
+        for row_id, short_id in self.load_rows(0):
+            bloom.add(short_id)
+            last_id = row_id
+        self._set_sequence(*sequence)
+        self._filter, self._last_id = bloom, last_id
+        self.rebuilds += 1
+
+    def add(self, short_id):
+        if self._filter is not None:
+            self._filter.add(short_id)
+
+    def refresh(self):
+        """Adds IDs inserted since the last scan (by any process); returns False if one is already running."""
+        if not self._refresh_lock.acquire(blocking=False):
+            return False
+        try:
+            self._last_refresh = time.monotonic()
+            bloom = self._filter
+            if bloom.count > bloom.capacity:
+                self._rebuild(2 * bloom.capacity)
+                return True
+            sequence = self._read_sequence()
+            # IDs this process add()ed are scanned again here; add() does not count them twice
+            for row_id, short_id in self.load_rows(self._last_id):
+                bloom.add(short_id)
+                self._last_id = row_id
+            self._set_sequence(*sequence)
+            self.refreshes += 1
+            return True
+        finally:
+            self._refresh_lock.release()
+
+    def _try_build(self):
+        if time.monotonic() - self._last_refresh < self.refresh_interval:
+            return
+        try:
+            self.build()
+        except Exception:
+            logging.exception('Short ID filter build failed; retrying in %s s', self.refresh_interval)
+
+    def might_exist(self, short_id):
+        bloom = self._filter
+        if bloom is None:
+            self._try_build()
+            return True
+        self.checks += 1
+        if short_id in bloom:
+            return True
+        refreshed = False
+        if time.monotonic() - self._last_refresh >= self.refresh_interval:
+            try:
+                refreshed = self.refresh()
+            except Exception:
+                logging.exception('Short ID filter refresh failed; using the previous scan')
+            if refreshed and short_id in self._filter:
+                return True
+        number = sequence_number(short_id, self._scrambler)
+        if number is not None:
+            next_value, read_at = self._sequence
+            fresh = refreshed or time.monotonic() - read_at < self.refresh_interval
+            if not fresh or number < next_value + self.sequence_headroom:
+                # Possibly leased by a sibling worker after the last scan
+                self.stale_misses += 1
+                return True
+        self.rejected += 1
+        return False
+
+    def stats(self):
+        bloom = self._filter
+        stats = {
+            'built': bloom is not None,
+            'refresh_interval': self.refresh_interval,
+            'checks': self.checks,
+            'rejected': self.rejected,
+            'stale_misses': self.stale_misses,
+            'refreshes': self.refreshes,
+            'rebuilds': self.rebuilds,
+            'sequence_next_value': self._sequence[0],
+            'sequence_headroom': self.sequence_headroom,
+        }
+        if bloom is not None:
+            stats.update({
+                'capacity': bloom.capacity,
+                'count': bloom.count,
+                'target_error_rate': bloom.error_rate,
+                'estimated_error_rate': round(bloom.estimated_error_rate(), 6),
+                'num_bits': bloom.num_bits,
+                'num_hashes': bloom.num_hashes,
+                'memory_bytes': bloom.memory_bytes,
+            })
+        return stats
@@ -0,0 +1,77 @@
+import threading
+import time
+from collections import OrderedDict
+
+# Stored in place of a value to remember that a key does not exist (negative caching)
+MISSING = object()
+
+
+class LRUCache:
+    """Thread-safe, size-bounded LRU cache with optional TTL and hit/miss/eviction counters."""
+
+    def __init__(self, max_size=10000, ttl=None, negative_ttl=None):
+        self.max_size = max_size
+        self.ttl = ttl                    # seconds, None = entries never expire
+        self.negative_ttl = negative_ttl  # seconds for MISSING entries, None = same as ttl
+        self._data = OrderedDict()        # key -> (value, expires_at)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        """Returns the cached value (possibly MISSING) or None when the key is not cached."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        ttl = self.ttl
+        if value is MISSING and self.negative_ttl is not None:
+            ttl = self.negative_ttl
+        expires_at = time.monotonic() + ttl if ttl else None
+
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def put_missing(self, key):
+        self.put(key, MISSING)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'max_size': self.max_size,
+                'ttl': self.ttl,
+                'negative_ttl': self.negative_ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            }
@@ -0,0 +1,134 @@
+import hashlib
+import os
+import string
+import threading
+
+BASE62_ALPHABET = string.digits + string.ascii_letters
+ID_LENGTH = 7        # legacy random IDs are 6 characters, so the two can never collide
+DOMAIN_BITS = 40     # 2**40 sequence values all fit in 7 base62 characters (62**7 > 2**40)
+
+_BASE62_INDEX = {ch: i for i, ch in enumerate(BASE62_ALPHABET)}
+
+
+def encode_base62(number, length=ID_LENGTH):
+    chars = []
+    while number:
+        number, remainder = divmod(number, 62)
+        chars.append(BASE62_ALPHABET[remainder])
+    return ''.join(reversed(chars)).rjust(length, BASE62_ALPHABET[0])
+
+
+def decode_base62(text):
+    number = 0
+    for ch in text:
+        number = number * 62 + _BASE62_INDEX[ch]
+    return number
+
+
+class FeistelScrambler:
+    """Keyed permutation of the 40-bit sequence space.
+
+    A balanced Feistel network is a bijection for any round function, so scrambled
+    IDs stay collision-free while consecutive sequence numbers map to unrelated IDs.
+    The round function is a cheap multiply/xor-shift mix keyed per round; it keeps
+    IDs non-guessable without paying for a cryptographic hash on every allocation.
+    """
+
+    MULTIPLIER = 0x9E3779B97F4A7C15
+    ROUNDS = 4
+
+    def __init__(self, key, bits=DOMAIN_BITS):
+        if bits % 2:
+            raise ValueError('bits must be even')
+        self.bits = bits
+        self.half_bits = bits // 2
+        self.half_mask = (1 << self.half_bits) - 1
+        digest = hashlib.blake2b(key.encode(), digest_size=8 * self.ROUNDS).digest()
+        self.round_keys = [int.from_bytes(digest[i:i + 8], 'big') for i in range(0, len(digest), 8)]
+
+    def _round(self, value, round_key):
+        mixed = ((value ^ round_key) * self.MULTIPLIER) & 0xFFFFFFFFFFFFFFFF
+        mixed ^= mixed >> 32
+        return mixed & self.half_mask
+
+    def scramble(self, number):
+        left, right = number >> self.half_bits, number & self.half_mask
+        for round_key in self.round_keys:
+            left, right = right, left ^ self._round(right, round_key)
+        return (left << self.half_bits) | right
+
+    def unscramble(self, number):
+        left, right = number >> self.half_bits, number & self.half_mask
+        for round_key in reversed(self.round_keys):
+            left, right = right ^ self._round(left, round_key), left
+        return (left << self.half_bits) | right
+
+
+def sequence_number(short_id, scrambler):
+    """Sequence value `short_id` was allocated from, or None if the allocator can never produce it."""
+    if len(short_id) != ID_LENGTH or any(ch not in _BASE62_INDEX for ch in short_id):
+        return None
+    number = decode_base62(short_id)
+    if number >> scrambler.bits:
+        return None
+    return scrambler.unscramble(number)
+
+
+class ShortIDAllocator:
+    """Hands out unique short IDs from blocks of a shared, monotonically increasing sequence.
+
+    lease_block(size) must atomically reserve `size` consecutive sequence values and
+    return (first_value, scramble_key). Only leasing touches the database, so a
+    process allocates block_size IDs per round trip. Blocks are tied to the process
+    that leased them, so forked workers never reuse their parent's block.
+    """
+
+    def __init__(self, lease_block, block_size=1000):
+        self.lease_block = lease_block
+        self.block_size = block_size
+        self._lock = threading.Lock()
+        self._next = 0
+        self._end = 0
+        self._pid = None
+        self._scrambler = None
+        self._scramble_key = None
+        self.blocks_leased = 0
+
+    def _refill(self, size):
+        start, key = self.lease_block(size)
+        if key != self._scramble_key:
+            self._scrambler = FeistelScrambler(key)
+            self._scramble_key = key
+        self._next, self._end, self._pid = start, start + size, os.getpid()
+        self.blocks_leased += 1
+
+    def _take(self, count):
+        """Returns up to `count` sequence values from the current block, leasing a new one if needed."""
+        if self._pid != os.getpid() or self._next >= self._end:
+            self._refill(max(self.block_size, count))
+        start = self._next
+        stop = min(self._end, start + count)
+        self._next = stop
+        return range(start, stop)
+
+    def allocate(self):
+        return self.allocate_many(1)[0]
+
+    def allocate_many(self, count):
+        short_ids = []
+        with self._lock:
+            while len(short_ids) < count:
+                for number in self._take(count - len(short_ids)):
+                    if number >> DOMAIN_BITS:
+                        raise OverflowError('short ID sequence exhausted')
+                    short_ids.append(encode_base62(self._scrambler.scramble(number)))
+        return short_ids
+
+    def stats(self):
+        with self._lock:
+            remaining = self._end - self._next if self._pid == os.getpid() else 0
+            return {
+                'block_size': self.block_size,
+                'blocks_leased': self.blocks_leased,
+                'remaining_in_block': remaining,
+            }
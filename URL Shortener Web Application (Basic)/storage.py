@@ -0,0 +1,74 @@
+"""Storage profile for running the shortener with several worker processes.
+
+Everything is read from the environment:
+
+    DATABASE_URL              SQLAlchemy URI (default: sqlite:///database.db)
+    DB_PROFILE                'multiworker' (default) or 'default' for plain SQLAlchemy settings
+    DB_POOL_SIZE              connections kept per process (default: 5)
+    DB_MAX_OVERFLOW           extra connections allowed under bursts (default: 5)
+    DB_POOL_TIMEOUT           seconds to wait for a free connection (default: 10)
+    DB_POOL_RECYCLE           seconds before a connection is replaced (default: 3600)
+    SQLITE_BUSY_TIMEOUT_MS    how long SQLite waits on a lock before failing (default: 5000)
+    SQLITE_CACHE_SIZE_KB      page cache per connection (default: 20000)
+    SQLITE_SYNCHRONOUS        NORMAL (default), FULL or OFF
+
+With the multiworker profile every SQLite connection runs in WAL mode, so readers
+never block the writer and vice versa, and waits on the write lock instead of
+failing immediately with "database is locked".
+"""
+import os
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+PROFILE_DEFAULT = 'default'
+PROFILE_MULTIWORKER = 'multiworker'
+
+
+def _env_int(name, default):
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+
+def configure_storage(app, default_uri='sqlite:///database.db'):
+    """Fills the SQLAlchemy settings in app.config. Call before SQLAlchemy(app)."""
+    uri = os.environ.get('DATABASE_URL', default_uri)
+    profile = os.environ.get('DB_PROFILE', PROFILE_MULTIWORKER)
+    if profile not in (PROFILE_DEFAULT, PROFILE_MULTIWORKER):
+        raise ValueError(f'Unknown DB_PROFILE {profile!r}')
+
+    app.config['SQLALCHEMY_DATABASE_URI'] = uri
+    app.config['DB_PROFILE'] = profile
+    if profile == PROFILE_DEFAULT:
+        return
+
+    url = make_url(uri)
+    in_memory = url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:')
+    if not in_memory:
+        # In-memory SQLite uses a single shared connection, so pool sizing does not apply
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+            'pool_size': _env_int('DB_POOL_SIZE', 5),
+            'max_overflow': _env_int('DB_MAX_OVERFLOW', 5),
+            'pool_timeout': _env_int('DB_POOL_TIMEOUT', 10),
+            'pool_recycle': _env_int('DB_POOL_RECYCLE', 3600),
+        }
+    app.config['SQLITE_PRAGMAS'] = {
+        'journal_mode': 'WAL',
+        'busy_timeout': _env_int('SQLITE_BUSY_TIMEOUT_MS', 5000),
+        'synchronous': os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL').upper(),
+        'cache_size': -_env_int('SQLITE_CACHE_SIZE_KB', 20000),   # negative = size in KiB
+    }
+
+
+def install_sqlite_pragmas(app, engine):
+    """Runs the profile's PRAGMAs on every new SQLite connection of `engine`."""
+    pragmas = app.config.get('SQLITE_PRAGMAS')
+    if not pragmas or engine.dialect.name != 'sqlite':
+        return
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+        cursor.close()
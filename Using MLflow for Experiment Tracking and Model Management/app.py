@@ -1,42 +1,23 @@
 import streamlit as st
-import joblib
-import re
-import nltk
-from nltk.corpus import stopwords
-from nltk.stem import WordNetLemmatizer
 import os
+from inference_bundle import BUNDLE_DIR, InferenceBundle
 
 # Set page configuration
 st.set_page_config(page_title="Sentiment Analysis of Real-time Flipkart Product Reviews", page_icon="🛍️")
 
-# Download NLTK resources quietly on the server
+# Load the inference bundle written by train_model.py: vocabulary, IDF weights and
+# coefficients (memory-mapped), plus the text cleaning the model was trained with
 @st.cache_resource
-def download_nltk():
-    nltk.download('stopwords', quiet=True)
-    nltk.download('wordnet', quiet=True)
-
-download_nltk()
-
-# Load the saved model and vectorizer
-@st.cache_resource
-def load_models():
-    if os.path.exists('sentiment_model.pkl') and os.path.exists('tfidf_vectorizer.pkl'):
-        model = joblib.load('sentiment_model.pkl')
-        vectorizer = joblib.load('tfidf_vectorizer.pkl')
-        return model, vectorizer
+def load_bundle():
+    if os.path.exists(os.path.join(BUNDLE_DIR, 'meta.json')):
+        return InferenceBundle(BUNDLE_DIR)
     else:
-        return None, None
-
-model, vectorizer = load_models()
+        return None
 
-# Initialize text processing tools
-lemmatizer = WordNetLemmatizer()
-stop_words = set(stopwords.words('english'))
+bundle = load_bundle()
 
 def process_input(text):
-    text = re.sub(r'[^a-zA-Z\s]', '', str(text)).lower()
-    words = [lemmatizer.lemmatize(w) for w in text.split() if w not in stop_words]
-    return ' '.join(words)
+    return bundle.clean(text)
 
 # UI Layout
 st.title("🛍️ Sentiment Analysis of Real-time Flipkart Product Reviews")
@@ -46,8 +27,8 @@ st.subheader("Model Performance")
 st.write(f"Macro F1 Score: {0.7864:.4f}")
 st.write(f"Weighted F1 Score: {0.8622:.4f}")
 
-if model is None or vectorizer is None:
-    st.error("Model files not found! Please run train_model.py first to generate the .pkl files.")
+if bundle is None:
+    st.error("Model bundle not found! Please run train_model.py first to generate it.")
 else:
     user_review = st.text_area("Paste a review here:", placeholder="Example: The product quality is good but delivery was late.")
 
@@ -57,8 +38,7 @@ else:
         else:
             with st.spinner("Analyzing..."):
                 cleaned_text = process_input(user_review)
-                vectorized_text = vectorizer.transform([cleaned_text])
-                prediction = model.predict(vectorized_text)[0]
+                prediction = int(bundle.predict_proba([cleaned_text])[0] >= 0.5)
                 
                 st.divider()
                 if prediction == 1:
@@ -0,0 +1,152 @@
+"""Self-contained inference bundle for the sentiment model.
+
+A bundle is a directory holding everything prediction needs, so serving imports neither
+scikit-learn nor NLTK and never touches the NLTK corpora:
+
+  meta.json        format version, classes, intercept and the TF-IDF settings
+  vocabulary.json  feature terms in column order
+  idf.npy          IDF weight per feature        (loaded memory-mapped)
+  coef.npy         model coefficient per feature (loaded memory-mapped)
+  stopwords.json   stopwords removed while cleaning, if the model was trained on cleaned text
+  lemmas.json      token -> lemma for every token seen in training whose lemma differs
+
+Tokens never seen in training are kept as they are rather than lemmatized.
+"""
+import json
+import os
+import re
+from collections import Counter
+
+import numpy as np
+
+from preprocessing import TextCleaner
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+BUNDLE_DIR = os.path.join(BASE_DIR, 'inference_bundle')
+FORMAT_VERSION = 1
+
+
+def _check_supported(vectorizer):
+    """The bundle re-implements TfidfVectorizer.transform for the settings training uses."""
+    expected = {
+        'analyzer': 'word', 'tokenizer': None, 'preprocessor': None, 'stop_words': None,
+        'strip_accents': None, 'binary': False, 'sublinear_tf': False, 'norm': 'l2', 'use_idf': True,
+    }
+    unsupported = {name: getattr(vectorizer, name) for name, value in expected.items()
+                   if getattr(vectorizer, name) != value}
+    if unsupported:
+        raise ValueError(f"Cannot export a vectorizer with {unsupported}")
+
+
+def _idf(vectorizer):
+    try:
+        return vectorizer.idf_
+    except AttributeError:
+        # Vectorizers pickled by older scikit-learn releases keep the IDF as a sparse diagonal
+        return vectorizer._tfidf._idf_diag.diagonal()
+
+
+def export_bundle(path, vectorizer, model, cleaner=None):
+    """Writes a bundle for a fitted TfidfVectorizer and binary LogisticRegression.
+
+    cleaner is the TextCleaner the training text went through, or None if the model was
+    trained on raw text. Its lemma cache supplies the lemma table, so pass the cleaner
+    that cleaned the training data.
+    """
+    _check_supported(vectorizer)
+    os.makedirs(path, exist_ok=True)
+    terms = sorted(vectorizer.vocabulary_, key=vectorizer.vocabulary_.get)
+    meta = {
+        'format_version': FORMAT_VERSION,
+        'classes': [int(c) for c in model.classes_],
+        'intercept': float(model.intercept_[0]),
+        'lowercase': vectorizer.lowercase,
+        'token_pattern': vectorizer.token_pattern,
+        'ngram_range': list(vectorizer.ngram_range),
+        'clean_text': cleaner is not None,
+    }
+    with open(os.path.join(path, 'meta.json'), 'w') as f:
+        json.dump(meta, f, indent=2)
+    with open(os.path.join(path, 'vocabulary.json'), 'w') as f:
+        json.dump(terms, f)
+    np.save(os.path.join(path, 'idf.npy'), np.asarray(_idf(vectorizer), dtype=np.float64))
+    np.save(os.path.join(path, 'coef.npy'), np.asarray(model.coef_[0], dtype=np.float64))
+    if cleaner is not None:
+        with open(os.path.join(path, 'stopwords.json'), 'w') as f:
+            json.dump(sorted(cleaner.stop_words), f)
+        with open(os.path.join(path, 'lemmas.json'), 'w') as f:
+            json.dump({word: lemma for word, lemma in cleaner.lemmas.items() if word != lemma}, f, sort_keys=True)
+
+
+def _keep(word):
+    return word
+
+
+class InferenceBundle:
+    """Cleans text and predicts sentiment from an exported bundle.
+
+    predict_proba() computes the same l2-normalised TF-IDF dot product as
+    vectorizer.transform() followed by model.predict_proba(), one vectorised numpy pass
+    per batch.
+    """
+
+    def __init__(self, path=BUNDLE_DIR):
+        with open(os.path.join(path, 'meta.json')) as f:
+            meta = json.load(f)
+        if meta['format_version'] != FORMAT_VERSION:
+            raise ValueError(f"Unsupported bundle format {meta['format_version']} in {path}")
+        with open(os.path.join(path, 'vocabulary.json')) as f:
+            self.vocabulary = {term: index for index, term in enumerate(json.load(f))}
+        self.idf = np.load(os.path.join(path, 'idf.npy'), mmap_mode='r')
+        self.coef = np.load(os.path.join(path, 'coef.npy'), mmap_mode='r')
+        self.intercept = meta['intercept']
+        self.classes = meta['classes']
+        self.lowercase = meta['lowercase']
+        self.token_pattern = re.compile(meta['token_pattern'])
+        self.min_n, self.max_n = meta['ngram_range']
+
+        self.cleaner = None
+        if meta['clean_text']:
+            with open(os.path.join(path, 'stopwords.json')) as f:
+                stop_words = json.load(f)
+            self.cleaner = TextCleaner(stop_words, lemmatize=_keep)
+            with open(os.path.join(path, 'lemmas.json')) as f:
+                self.cleaner.lemmas.update(json.load(f))
+
+    def clean(self, text):
+        """The model's input for `text`: the training-time cleaning, or `text` itself."""
+        return self.cleaner.clean(text) if self.cleaner is not None else str(text)
+
+    def _features(self, text):
+        tokens = self.token_pattern.findall(text.lower() if self.lowercase else text)
+        vocabulary = self.vocabulary
+        found = []
+        for n in range(self.min_n, self.max_n + 1):
+            for i in range(len(tokens) - n + 1):
+                index = vocabulary.get(tokens[i] if n == 1 else ' '.join(tokens[i:i + n]))
+                if index is not None:
+                    found.append(index)
+        return Counter(found)
+
+    def predict_proba(self, cleaned_texts):
+        """Probability of the positive class (label 1) for each already cleaned text."""
+        indices, counts, lengths = [], [], []
+        for text in cleaned_texts:
+            features = self._features(text)
+            indices.extend(features.keys())
+            counts.extend(features.values())
+            lengths.append(len(features))
+        docs = np.repeat(np.arange(len(lengths)), lengths)
+        indices = np.asarray(indices, dtype=np.intp)
+        tfidf = np.asarray(counts, dtype=np.float64) * self.idf[indices]
+        norms = np.sqrt(np.bincount(docs, weights=tfidf * tfidf, minlength=len(lengths)))
+        norms[norms == 0] = 1.0
+        scores = np.bincount(docs, weights=tfidf * self.coef[indices], minlength=len(lengths)) / norms
+        positive = 1.0 / (1.0 + np.exp(-(scores + self.intercept)))
+        return positive if self.classes[1] == 1 else 1.0 - positive
+
+    def predict(self, text):
+        """Label (1 positive, 0 negative) and positive probability for one raw review."""
+        probability = float(self.predict_proba([self.clean(text)])[0])
+        return int(probability >= 0.5), probability
+
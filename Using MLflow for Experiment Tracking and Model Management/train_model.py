@@ -5,6 +5,9 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 import joblib
 import mlflow.pyfunc
+import tempfile
+
+from inference_bundle import BUNDLE_DIR, export_bundle
 
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.model_selection import train_test_split
@@ -69,13 +72,23 @@ def train_model(C_value=1.0):
             registered_model_name="Flipkart_Sentiment_Model"
         )
 
+        # Inference bundle the Streamlit app loads (the model is trained on raw text, no cleaning)
+        with tempfile.TemporaryDirectory() as bundle_dir:
+            export_bundle(bundle_dir, vectorizer, model)
+            mlflow.log_artifacts(bundle_dir, artifact_path="inference_bundle")
+
         # Add tags
         mlflow.set_tag("project", "Flipkart Sentiment")
         mlflow.set_tag("algorithm", "Logistic Regression")
 
         print("F1 Score:", f1)
+        return f1, vectorizer, model
 
 
 if __name__ == "__main__":
-    for C in [0.1, 1.0, 10.0]:
-        train_model(C)
\ No newline at end of file
+    runs = [train_model(C) for C in [0.1, 1.0, 10.0]]
+
+    # The app serves the run with the best F1 score
+    best_f1, best_vectorizer, best_model = max(runs, key=lambda run: run[0])
+    export_bundle(BUNDLE_DIR, best_vectorizer, best_model)
+    print(f"Inference bundle (F1 {best_f1:.4f}) saved to {BUNDLE_DIR}")
\ No newline at end of file